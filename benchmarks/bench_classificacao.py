@@ -0,0 +1,156 @@
+# benchmarks/bench_classificacao.py
+# Micro-benchmark do motor de classificação: compara as funções de classificacao.py
+# com a implementação original (um re.search por palavra-chave/combustível, sem cache)
+# e confere que os resultados são idênticos. Dois lotes: um só de strings diferentes (cache
+# frio de verdade, todo acesso é miss) e um com repetições como numa execução real; cada caso
+# compilado informa os hits e misses do cache.
+#
+# Uso: python benchmarks/bench_classificacao.py [repeticoes]
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import classificacao
+from classificacao import TURBO_KEYWORDS_SORTED, FUEL_REGEX_LIST
+
+# Strings no formato do site (slides, tabela e grids do comparativo), com repetições como numa execução real
+AMOSTRAS = [
+    "Motor 1.0 Firefly Flex",
+    "Motor 1.0 Turbo 200 Flex",
+    "Motor 1.6 THP Flex Câmbio automático de 6 velocidades",
+    "1.6 16V Flex Câmbio manual de 5 marchas",
+    "Motor 2.2 BlueHDi Diesel",
+    "2.0 HDi 150 cv Diesel Câmbio automático",
+    "Motor elétrico 100 kW~136 cv Bateria 50 kWh",
+    "1.2 PureTech Turbo 130 Gasolina",
+    "Motor 1.5 Híbrido 48V",
+    "Motor 1.0 TGDI Etanol/Gasolina",
+    "Motor 2.0 GNV",
+    "Motorização 1.6 VTi Flex Start",
+    "",
+    None,
+]
+LOTE = AMOSTRAS * 50
+# Mesmo tamanho, nenhuma string repetida (um sufixo numérico não muda a classificação)
+LOTE_UNICO = [f"{amostra} {i}" for i in range(len(LOTE) // len(AMOSTRAS[:-2]) + 1) for amostra in AMOSTRAS[:-2]][:len(LOTE)]
+ROTULOS = ["consumo na cidade", "potência máxima", "tração", "capacidade/carga", "direção", "câmbio / transmissão"]
+NOMES = ["C3 Aircross Shine", "Basalt Feel-Turbo", "Ë-JUMPY 2.0", "C4 Cactus​", "Jumper L3H2."]
+
+
+# --- IMPLEMENTAÇÃO ORIGINAL (referência) ---
+def get_turbo_value_original(motor_string):
+    if not motor_string: return None
+    try:
+        motor_string_upper = motor_string.upper()
+        motor_part_only = motor_string_upper.split("CÂMBIO")[0].split("AUTOMÁTICO")[0].split("MANUAL")[0]
+        for term in TURBO_KEYWORDS_SORTED:
+            if re.search(r'\b' + re.escape(term) + r'\b', motor_part_only):
+                return "Sim"
+    except Exception:
+        pass
+    return None
+
+def get_fuel_value_original(motor_string):
+    if not motor_string: return None
+    try:
+        for fuel in FUEL_REGEX_LIST:
+            if re.search(fuel["regex"], motor_string, re.IGNORECASE):
+                return fuel["tipo"]
+    except Exception:
+        pass
+    return None
+
+def get_motor_value_original(motor_string):
+    if not motor_string: return None
+    try:
+        match_displacement = re.search(r"\b(\d\.\d+)\b", motor_string)
+        match_electric_kw = re.search(r"(\d+\s*kW~\d+\s*cv)", motor_string, re.IGNORECASE)
+        if match_displacement:
+            return match_displacement.group(1)
+        elif match_electric_kw:
+            return match_electric_kw.group(1)
+        elif "elétrico" in motor_string.lower():
+            return "Elétrico"
+    except Exception:
+        pass
+    return None
+
+def classificar_original(motor_strings):
+    return [{
+        "motor": get_motor_value_original(s),
+        "turbo": get_turbo_value_original(s),
+        "combustivel": get_fuel_value_original(s),
+    } for s in motor_strings]
+
+def rotulo_original(spec_label, grid_unico=False):
+    safe_label = spec_label.replace(' ', '_').replace('ç', 'c').replace('ã', 'a').replace('ê', 'e').replace('õ', 'o')
+    return safe_label if grid_unico else safe_label.replace('/', '_')
+
+def nome_original(nome):
+    return nome.upper().replace('Ë', 'E').replace('-', '').replace('.', '').replace('​', '').strip()
+# --- FIM DA REFERÊNCIA ---
+
+
+def conferir_resultados():
+    assert classificacao.classificar_motores(AMOSTRAS) == classificar_original(AMOSTRAS)
+    assert classificacao.classificar_motores(LOTE_UNICO) == classificar_original(LOTE_UNICO)
+    for rotulo in ROTULOS:
+        for grid_unico in (False, True):
+            assert classificacao.canonizar_rotulo(rotulo, grid_unico) == rotulo_original(rotulo, grid_unico)
+    for nome in NOMES:
+        assert classificacao.normalizar_nome_versao(nome) == nome_original(nome)
+    # Todas as palavras-chave de turbo isoladas e dentro de texto
+    for term in TURBO_KEYWORDS_SORTED:
+        for texto in (term, f"Motor 1.0 {term} Flex", f"{term}X", f"X{term}"):
+            assert classificacao.get_turbo_value(texto) == get_turbo_value_original(texto), texto
+    print("✔️ Resultados idênticos à implementação original.")
+
+
+FUNCOES_CACHE = (classificacao.get_motor_value, classificacao.get_turbo_value, classificacao.get_fuel_value)
+
+def limpar_cache():
+    for funcao in FUNCOES_CACHE:
+        funcao.cache_clear()
+
+def acessos_cache():
+    """(hits, misses) somados das três funções com cache."""
+    infos = [funcao.cache_info() for funcao in FUNCOES_CACHE]
+    return sum(info.hits for info in infos), sum(info.misses for info in infos)
+
+def medir_lote(titulo, lote, repeticoes):
+    def aquecer():
+        limpar_cache()
+        classificacao.classificar_motores(lote)
+
+    compilado = lambda: classificacao.classificar_motores(lote)
+    casos = [
+        ("original", lambda: classificar_original(lote), None),
+        ("compilado (cache zerado)", compilado, limpar_cache),
+        ("compilado (cache quente)", compilado, aquecer),
+    ]
+    base = None
+    print(f"\n--- {titulo}: {len(lote)} strings ({len(set(lote))} diferentes), melhor de {repeticoes} ---")
+    for nome, funcao, preparar in casos:
+        tempos = []
+        for _ in range(repeticoes):
+            if preparar: preparar()
+            antes = acessos_cache()
+            tempos.append(timeit.timeit(funcao, number=1))
+            hits, misses = (depois - anterior for depois, anterior in zip(acessos_cache(), antes))
+        tempo = min(tempos)
+        base = base or tempo
+        cache = f"  cache: {hits} hits, {misses} misses" if preparar else ""
+        print(f"   {nome:<26} {tempo * 1000:8.2f} ms  ({base / tempo:5.1f}x){cache}")
+
+def medir(repeticoes):
+    medir_lote("Strings únicas (cache frio de verdade)", LOTE_UNICO, repeticoes)
+    medir_lote("Strings repetidas (como numa execução real)", LOTE, repeticoes)
+
+
+if __name__ == "__main__":
+    conferir_resultados()
+    medir(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,148 @@
+# benchmarks/bench_e2e.py
+# Benchmark ponta a ponta sem rede: gera o site de fixtures (site_fixture.py), sobe o servidor
+# local e roda o crawler.py completo contra ele (Chrome headless), num diretório temporário.
+# Reporta tempo total e por modelo, o motor que resolveu cada modelo (HTTP ou Selenium),
+# comandos WebDriver, pico de memória e confere a saída contra o catálogo gerado.
+# Por padrão o último modelo (um utilitário, padrão Jumpy) só tem conteúdo via JavaScript,
+# então toda execução mede o caminho do Selenium de ponta a ponta junto com o motor HTTP.
+#
+# Uso: python benchmarks/bench_e2e.py [--modelos 6] [--versoes 4] [--latencia 50] [--hidratacao 0] [--so-js 1]
+#                                     [--repeticoes 1] [--env CRAWLER_WORKERS=2 ...] [--saida bench.json]
+# Pico de memória: soma do RSS do crawler + chromedriver + Chrome (com psutil); sem psutil,
+# só o maior processo filho (ru_maxrss).
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from site_fixture import gerar_site, servir
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+CRAWLER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "crawler.py")
+
+
+def memoria_arvore(processo):
+    try:
+        raiz = psutil.Process(processo.pid)
+        return sum(p.memory_info().rss for p in [raiz] + raiz.children(recursive=True))
+    except psutil.Error:
+        return 0
+
+def rodar_crawler(url_base, extra_env, argumentos=()):
+    """Roda o crawler num diretório temporário. Devolve (duração, pico de memória, diretório, código)."""
+    diretorio = tempfile.mkdtemp(prefix="bench_e2e_")
+    env = {chave: valor for chave, valor in os.environ.items() if not chave.startswith("SUPABASE_")}
+    env.update({"CRAWLER_URL_BASE": url_base, "CRAWLER_FULL_REFRESH": "1", "PYTHONUNBUFFERED": "1"})
+    env.update(extra_env)
+    inicio = time.perf_counter()
+    with open(os.path.join(diretorio, "crawler.log"), "w", encoding="utf-8") as log:
+        processo = subprocess.Popen([sys.executable, CRAWLER, *argumentos], cwd=diretorio, env=env, stdout=log, stderr=subprocess.STDOUT)
+        pico = 0
+        while processo.poll() is None:
+            if psutil: pico = max(pico, memoria_arvore(processo))
+            time.sleep(0.2)
+    duracao = time.perf_counter() - inicio
+    if not psutil: pico = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+    return duracao, pico, diretorio, processo.returncode
+
+def conferir_saida(diretorio, itens):
+    """Compara citroen_data.json com o catálogo: versões encontradas e manuais corretos."""
+    try:
+        with open(os.path.join(diretorio, "citroen_data.json"), encoding="utf-8") as f:
+            registros = json.load(f)
+    except (OSError, ValueError):
+        return {"versoes": 0, "esperadas": sum(len(item["versoes"]) for item in itens), "manuais_corretos": 0, "com_motor": 0}
+    esperados = {(item["modelo"], v["nome"]): v["pdf"] for item in itens for v in item["versoes"]}
+    encontrados = {(r.get("modelo"), r.get("versao")): r for r in registros}
+    return {
+        "versoes": len(set(encontrados) & set(esperados)),
+        "esperadas": len(esperados),
+        "manuais_corretos": sum(1 for chave, pdf in esperados.items() if (encontrados.get(chave, {}).get("manual_url") or "").endswith(pdf)),
+        "com_motor": sum(1 for chave in esperados if encontrados.get(chave, {}).get("motor")),
+    }
+
+def motor_modelo(dados):
+    """Motor que resolveu o modelo, pelas etapas registradas no citroen_metricas.json."""
+    etapas = dados.get("etapas", {})
+    if "carregar_pagina" in etapas: return "selenium"
+    return "http" if "motor_http" in etapas else "?"
+
+def medir(args, extra_env):
+    site = tempfile.mkdtemp(prefix="site_fixture_")
+    itens = gerar_site(site, args.modelos, args.versoes, args.hidratacao, so_js=args.so_js)
+    servidor, url_base = servir(site, args.latencia)
+    execucoes = []
+    try:
+        for repeticao in range(args.repeticoes):
+            duracao, pico, diretorio, codigo = rodar_crawler(url_base, extra_env)
+            try:
+                with open(os.path.join(diretorio, "citroen_metricas.json"), encoding="utf-8") as f:
+                    metricas = json.load(f)
+            except (OSError, ValueError):
+                metricas = {"modelos": {}, "contadores": {}}
+            modelos = metricas.get("modelos", {})
+            execucoes.append({
+                "repeticao": repeticao + 1,
+                "codigo_saida": codigo,
+                "duracao_s": round(duracao, 3),
+                "pico_memoria_mb": round(pico / 1048576, 1),
+                "comandos_webdriver": metricas.get("contadores", {}).get("comandos_webdriver", 0),
+                "por_modelo": {modelo: {"duracao_s": dados.get("duracao_s"), "comandos_webdriver": dados.get("comandos_webdriver", 0),
+                                        "motor": motor_modelo(dados)}
+                               for modelo, dados in modelos.items()},
+                "conferencia": conferir_saida(diretorio, itens),
+                "diretorio": diretorio,
+            })
+    finally:
+        servidor.shutdown()
+    return execucoes
+
+def imprimir(execucoes, args):
+    print(f"\n--- {args.modelos} modelos x {args.versoes} versões, latência {args.latencia} ms, hidratação {args.hidratacao} ms, {args.so_js} só em JS ---")
+    for execucao in execucoes:
+        conferencia = execucao["conferencia"]
+        tempos = [dados["duracao_s"] or 0 for dados in execucao["por_modelo"].values()]
+        motores = {}
+        for dados in execucao["por_modelo"].values():
+            motores.setdefault(dados["motor"], []).append(dados["duracao_s"] or 0)
+        print(f"   #{execucao['repeticao']}: {execucao['duracao_s']:.2f}s total, "
+              f"{(sum(tempos) / len(tempos)) if tempos else 0:.2f}s/modelo, "
+              f"{execucao['comandos_webdriver']} comandos WebDriver, pico {execucao['pico_memoria_mb']:.0f} MB, "
+              f"{conferencia['versoes']}/{conferencia['esperadas']} versões, {conferencia['manuais_corretos']} manuais corretos"
+              f"{'' if execucao['codigo_saida'] == 0 else ' (saída ' + str(execucao['codigo_saida']) + ')'}")
+        if motores: print("        motores: " + ", ".join(f"{motor} {len(duracoes)} modelos ({sum(duracoes) / len(duracoes):.2f}s/modelo)"
+                                                        for motor, duracoes in sorted(motores.items())))
+        if "selenium" not in motores: print("        ⚠️ Nenhum modelo passou pelo Selenium nesta execução.")
+        for modelo, dados in execucao["por_modelo"].items():
+            print(f"        {modelo:<12} {dados['duracao_s'] or 0:7.2f}s  {dados['comandos_webdriver']:5d} comandos  {dados['motor']}")
+        print(f"        (log e saídas em {execucao['diretorio']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta do crawler contra o site de fixtures local.")
+    parser.add_argument("--modelos", type=int, default=6)
+    parser.add_argument("--versoes", type=int, default=4)
+    parser.add_argument("--latencia", type=int, default=50, help="ms por requisição no servidor local")
+    parser.add_argument("--hidratacao", type=int, default=0, help="ms até o JS montar o conteúdo (0 = HTML estático)")
+    parser.add_argument("--so-js", type=int, default=1, help="últimos N modelos só com conteúdo via JS (forçam o Selenium)")
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--env", action="append", default=[], help="variável extra para o crawler (CHAVE=valor)")
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    args = parser.parse_args()
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    execucoes = medir(args, extra_env)
+    imprimir(execucoes, args)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"parametros": {**vars(args), "env": extra_env}, "execucoes": execucoes}, f, indent=2, ensure_ascii=False)
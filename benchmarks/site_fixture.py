@@ -0,0 +1,221 @@
+# benchmarks/site_fixture.py
+# Site estático local que reproduz os padrões de DOM dos quais o crawler depende:
+#   - home com o div[data-testid='hub-loader'] e o menu hambúrguer (Carros > categorias)
+#   - modelos de passeio com 'next-gen-carousel' (slides com specs e ficha em .pdf)
+#   - modelos utilitários com 'hub-tabs-swiper' (ficha aberta em nova aba via window.open)
+#   - os três layouts do comparativo: Tabela, Grid Único e Múltiplos Grids
+# O número de modelos/versões é configurável, o servidor injeta latência por requisição e,
+# com hidratação > 0, o conteúdo das páginas só aparece via JavaScript (força o Selenium).
+# --so-js N faz o mesmo só com os N últimos modelos (o resto continua no HTML estático).
+#
+# Uso: python benchmarks/site_fixture.py [--modelos 6] [--versoes 4] [--latencia 50] [--hidratacao 0] [--so-js 0] [--porta 8000]
+
+import argparse
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+LAYOUTS_COMPARATIVO = ["tabela", "grid_unico", "multiplos_grids"]
+MOTORES = ["1.0 Firefly Flex", "1.0 Turbo 200 Flex", "1.6 THP Flex", "2.2 BlueHDi Diesel", "Motor elétrico 100 kW~136 cv"]
+PDF_MINIMO = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+HIDRATACAO_SO_JS_MS = 300  # modelos só em JS quando a hidratação geral é 0
+
+CSS = """
+[class*='tab-content-'] { display: none; } [class*='tab-content-'].active { display: block; }
+.collapse-content { display: none; } .collapse-content.aberto { display: block; }
+.menu-hamburger__options { display: none; } .menu-hamburger__options.aberto { display: block; }
+.menu-hamburger__options__category { display: none; } .expandido .menu-hamburger__options__category { display: block; }
+.bloco { min-height: 400px; }
+"""
+
+JS_HOME = """
+setTimeout(() => document.querySelector("[data-testid='hub-loader']").remove(), %(loader)d);
+document.querySelector('.menu-hamburger__cta').addEventListener('click', () =>
+    document.querySelector('.menu-hamburger__options').classList.add('aberto'));
+document.querySelector("button[title='Expand item']").addEventListener('click', e =>
+    e.target.closest('.menu-hamburger__options__item').classList.add('expandido'));
+"""
+
+JS_MODELO = """
+const montar = () => {
+    if (window.__conteudo) document.getElementById('app').innerHTML = window.__conteudo;
+    document.querySelectorAll('button.comparativo').forEach(b => b.addEventListener('click', () =>
+        b.nextElementSibling.classList.toggle('aberto')));
+    document.querySelectorAll('a.hub-button--tab-swiper').forEach((aba, i) => aba.addEventListener('click', e => {
+        e.preventDefault();
+        document.querySelectorAll("[class*='tab-content-']").forEach(c => c.classList.remove('active'));
+        document.querySelector('.tab-content-' + i).classList.add('active');
+    }));
+    document.querySelectorAll('a[data-ficha]').forEach(a => a.addEventListener('click', e => {
+        e.preventDefault();
+        window.open(a.dataset.ficha, '_blank');
+    }));
+};
+setTimeout(montar, %(hidratacao)d);
+"""
+
+
+def slug(texto):
+    return texto.lower().replace(" ", "-")
+
+def pagina(titulo, corpo, script):
+    return (f"<!DOCTYPE html><html lang='pt-BR'><head><meta charset='utf-8'><title>{titulo}</title>"
+            f"<style>{CSS}</style></head><body>{corpo}<script>{script}</script></body></html>")
+
+def catalogo(modelos, versoes):
+    """Lista de modelos: metade de passeio (carrossel), metade utilitários (abas)."""
+    itens = []
+    for m in range(modelos):
+        utilitario = m % 2 == 1
+        nome = f"{'Jumpy' if utilitario else 'C'}{m + 1}"
+        categoria = "veiculos-utilitarios" if utilitario else "veiculos-passeio"
+        itens.append({
+            "modelo": nome,
+            "tipo": "Utilitários" if utilitario else "Passeio",
+            "caminho": f"/{categoria}/{slug(nome)}/",
+            "padrao": "abas" if utilitario else "carrossel",
+            "layout": LAYOUTS_COMPARATIVO[m % len(LAYOUTS_COMPARATIVO)],
+            "versoes": [{"nome": f"{nome} Versao {v + 1}", "motor": MOTORES[(m + v) % len(MOTORES)],
+                         "preco": f"R$ {90 + m * 10 + v}.990", "pdf": f"/fichas/{slug(nome)}-v{v + 1}.pdf"}
+                        for v in range(versoes)],
+        })
+    return itens
+
+def html_home(itens, atraso_loader_ms):
+    categorias = ""
+    for tipo in sorted({item["tipo"] for item in itens}):
+        links = "".join(f"<li class='menu-hamburger__options__sub-item'><a href='{item['caminho']}'>{item['modelo']}</a></li>"
+                        for item in itens if item["tipo"] == tipo)
+        categorias += f"<li class='menu-hamburger__options__category'><span>{tipo}:</span><ul>{links}</ul></li>"
+    corpo = (
+        "<div data-testid='hub-loader'>Carregando...</div>"
+        "<ul><li title='Menu'><button class='menu-hamburger__cta'>Menu</button></li></ul>"
+        "<div class='menu-hamburger__options'><div class='menu-hamburger__options__item'>Carros "
+        f"<button title='Expand item'>+</button><ul>{categorias}</ul></div>"
+        "<div class='menu-hamburger__options__item'>Serviços <a href='/servicos/'>Revisão</a></div></div>"
+    )
+    return pagina("Home", corpo, JS_HOME % {"loader": atraso_loader_ms})
+
+def html_carrossel(item):
+    slides = "".join(
+        "<div data-testid='slide'>"
+        f"<div class='image-wrapper'><img class='next-gen-media' src='/img/{slug(v['nome'])}.png'></div>"
+        "<div class='next-gen-text'>"
+        f"<span class='font-body-sm' data-testid='next-gen-text-id'>Motor {v['motor']}</span>"
+        "<span class='font-body-sm' data-testid='next-gen-text-id'>Rodas de liga leve 16\"</span>"
+        "<span class='font-body-sm' data-testid='next-gen-text-id'>Ar-condicionado digital</span></div>"
+        f"<h3 class='font-h3'>{v['nome']}</h3><span class='font-h2'>{v['preco']}</span>"
+        f"<a href='{v['pdf']}'>Ficha técnica</a></div>"
+        for v in item["versoes"])
+    return f"<h2 class='font-h2'>Escolha a sua versão</h2><div class='next-gen-carousel'>{slides}</div>"
+
+def html_abas(item):
+    abas = "".join(f"<a class='hub-button--tab-swiper' href='#'>{v['nome']}</a>" for v in item["versoes"])
+    conteudos = "".join(
+        f"<div class='tab-content-{i}{' active' if i == 0 else ''}'><div class='hub-card-component'>"
+        f"<h2 class='hub-card-title'>{v['nome']}</h2>"
+        f"<div class='hub-card-media'><img src='/img/{slug(v['nome'])}.png'></div>"
+        f"<a href='#' data-ficha='{v['pdf']}'><span>Ficha técnica</span></a></div></div>"
+        for i, v in enumerate(item["versoes"]))
+    return f"<h2 class='font-h2'>Escolha a sua versão</h2><div class='hub-tabs-swiper'>{abas}</div>{conteudos}"
+
+def html_comparativo(item):
+    versoes = item["versoes"]
+    if item["layout"] == "tabela":
+        cabecalho = "<tr><th></th>" + "".join(f"<th>{v['nome']}</th>" for v in versoes) + "</tr>"
+        linhas = "<tr><td>Motor</td>" + "".join(f"<td>{v['motor']}</td>" for v in versoes) + "</tr>"
+        linhas += "<tr><td>Porta-malas</td>" + "".join(f"<td>{300 + i * 10} L</td>" for i, _ in enumerate(versoes)) + "</tr>"
+        linhas += "<tr><td></td>" + "".join(f"<td><a href='{v['pdf']}'>Ficha</a></td>" for v in versoes) + "</tr>"
+        conteudo = f"<table>{cabecalho}{linhas}</table>"
+    elif item["layout"] == "grid_unico":
+        nomes = "".join(f"<h2 class='font-h2'>{v['nome']}</h2>" for v in versoes)
+        colunas = "".join(
+            f"<div><span class='font-body-sm'>Carga útil</span><p class='font-body'>{1000 + i * 100} kg</p>"
+            f"<span class='font-body-sm'>Motor</span><p class='font-body'>{v['motor']}</p></div>"
+            for i, v in enumerate(versoes))
+        fichas = "".join(f"<a href='{v['pdf']}'>Ficha técnica</a>" for v in versoes)
+        conteudo = f"<div class='next-gen-grid-container-vue'>{nomes}{colunas}{fichas}</div>"
+    else:
+        nomes = "".join(f"<h2 class='font-h2'>{v['nome']}</h2>" for v in versoes)
+        celulas = ""
+        for rotulo, valores in (("Motor", [v["motor"] for v in versoes]), ("Capacidade/carga", [f"1.{i} ton" for i, _ in enumerate(versoes)])):
+            celulas += f"<div class='next-gen-container-vue'><p><strong>{rotulo}</strong></p><p>{valores[0]}</p></div>"
+            celulas += "".join(f"<div class='next-gen-container-vue'><p>{valor}</p></div>" for valor in valores[1:])
+        fichas = "".join(f"<a href='{v['pdf']}'>Ficha</a>" for v in versoes)
+        conteudo = (f"<div class='next-gen-grid-container-vue'>{nomes}</div>"
+                    f"<div class='next-gen-grid-container-vue'>{celulas}</div>"
+                    f"<div class='next-gen-grid-container-vue'>{fichas}</div>")
+    return f"<button class='comparativo'>COMPARATIVO ENTRE AS VERSÕES</button><div class='collapse-content'>{conteudo}</div>"
+
+def html_modelo(item, hidratacao_ms):
+    if item.get("so_js"): hidratacao_ms = hidratacao_ms or HIDRATACAO_SO_JS_MS
+    secoes = html_carrossel(item) if item["padrao"] == "carrossel" else html_abas(item)
+    conteudo = f"<div class='bloco'><h1>{item['modelo']}</h1></div><div class='bloco'>{secoes}</div><div class='bloco'>{html_comparativo(item)}</div>"
+    if hidratacao_ms > 0:
+        # Conteúdo só em string JS: o HTML estático não traz versões (como numa SPA)
+        script = f"window.__conteudo = {json.dumps(conteudo)};" + JS_MODELO % {"hidratacao": hidratacao_ms}
+        return pagina(item["modelo"], "<div id='app'></div>", script)
+    return pagina(item["modelo"], f"<div id='app'>{conteudo}</div>", JS_MODELO % {"hidratacao": 0})
+
+def gerar_site(diretorio, modelos=6, versoes=4, hidratacao_ms=0, atraso_loader_ms=300, so_js=0):
+    """Escreve o site em disco. Devolve o catálogo (modelos, versões e PDFs esperados).
+
+    Os so_js últimos modelos só trazem o conteúdo via JavaScript (item["so_js"] = True).
+    """
+    itens = catalogo(modelos, versoes)
+    for item in itens[len(itens) - so_js:] if so_js > 0 else []:
+        item["so_js"] = True
+    def escrever(caminho, conteudo):
+        destino = os.path.join(diretorio, caminho.strip("/"))
+        if caminho.endswith("/"): destino = os.path.join(destino, "index.html")
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino, "wb") as f:
+            f.write(conteudo.encode("utf-8") if isinstance(conteudo, str) else conteudo)
+    escrever("/", html_home(itens, atraso_loader_ms))
+    for item in itens:
+        escrever(item["caminho"], html_modelo(item, hidratacao_ms))
+        for v in item["versoes"]:
+            escrever(v["pdf"], PDF_MINIMO)
+    return itens
+
+
+class ManipuladorFixture(SimpleHTTPRequestHandler):
+    latencia_s = 0.0
+
+    def handle_one_request(self):
+        if self.latencia_s: time.sleep(self.latencia_s)
+        super().handle_one_request()
+
+    def log_message(self, *args):
+        pass
+
+def servir(diretorio, latencia_ms=0, porta=0):
+    """Sobe o servidor numa thread. Devolve (servidor, url_base)."""
+    manipulador = type("Manipulador", (ManipuladorFixture,), {"latencia_s": latencia_ms / 1000})
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), functools.partial(manipulador, directory=diretorio))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_port}/"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve o site de fixtures do crawler.")
+    parser.add_argument("--modelos", type=int, default=6)
+    parser.add_argument("--versoes", type=int, default=4)
+    parser.add_argument("--latencia", type=int, default=0, help="ms por requisição")
+    parser.add_argument("--hidratacao", type=int, default=0, help="ms até o JS montar o conteúdo (0 = HTML estático)")
+    parser.add_argument("--so-js", type=int, default=0, help="últimos N modelos só com conteúdo via JS")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--diretorio", default=None)
+    args = parser.parse_args()
+    diretorio = args.diretorio or tempfile.mkdtemp(prefix="site_fixture_")
+    gerar_site(diretorio, args.modelos, args.versoes, args.hidratacao, so_js=args.so_js)
+    servidor, url = servir(diretorio, args.latencia, args.porta)
+    print(f"✔️ Site de fixtures em {url} (arquivos em {diretorio}). Ctrl+C para sair.")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
@@ -0,0 +1,162 @@
+# classificacao.py
+# Motor de classificação das especificações (motor, turbo, combustível, rodas, ar-condicionado).
+# Padrões pré-compilados e resultados em cache: as mesmas strings de motor se repetem
+# entre versões e layouts, então cada uma só é classificada uma vez por execução.
+
+import re
+from functools import lru_cache
+
+# --- LISTAS DE CLASSIFICAÇÃO (Mantidas) ---
+TURBO_KEYWORDS_RAW = [
+    'T', 'TC', 'TCI', 'TFSI', 'TSI', 'TGI', 'TGDI', 'GDI-T', 'T-GDI', 'GTDi', 'EcoBoost', 
+    'TwinPower Turbo', 'TurboJet / MultiAir Turbo', 'THP', 'HDi', 'BlueHDi', 'CDTi', 'dCi', 
+    'TDCi', 'CDI', 'd-4D', 'DTI', 'SDI', 'SDTI', 'IDTEC', 'CRDi', 'TD4', 'Di-D', 
+    'Boosterjet / Booster Hybrid', 'TURBOJET', 'TURBODIESEL', 'TDI', 'TD', 'TURBOMAX',
+    'TURBO'
+]
+TURBO_KEYWORDS_FLAT = []
+for item in TURBO_KEYWORDS_RAW:
+    parts = item.split(' / ')
+    for part in parts:
+        TURBO_KEYWORDS_FLAT.append(part.strip().upper())
+TURBO_KEYWORDS_SORTED = sorted(list(set(TURBO_KEYWORDS_FLAT)), key=len, reverse=True)
+
+FUEL_REGEX_LIST = [
+    {"tipo": "Híbrido", "regex": r"\b(h[ií]brido|hybrid|phev|hev|mhev|plug[-\s]?in|48v)\b"},
+    {"tipo": "Elétrico", "regex": r"\b(el[eé]trico|eléctrico|ev\b|bev\b|motor\s*el[eé]trico|bateria)\b"},
+    {"tipo": "Flex", "regex": r"\b(flex|bi[-\s]?fuel|flex[-\s]?fuel|gasolina\/[aá]lcool|etanol\/gasolina)\b"},
+    {"tipo": "Diesel", "regex": r"\b(diesel|dsl|gas[oó]leo|tdi|hdi|cdti|tdci|bluehdi|dci|crdi|ddi|di-d)\b"},
+    {"tipo": "GNV", "regex": r"\b(gnv|cng|ngv|g[aá]s\s*natural|g[aá]s\s*veicular)\b"},
+    {"tipo": "Gasolina", "regex": r"\b(gasolina|petrol|gasoline|nafta)\b"},
+    {"tipo": "Etanol/Álcool", "regex": r"\b(et[aá]nol|[aá]lcool|ethanol)\b"},
+    {"tipo": "Hidrogênio", "regex": r"\b(hidrog[eê]nio|hydrogen|fuel\s*cell|fcev)\b"}
+]
+# --- FIM DAS LISTAS ---
+
+# --- PADRÕES PRÉ-COMPILADOS ---
+# Uma única alternância com todas as palavras-chave (mais longas primeiro, como na lista ordenada)
+TURBO_REGEX = re.compile(r'\b(?:' + '|'.join(re.escape(term) for term in TURBO_KEYWORDS_SORTED) + r')\b')
+# A ordem da lista define a prioridade entre combustíveis, então cada padrão é testado em sequência
+FUEL_PATTERNS = [(fuel["tipo"], re.compile(fuel["regex"], re.IGNORECASE)) for fuel in FUEL_REGEX_LIST]
+DISPLACEMENT_REGEX = re.compile(r"\b(\d\.\d+)\b")
+ELECTRIC_KW_REGEX = re.compile(r"(\d+\s*kW~\d+\s*cv)", re.IGNORECASE)
+RODAS_POLEGADAS_REGEX = re.compile(r"(\d+)[”\"]")
+RODAS_TEXTO_REGEX = re.compile(r"(\d+)\s*(em|de)")
+
+# Rótulo do comparativo -> chave do dicionário (ex.: "consumo na cidade" -> "consumo_na_cidade")
+TABELA_ROTULO = str.maketrans({' ': '_', 'ç': 'c', 'ã': 'a', 'ê': 'e', 'õ': 'o', '/': '_'})
+TABELA_ROTULO_GRID_UNICO = str.maketrans({' ': '_', 'ç': 'c', 'ã': 'a', 'ê': 'e', 'õ': 'o'})
+# Nome de versão para o merge (já em maiúsculas): remove trema, hífen, ponto e zero-width space
+TABELA_NOME_VERSAO = str.maketrans({'Ë': 'E', '-': None, '.': None, '\u200b': None})
+
+TAMANHO_CACHE = 4096
+# --- FIM DOS PADRÕES ---
+
+# --- FUNÇÕES DE CLASSIFICAÇÃO ---
+@lru_cache(maxsize=TAMANHO_CACHE)
+def get_motor_value(motor_string):
+    if not motor_string: return None
+    try:
+        match_displacement = DISPLACEMENT_REGEX.search(motor_string) 
+        match_electric_kw = ELECTRIC_KW_REGEX.search(motor_string)
+        if match_displacement:
+            return match_displacement.group(1)
+        elif match_electric_kw:
+            return match_electric_kw.group(1)
+        elif "elétrico" in motor_string.lower():
+            return "Elétrico"
+    except Exception:
+        pass
+    return None
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def get_turbo_value(motor_string):
+    if not motor_string: return None
+    try:
+        motor_string_upper = motor_string.upper()
+        motor_part_only = motor_string_upper.split("CÂMBIO")[0].split("AUTOMÁTICO")[0].split("MANUAL")[0]
+        if TURBO_REGEX.search(motor_part_only):
+            return "Sim"
+    except Exception:
+        pass
+    return None
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def get_fuel_value(motor_string):
+    if not motor_string: return None
+    try:
+        for tipo, pattern in FUEL_PATTERNS:
+            if pattern.search(motor_string):
+                return tipo
+    except Exception:
+        pass
+    return None
+
+def classificar_motor(motor_string):
+    """Motor, turbo e combustível de uma string de motorização."""
+    return {
+        "motor": get_motor_value(motor_string),
+        "turbo": get_turbo_value(motor_string),
+        "combustivel": get_fuel_value(motor_string),
+    }
+
+def classificar_motores(motor_strings):
+    """API em lote: classifica uma lista de strings de motorização (repetidas saem do cache)."""
+    return [classificar_motor(motor_string) for motor_string in motor_strings]
+
+def canonizar_rotulo(spec_label, grid_unico=False):
+    return spec_label.translate(TABELA_ROTULO_GRID_UNICO if grid_unico else TABELA_ROTULO)
+
+def normalizar_nome_versao(nome):
+    return nome.upper().translate(TABELA_NOME_VERSAO).strip()
+
+def classificar_specs(spec_texts):
+    """Classifica os textos de especificação de um slide (motor, rodas, ar-condicionado)."""
+    specs = {
+        "motorizacao": None,
+        "motor": None,
+        "turbo": None,
+        "combustivel": None,
+        "pneus": None,
+        "pneus_diametro": None,
+        "ar_condicionado": None,
+        "outras_caracteristicas": []
+    }
+    for spec_text in spec_texts:
+        spec_text = (spec_text or "").strip()
+        
+        if not spec_text:
+            continue
+        
+        spec_text_lower = spec_text.lower()
+        item_classificado = False 
+
+        if spec_text_lower.startswith("motor"):
+            specs["motorizacao"] = spec_text
+            item_classificado = True 
+            specs.update(classificar_motor(spec_text))
+        elif "rodas" in spec_text_lower or "pneu" in spec_text_lower:
+            specs["pneus"] = spec_text
+            match = RODAS_POLEGADAS_REGEX.search(spec_text) 
+            if not match:
+                match = RODAS_TEXTO_REGEX.search(spec_text) 
+            if match:
+                specs["pneus_diametro"] = match.group(1)
+            item_classificado = True
+        elif spec_text_lower.startswith("ar-condicionado"):
+            valor_ar = spec_text.lower().replace("ar-condicionado", "").strip()
+            if "digital" in valor_ar:
+                specs["ar_condicionado"] = "Digital"
+            elif valor_ar: 
+                specs["ar_condicionado"] = valor_ar.capitalize()
+            else: 
+                specs["ar_condicionado"] = "Sim" 
+            item_classificado = True
+        if not item_classificado:
+            specs["outras_caracteristicas"].append(spec_text)
+    return specs
+
+def classificar_lote(lista_spec_texts):
+    """API em lote: classifica os textos de vários slides de uma vez."""
+    return [classificar_specs(spec_texts) for spec_texts in lista_spec_texts]
+# --- FIM DAS FUNÇÕES ---
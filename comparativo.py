@@ -0,0 +1,185 @@
+# comparativo.py
+# Seção "COMPARATIVO ENTRE AS VERSÕES": uma chamada JavaScript serializa o layout presente
+# (Tabela, Grid Único/Jumpy ou Múltiplos Grids/Jumper) numa matriz normalizada, e um único
+# parser em Python converte a matriz nos campos de cada versão.
+#
+# Formato da matriz (o mesmo é montado a partir do HTML estático em crawler.py):
+#   {
+#     "layout": "tabela" | "grid_unico" | "multiplos_grids",
+#     "versoes": ["Feel", "Shine"],                            # cabeçalho, na ordem das colunas
+#     "linhas": [{"rotulo": "Motor", "valores": ["1.0 Flex", "1.0 Turbo"]}, ...],
+#     "pdfs": ["/ficha-feel.pdf", None] | None                 # href da ficha por coluna
+#   }
+# No Grid Único cada coluna tem os próprios rótulos: cada linha traz só o valor da sua
+# coluna e None nas demais.
+
+from urllib.parse import urljoin
+
+from classificacao import classificar_motor, canonizar_rotulo, normalizar_nome_versao
+
+XPATH_FICHA_LINK = ".//a[contains(translate(., 'FICHA', 'ficha'), 'ficha')]"
+XPATH_COLUNAS_GRID_UNICO = "./div[.//span[contains(., 'Carga útil') or contains(., 'Motor')]]"
+XPATH_CELULAS_JUMPER = "./div[contains(@class, 'next-gen-container-vue')]"
+XPATH_ROTULO_JUMPER = ".//p/strong"
+
+JS_MATRIZ_COMPARATIVO = """
+const area = arguments[0], xp = arguments[1];
+const todos = (expr, ctx) => {
+    const r = document.evaluate(expr, ctx, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const nos = [];
+    for (let i = 0; i < r.snapshotLength; i++) nos.push(r.snapshotItem(i));
+    return nos;
+};
+const txt = el => (el ? (el.innerText || '') : '').trim();
+const hrefs = ctx => todos(xp.ficha, ctx).map(a => a.getAttribute('href')).filter(h => h && h !== '#');
+const fim = m => Object.assign(m, {url: window.location.href});
+
+const tabela = area.querySelector('table');
+if (tabela) {
+    const rows = Array.from(tabela.querySelectorAll('tr'));
+    if (!rows.length) return null;
+    const versoes = Array.from(rows[0].querySelectorAll(':scope > td, :scope > th')).slice(1).map(txt);
+    const n = versoes.length;
+    if (!n) return null;
+    const linhas = [];
+    rows.slice(1).forEach(r => {
+        const cells = Array.from(r.querySelectorAll('td'));
+        if (cells.length >= n + 1) linhas.push({rotulo: txt(cells[0]), valores: cells.slice(1, n + 1).map(txt)});
+    });
+    const ultima = Array.from(rows[rows.length - 1].querySelectorAll('td'));
+    const pdfs = ultima.length === n + 1 ? ultima.slice(1).map(c => hrefs(c)[0] || null) : null;
+    return fim({layout: 'tabela', versoes: versoes, linhas: linhas, pdfs: pdfs});
+}
+
+const grids = Array.from(area.querySelectorAll('div.next-gen-grid-container-vue'));
+if (grids.length === 1) {
+    const nomes = Array.from(grids[0].querySelectorAll('h2.font-h2')).map(txt);
+    const colunas = todos(xp.colunas, grids[0]);
+    if (!colunas.length || nomes.length !== colunas.length) return null;
+    const linhas = [];
+    colunas.forEach((col, i) => {
+        const rotulos = col.querySelectorAll('span.font-body-sm'), valores = col.querySelectorAll('p.font-body');
+        for (let j = 0; j < Math.min(rotulos.length, valores.length); j++) {
+            const v = nomes.map(() => null); v[i] = txt(valores[j]);
+            linhas.push({rotulo: txt(rotulos[j]), valores: v});
+        }
+    });
+    const links = hrefs(grids[0]);
+    return fim({layout: 'grid_unico', versoes: nomes, linhas: linhas, pdfs: links.length === nomes.length ? links : null});
+}
+
+if (grids.length > 2) {
+    const nomes = Array.from(grids[0].querySelectorAll('h2.font-h2')).map(txt);
+    const n = nomes.length;
+    if (!n) return null;
+    const linhas = [];
+    grids.slice(1, -1).forEach(g => {
+        const cells = todos(xp.celulas, g);
+        for (let i = 0; i + n <= cells.length; i += n) {
+            const row = cells.slice(i, i + n);
+            const rotulo = todos(xp.rotulo, row[0])[0];
+            if (!rotulo) continue;
+            const valores = row.map((cell, k) => {
+                const ps = Array.from(cell.querySelectorAll('p'));
+                let v = ps.filter(p => !(k === 0 && p.querySelector('strong'))).map(txt).join(' ').trim();
+                if (!v && ps.length) v = txt(ps[ps.length - 1]);
+                return v || null;
+            });
+            linhas.push({rotulo: txt(rotulo), valores: valores});
+        }
+    });
+    const links = hrefs(grids[grids.length - 1]);
+    return fim({layout: 'multiplos_grids', versoes: nomes, linhas: linhas, pdfs: links.length === n ? links : null});
+}
+return null;
+"""
+
+XPATHS_MATRIZ = {
+    "ficha": XPATH_FICHA_LINK,
+    "colunas": XPATH_COLUNAS_GRID_UNICO,
+    "celulas": XPATH_CELULAS_JUMPER,
+    "rotulo": XPATH_ROTULO_JUMPER,
+}
+
+
+def mapear_spec_comparativo(version_specs, spec_label, spec_value, grid_unico=False):
+    """Grava um par rótulo/valor do comparativo no dicionário da versão."""
+    if "carga útil" in spec_label or (not grid_unico and "capacidade/carga" in spec_label): version_specs["carga_util"] = spec_value
+
+    elif "motor" == spec_label or (not grid_unico and "motorização e câmbio" in spec_label):
+        version_specs["motorizacao"] = spec_value
+        version_specs.update(classificar_motor(spec_value))
+
+    else:
+        version_specs[canonizar_rotulo(spec_label, grid_unico)] = spec_value
+
+
+def parsear_matriz_comparativo(matriz, base_url):
+    """Converte a matriz do comparativo na lista de dicionários por versão (com 'versao_comparativo')."""
+    if not matriz or not matriz.get("versoes"): return []
+    base_url = matriz.get("url") or base_url
+    grid_unico = matriz.get("layout") == "grid_unico"
+    por_nome = {}
+    por_coluna = []
+    for nome in matriz["versoes"]:
+        # Tabela e Múltiplos Grids juntam colunas de mesmo nome; o Grid Único mantém uma por coluna
+        version_specs = {"versao_comparativo": nome} if grid_unico else por_nome.setdefault(nome, {"versao_comparativo": nome})
+        por_coluna.append(version_specs)
+
+    for linha in matriz.get("linhas") or []:
+        spec_label = (linha.get("rotulo") or "").strip().lower().replace('\n', ' ')
+        for version_specs, spec_value in zip(por_coluna, linha.get("valores") or []):
+            if spec_value is None or (not grid_unico and not spec_value): continue
+            mapear_spec_comparativo(version_specs, spec_label, spec_value.strip(), grid_unico)
+
+    for version_specs, pdf_href in zip(por_coluna, matriz.get("pdfs") or []):
+        if pdf_href and pdf_href != '#':
+            version_specs["manual_url"] = urljoin(base_url, pdf_href)
+
+    return por_coluna if grid_unico else list(por_nome.values())
+
+
+# --- PAREAMENTO COMPARATIVO x VERSÕES (PASSO 4c) ---
+LIMIAR_SIMILARIDADE = 0.7
+
+def tokens_nome(nome, ignorar=frozenset()):
+    return set(normalizar_nome_versao(nome).split()) - ignorar
+
+def similaridade_tokens(tokens_a, tokens_b):
+    """Coeficiente de Dice entre dois conjuntos de tokens (0 a 1)."""
+    if not tokens_a or not tokens_b: return 0.0
+    return 2 * len(tokens_a & tokens_b) / (len(tokens_a) + len(tokens_b))
+
+def casar_versoes(nomes_versoes, nomes_comparativo, modelo="", limiar=LIMIAR_SIMILARIDADE):
+    """Pareia cada nome do comparativo com o índice de uma versão.
+
+    Nomes normalizados uma única vez e buscados num dicionário; os que não casam
+    exatamente tentam o par mais parecido por tokens (sem os tokens do nome do modelo)
+    entre as versões ainda livres, desde que acima do limiar e sem empate.
+    Devolve [(indice ou None, similaridade, "exato" | "aproximado" | "sem_par")].
+    """
+    indice = {}
+    for i, nome in enumerate(nomes_versoes):
+        if nome: indice.setdefault(normalizar_nome_versao(nome), i)
+
+    pares = [None] * len(nomes_comparativo)
+    usados = set()
+    for j, nome in enumerate(nomes_comparativo):
+        i = indice.get(normalizar_nome_versao(nome)) if nome else None
+        if i is not None:
+            pares[j] = (i, 1.0, "exato"); usados.add(i)
+
+    ignorar = frozenset(normalizar_nome_versao(modelo).split()) if modelo else frozenset()
+    tokens_versoes = [tokens_nome(nome, ignorar) if nome else set() for nome in nomes_versoes]
+    for j, nome in enumerate(nomes_comparativo):
+        if pares[j] is not None: continue
+        alvo = tokens_nome(nome, ignorar) if nome else set()
+        candidatos = sorted(((similaridade_tokens(alvo, tokens_versoes[i]), i) for i in range(len(nomes_versoes)) if i not in usados), reverse=True)
+        melhor = candidatos[0][0] if candidatos else 0.0
+        empate = len(candidatos) > 1 and candidatos[1][0] == melhor
+        if melhor >= limiar and not empate:
+            i = candidatos[0][1]
+            pares[j] = (i, melhor, "aproximado"); usados.add(i)
+        else:
+            pares[j] = (None, melhor, "sem_par")
+    return pares
@@ -1,45 +1,57 @@
 # Crawler.py
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 import json
 import time
+import datetime
+import hashlib
 import re 
 import os 
-from supabase import create_client, Client 
+import sys
+import queue
+import threading
 from urllib.parse import urljoin
+import importlib.util
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    # Sem requests/lxml o motor HTTP fica desligado e tudo passa pelo Selenium
+    lxml_html = None
+from classificacao import classificar_specs
+import manuais
+import precos
+import delta
+import rastreamento
+from destinos import DestinoSupabase, DestinoSQLite
+from comparativo import casar_versoes, JS_MATRIZ_COMPARATIVO, XPATHS_MATRIZ, XPATH_FICHA_LINK, XPATH_COLUNAS_GRID_UNICO, XPATH_CELULAS_JUMPER, XPATH_ROTULO_JUMPER, parsear_matriz_comparativo
 
-# --- LISTAS DE CLASSIFICAÇÃO (Mantidas) ---
-TURBO_KEYWORDS_RAW = [
-    'T', 'TC', 'TCI', 'TFSI', 'TSI', 'TGI', 'TGDI', 'GDI-T', 'T-GDI', 'GTDi', 'EcoBoost', 
-    'TwinPower Turbo', 'TurboJet / MultiAir Turbo', 'THP', 'HDi', 'BlueHDi', 'CDTi', 'dCi', 
-    'TDCi', 'CDI', 'd-4D', 'DTI', 'SDI', 'SDTI', 'IDTEC', 'CRDi', 'TD4', 'Di-D', 
-    'Boosterjet / Booster Hybrid', 'TURBOJET', 'TURBODIESEL', 'TDI', 'TD', 'TURBOMAX',
-    'TURBO'
-]
-TURBO_KEYWORDS_FLAT = []
-for item in TURBO_KEYWORDS_RAW:
-    parts = item.split(' / ')
-    for part in parts:
-        TURBO_KEYWORDS_FLAT.append(part.strip().upper())
-TURBO_KEYWORDS_SORTED = sorted(list(set(TURBO_KEYWORDS_FLAT)), key=len, reverse=True)
-
-FUEL_REGEX_LIST = [
-    {"tipo": "Híbrido", "regex": r"\b(h[ií]brido|hybrid|phev|hev|mhev|plug[-\s]?in|48v)\b"},
-    {"tipo": "Elétrico", "regex": r"\b(el[eé]trico|eléctrico|ev\b|bev\b|motor\s*el[eé]trico|bateria)\b"},
-    {"tipo": "Flex", "regex": r"\b(flex|bi[-\s]?fuel|flex[-\s]?fuel|gasolina\/[aá]lcool|etanol\/gasolina)\b"},
-    {"tipo": "Diesel", "regex": r"\b(diesel|dsl|gas[oó]leo|tdi|hdi|cdti|tdci|bluehdi|dci|crdi|ddi|di-d)\b"},
-    {"tipo": "GNV", "regex": r"\b(gnv|cng|ngv|g[aá]s\s*natural|g[aá]s\s*veicular)\b"},
-    {"tipo": "Gasolina", "regex": r"\b(gasolina|petrol|gasoline|nafta)\b"},
-    {"tipo": "Etanol/Álcool", "regex": r"\b(et[aá]nol|[aá]lcool|ethanol)\b"},
-    {"tipo": "Hidrogênio", "regex": r"\b(hidrog[eê]nio|hydrogen|fuel\s*cell|fcev)\b"}
-]
-# --- FIM DAS LISTAS ---
+# --- SELENIUM SOB DEMANDA ---
+# O Selenium só é importado quando o navegador entra em uso (carregar_selenium): o parsing, o
+# motor HTTP e os testes importam este módulo em milissegundos, mesmo sem o selenium instalado.
+webdriver = By = Service = Options = WebDriverWait = EC = ChromeContador = None
+
+class SeleniumAusente(Exception):
+    """Nunca é levantada: ocupa o lugar das exceções do Selenium até ele ser importado."""
+
+TimeoutException = NoSuchElementException = StaleElementReferenceException = SeleniumAusente
+selenium_lock = threading.Lock()
+
+def carregar_selenium():
+    """Importa o Selenium na primeira chamada e troca os nomes do módulo pelos dele."""
+    global webdriver, By, Service, Options, WebDriverWait, EC, ChromeContador
+    global TimeoutException, NoSuchElementException, StaleElementReferenceException
+    if webdriver is not None: return
+    with selenium_lock:
+        if webdriver is not None: return
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+        from selenium import webdriver as modulo_webdriver
+        ChromeContador = type("ChromeContador", (ContadorComandos, modulo_webdriver.Chrome), {"__module__": __name__})
+        webdriver = modulo_webdriver  # por último: marca o carregamento como concluído
+# --- FIM DO SELENIUM SOB DEMANDA ---
 
 # --- MAPA DE FALLBACK DE MANUAIS (Mantido) ---
 MANUAL_FALLBACK_MAP = {
@@ -61,300 +73,1283 @@ MANUAL_FALLBACK_MAP = {
 }
 # --- FIM DO MAPA ---
 
-# --- FUNÇÕES AUXILIARES (Mantidas) ---
-def get_motor_value(motor_string):
-    if not motor_string: return None
-    try:
-        match_displacement = re.search(r"\b(\d\.\d+)\b", motor_string) 
-        match_electric_kw = re.search(r"(\d+\s*kW~\d+\s*cv)", motor_string, re.IGNORECASE)
-        if match_displacement:
-            return match_displacement.group(1)
-        elif match_electric_kw:
-            return match_electric_kw.group(1)
-        elif "elétrico" in motor_string.lower():
-            return "Elétrico"
-    except Exception:
-        pass
-    return None
 
-def get_turbo_value(motor_string):
-    if not motor_string: return None
-    try:
-        motor_string_upper = motor_string.upper()
-        motor_part_only = motor_string_upper.split("CÂMBIO")[0].split("AUTOMÁTICO")[0].split("MANUAL")[0]
-        for term in TURBO_KEYWORDS_SORTED:
-            if re.search(r'\b' + re.escape(term) + r'\b', motor_part_only):
-                return "Sim"
-    except Exception:
-        pass
+# --- CACHE DE SNAPSHOTS DO DOM (GRAVAR / REPRODUZIR) ---
+# CRAWLER_MODO_DOM=gravar     -> salva o DOM renderizado de cada modelo no cache local
+# CRAWLER_MODO_DOM=reproduzir -> roda toda a extração sobre os snapshots, sem rede nem navegador
+MODO_DOM = os.environ.get("CRAWLER_MODO_DOM", "").strip().lower()
+CACHE_DOM_DIR = os.environ.get("CRAWLER_CACHE_DIR", ".cache_dom")
+# Data do crawl a reproduzir (AAAA-MM-DD); vazio = snapshot mais recente
+DATA_DOM = os.environ.get("CRAWLER_DATA_DOM", "")
+DATA_EXECUCAO = datetime.date.today().isoformat()
+
+def salvar_objeto_dom(conteudo):
+    """Grava o conteúdo no armazenamento endereçado por conteúdo e devolve o sha256."""
+    dados = conteudo.encode('utf-8')
+    sha = hashlib.sha256(dados).hexdigest()
+    caminho = os.path.join(CACHE_DOM_DIR, "objetos", f"{sha}.html")
+    if not os.path.exists(caminho):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'wb') as f:
+            f.write(dados)
+    return sha
+
+def ler_objeto_dom(sha):
+    with open(os.path.join(CACHE_DOM_DIR, "objetos", f"{sha}.html"), encoding='utf-8') as f:
+        return f.read()
+
+def caminho_indice_dom(data, nome):
+    return os.path.join(CACHE_DOM_DIR, "indice", data, f"{nome}.json")
+
+def chave_url(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:24]
+
+def data_snapshot(nome):
+    """Data pedida em CRAWLER_DATA_DOM ou a mais recente que tenha o snapshot."""
+    if DATA_DOM: return DATA_DOM
+    raiz = os.path.join(CACHE_DOM_DIR, "indice")
+    datas = sorted(os.listdir(raiz), reverse=True) if os.path.isdir(raiz) else []
+    for data in datas:
+        if os.path.exists(caminho_indice_dom(data, nome)):
+            return data
     return None
 
-def get_fuel_value(motor_string):
-    if not motor_string: return None
+def gravar_snapshot_modelos(result):
+    caminho = caminho_indice_dom(DATA_EXECUCAO, "modelos")
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+def carregar_snapshot_modelos():
+    data = data_snapshot("modelos")
+    if not data: return {}
+    with open(caminho_indice_dom(data, "modelos"), encoding='utf-8') as f:
+        print(f"✔️ Modelos carregados do snapshot de {data}.")
+        return json.load(f)
+
+def gravar_snapshot_modelo(site_url, url_final, pagina_html, versoes, abas_html=None, pdfs_capturados=None):
+    """Salva o manifesto do modelo: página, conteúdo de cada aba ativa e PDFs capturados em nova aba."""
+    if adiar_na_tentativa(gravar_snapshot_modelo, site_url, url_final, pagina_html, versoes, abas_html, pdfs_capturados): return
     try:
-        for fuel in FUEL_REGEX_LIST:
-            if re.search(fuel["regex"], motor_string, re.IGNORECASE):
-                return fuel["tipo"]
-    except Exception:
-        pass
-    return None
-# --- FIM DAS FUNÇÕES ---
+        manifesto = {
+            "url": site_url,
+            "url_final": url_final,
+            "data": DATA_EXECUCAO,
+            "pagina": salvar_objeto_dom(pagina_html),
+            "abas": {str(i): salvar_objeto_dom(html) for i, html in (abas_html or {}).items()},
+            "pdfs_capturados": {str(i): url for i, url in (pdfs_capturados or {}).items()},
+            "versoes": versoes,
+        }
+        caminho = caminho_indice_dom(DATA_EXECUCAO, chave_url(site_url))
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, indent=2, ensure_ascii=False)
+        print(f"      💾 Snapshot do DOM gravado ({manifesto['pagina'][:12]}).")
+    except Exception as e_snap:
+        print(f"      ⚠️ Erro ao gravar snapshot do DOM: {e_snap}")
 
-# --- CONEXÃO SUPABASE (Mantida) ---
-try:
-    url: str = os.environ.get("SUPABASE_URL")
-    key: str = os.environ.get("SUPABASE_KEY")
-    
-    if not url or not key:
-        supabase = None
-        print("⚠️ AVISO: SUPABASE_URL ou SUPABASE_KEY não definidos. A verificação de duplicatas está DESATIVADA.")
+def reproduzir_modelo(modelo, site_url):
+    """Roda a extração sobre o snapshot gravado e compara com as versões gravadas."""
+    data = data_snapshot(chave_url(site_url))
+    if not data:
+        print(f"      ❌ Nenhum snapshot gravado para {site_url}.")
+        return []
+    with open(caminho_indice_dom(data, chave_url(site_url)), encoding='utf-8') as f:
+        manifesto = json.load(f)
+    abas_html = {int(i): ler_objeto_dom(sha) for i, sha in manifesto.get("abas", {}).items()}
+    pdfs_capturados = {int(i): url for i, url in manifesto.get("pdfs_capturados", {}).items()}
+    lista_versoes = extrair_versoes_html(modelo, ler_objeto_dom(manifesto["pagina"]), manifesto.get("url_final") or site_url,
+                                         abas_html=abas_html, pdfs_capturados=pdfs_capturados) or []
+    if lista_versoes == manifesto.get("versoes"):
+        print(f"      ✔️ Reprodução de {data} idêntica à gravação ({len(lista_versoes)} versões).")
     else:
-        supabase: Client = create_client(url, key)
+        print(f"      ⚠️ Reprodução de {data} DIFERENTE da gravação ({len(lista_versoes)} versões agora, {len(manifesto.get('versoes') or [])} gravadas).")
+    return lista_versoes
+# --- FIM DO CACHE DE SNAPSHOTS ---
+
+
+# --- CRAWL INCREMENTAL (IMPRESSÃO DIGITAL DAS PÁGINAS) ---
+# Guarda, por URL de modelo, a impressão digital da página, as versões extraídas e os nomes
+# das versões puladas por já existirem no Supabase ("puladas"). Se a página não mudou desde a
+# última execução, as versões anteriores são reaproveitadas, mas as duplicatas são conferidas
+# de novo: as que entraram no Supabase desde então são puladas, e se alguma das "puladas"
+# sumiu de lá a página é extraída outra vez (os dados dela não foram guardados).
+ARQUIVO_ESTADO = os.environ.get("CRAWLER_ARQUIVO_ESTADO", "citroen_estado.json")
+# "1" ignora o estado anterior e refaz a extração de todos os modelos
+FULL_REFRESH = os.environ.get("CRAWLER_FULL_REFRESH", "0") == "1"
+SELETOR_SECOES_IMPRESSAO = "div.next-gen-carousel, div.hub-tabs-swiper, [class*='tab-content-'], div.collapse-content"
+
+# Texto normalizado + hrefs/srcs das seções usadas na extração (ignora estilos e atributos dinâmicos)
+JS_IMPRESSAO_DOM = """
+const partes = [];
+document.querySelectorAll(arguments[0]).forEach(el => {
+    partes.push(el.textContent.replace(/\\s+/g, ' ').trim());
+    el.querySelectorAll('a[href], img[src]').forEach(n => partes.push(n.getAttribute('href') || n.getAttribute('src')));
+});
+return partes.join('\\n');
+"""
+
+def carregar_estado():
+    if FULL_REFRESH or not os.path.exists(ARQUIVO_ESTADO):
+        return {}
+    try:
+        with open(ARQUIVO_ESTADO, encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ AVISO: Estado anterior ilegível ({e}). Fazendo extração completa.")
+        return {}
+
+estado_anterior = None
+estado_atual = {}
+estado_lock = threading.Lock()
+# Nomes pulados como duplicata no modelo em andamento nesta thread (vão para "puladas") e a
+# TentativaModelo que roda nesta thread (com prazo, os efeitos dela esperam ela ser aceita)
+modelo_local = threading.local()
+
+def adiar_na_tentativa(funcao, *args):
+    """Guarda funcao(*args) na tentativa em andamento nesta thread. False = não há tentativa, rodar já.
+
+    Só os efeitos da tentativa aceita são aplicados: uma atrasada (prazo ou hedge perdido) não grava nada.
+    """
+    tentativa = getattr(modelo_local, "tentativa", None)
+    if tentativa is None: return False
+    tentativa.efeitos.append((funcao, args))
+    return True
+
+def obter_estado_anterior():
+    """Estado da execução anterior, lido do disco na primeira chamada."""
+    global estado_anterior
+    with estado_lock:
+        if estado_anterior is None:
+            estado_anterior = carregar_estado()
+        return estado_anterior
+
+def hash_impressao(partes):
+    return hashlib.sha256("\n".join(partes).encode('utf-8')).hexdigest()
+
+def impressao_html(doc):
+    partes = []
+    for el in doc.cssselect(SELETOR_SECOES_IMPRESSAO):
+        partes.append(" ".join(el.text_content().split()))
+        partes.extend(n.get('href') or n.get('src') for n in el.xpath(".//a[@href] | .//img[@src]"))
+    return hash_impressao(partes)
+
+def impressao_dom(driver):
+    return hash_impressao([driver.execute_script(JS_IMPRESSAO_DOM, SELETOR_SECOES_IMPRESSAO) or ""])
+
+def versoes_puladas():
+    if not hasattr(modelo_local, "puladas"): modelo_local.puladas = []
+    return modelo_local.puladas
+
+def desfazer_puladas(marca):
+    """Descarta as versões marcadas como puladas depois da marca (a extração que as marcou foi abandonada)."""
+    puladas = versoes_puladas()
+    if len(puladas) > marca:
+        rastreamento.contar("versoes_puladas", marca - len(puladas))
+        del puladas[marca:]
+
+def versoes_reaproveitaveis(site_url, modelo, motor, impressao):
+    """Versões da execução anterior se a impressão da página for a mesma (senão None).
+
+    Passam de novo pela checagem de duplicatas, como numa extração completa.
+    """
+    anterior = obter_estado_anterior().get(site_url)
+    if MODO_DOM == "gravar" or not anterior or not impressao or anterior.get("impressoes", {}).get(motor) != impressao:
+        return None
+    sumiram = [nome for nome in anterior.get("puladas", []) if not versao_pulada_supabase(modelo, nome)]
+    if sumiram:
+        print(f"      ♻️ Página sem mudanças, mas {len(sumiram)} versões puladas antes não existem mais no destino. Extraindo de novo.")
+        modelo_local.puladas = []
+        return None
+    versoes = [versao for versao in json.loads(json.dumps(anterior["versoes"])) if not versao_pulada_supabase(modelo, versao.get("versao"))]
+    print(f"      ♻️ Página sem mudanças desde {anterior.get('data')}. Reaproveitando {len(versoes)} versões.")
+    registrar_estado(site_url, versoes, motor, impressao, anterior.get("etag"), anterior.get("last_modified"))
+    return versoes
+
+def registrar_estado(site_url, versoes, motor, impressao, etag=None, last_modified=None, puladas=None):
+    puladas = list(dict.fromkeys(versoes_puladas())) if puladas is None else puladas
+    if not versoes and not puladas: return
+    if adiar_na_tentativa(registrar_estado, site_url, versoes, motor, impressao, etag, last_modified, puladas): return
+    with estado_lock:
+        estado_atual[site_url] = {
+            "data": DATA_EXECUCAO,
+            "impressoes": {motor: impressao},
+            "etag": etag,
+            "last_modified": last_modified,
+            "versoes": versoes,
+            "puladas": puladas,
+        }
+
+def salvar_estado():
+    """Grava o estado desta execução (modelos que falharam mantêm o estado anterior)."""
+    try:
+        estado = {**obter_estado_anterior(), **estado_atual}
+        with open(ARQUIVO_ESTADO, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, indent=2, ensure_ascii=False)
+    except Exception as e:
+        print(f"❌ Erro ao salvar o estado incremental: {e}")
+# --- FIM DO CRAWL INCREMENTAL ---
+
+
+# --- CONEXÃO SUPABASE (Mantida, agora sob demanda) ---
+# Nada se conecta na importação: o cliente, o banco SQLite e o conjunto de versões existentes
+# são criados na primeira vez que a coleta precisa deles (obter_*).
+conexoes_lock = threading.RLock()
+supabase = None
+supabase_iniciado = False
+
+def conectar_supabase():
+    try:
+        url: str = os.environ.get("SUPABASE_URL")
+        key: str = os.environ.get("SUPABASE_KEY")
+
+        if MODO_DOM == "reproduzir":
+            print("⚠️ AVISO: Modo reprodução (sem rede). A verificação de duplicatas no Supabase está DESATIVADA.")
+            return None
+        if not url or not key:
+            print("⚠️ AVISO: SUPABASE_URL ou SUPABASE_KEY não definidos. A verificação de duplicatas está DESATIVADA.")
+            return None
+        from supabase import create_client
+        cliente = create_client(url, key)
         print("✔️ Conectado ao Supabase com sucesso.")
-except Exception as e:
-    print(f"❌ ERRO: Falha ao inicializar o Supabase: {e}")
-    supabase = None
+        return cliente
+    except Exception as e:
+        print(f"❌ ERRO: Falha ao inicializar o Supabase: {e}")
+        return None
+
+def obter_supabase():
+    """Cliente do Supabase (None se desativado), criado na primeira chamada."""
+    global supabase, supabase_iniciado
+    with conexoes_lock:
+        if not supabase_iniciado:
+            supabase = conectar_supabase()
+            supabase_iniciado = True
+        return supabase
+
+# Tamanho de página da consulta em lote (o PostgREST limita a 1000 linhas por padrão)
+SUPABASE_PAGINA = 1000
+# "1" recarrega as versões existentes de cada modelo antes de processá-lo
+SUPABASE_REFRESH_POR_MODELO = os.environ.get("CRAWLER_SUPABASE_REFRESH_POR_MODELO", "0") == "1"
+
+def carregar_versoes_existentes(cliente, modelo=None):
+    """Busca de uma vez, paginando, todos os pares (modelo, versao) da Citroen no Supabase."""
+    pares = set()
+    inicio = 0
+    while True:
+        consulta = cliente.table('veiculos').select('modelo, versao').eq('marca', 'citroen')
+        if modelo is not None:
+            consulta = consulta.eq('modelo', modelo)
+        linhas = consulta.range(inicio, inicio + SUPABASE_PAGINA - 1).execute().data or []
+        rastreamento.contar("consultas_supabase")
+        pares.update((linha.get('modelo'), linha.get('versao')) for linha in linhas)
+        if len(linhas) < SUPABASE_PAGINA:
+            return pares
+        inicio += SUPABASE_PAGINA
+
+# Banco SQLite local (esquema do main.py): vazio = desligado. Com CRAWLER_SQLITE_DUPLICATAS=1
+# ele também substitui o Supabase na checagem de duplicatas quando o Supabase não está disponível.
+SQLITE_PATH = os.environ.get("CRAWLER_SQLITE", "")
+SQLITE_DUPLICATAS = os.environ.get("CRAWLER_SQLITE_DUPLICATAS", "0") == "1"
+destino_sqlite = None
+sqlite_iniciado = False
+
+def obter_destino_sqlite():
+    global destino_sqlite, sqlite_iniciado
+    with conexoes_lock:
+        if not sqlite_iniciado and SQLITE_PATH:
+            try:
+                destino_sqlite = DestinoSQLite(SQLITE_PATH)
+                print(f"✔️ Banco SQLite local: {SQLITE_PATH}")
+            except Exception as e:
+                print(f"❌ ERRO: Falha ao abrir o banco SQLite {SQLITE_PATH}: {e}")
+        sqlite_iniciado = True
+        return destino_sqlite
+
+versoes_existentes = None
+versoes_existentes_iniciado = False
+versoes_existentes_lock = threading.Lock()
+
+def obter_versoes_existentes():
+    """Pares (modelo, versao) já gravados, carregados de uma vez no primeiro uso. None = consultar versão a versão."""
+    global versoes_existentes, versoes_existentes_iniciado
+    with conexoes_lock:
+        if versoes_existentes_iniciado: return versoes_existentes
+        versoes_existentes_iniciado = True
+        cliente = obter_supabase()
+        if cliente:
+            try:
+                versoes_existentes = carregar_versoes_existentes(cliente)
+                print(f"✔️ {len(versoes_existentes)} versões já existentes carregadas do Supabase.")
+            except Exception as e:
+                print(f"⚠️ AVISO: Falha ao carregar versões existentes do Supabase ({e}). Consultando versão a versão.")
+        elif SQLITE_DUPLICATAS and MODO_DOM != "reproduzir" and obter_destino_sqlite():
+            versoes_existentes = destino_sqlite.versoes_existentes()
+            print(f"✔️ {len(versoes_existentes)} versões já existentes carregadas do SQLite local (checagem de duplicatas ATIVADA).")
+        return versoes_existentes
+
+def atualizar_versoes_existentes(modelo):
+    """Recarrega do Supabase somente os pares do modelo informado."""
+    if not obter_supabase() or obter_versoes_existentes() is None: return
+    try:
+        pares_modelo = carregar_versoes_existentes(supabase, modelo)
+        with versoes_existentes_lock:
+            versoes_existentes.difference_update({par for par in versoes_existentes if par[0] == modelo})
+            versoes_existentes.update(pares_modelo)
+    except Exception as e_supa:
+        print(f"      ⚠️ ERRO ao recarregar versões do Supabase para '{modelo}': {e_supa}. Usando o conjunto já carregado.")
+
+def versao_ja_existe(modelo, nome):
+    """Verifica no conjunto em memória; sem ele, consulta o Supabase como antes."""
+    if obter_versoes_existentes() is not None:
+        with versoes_existentes_lock:
+            return (modelo, nome) in versoes_existentes
+    response = obter_supabase().table('veiculos').select('id', count='exact').eq('marca', 'citroen').eq('modelo', modelo).eq('versao', nome).execute()
+    rastreamento.contar("consultas_supabase")
+    return response.count > 0
+
+# "1" grava as versões na tabela 'veiculos' (upsert em lote, modelo a modelo, durante o crawl)
+SUPABASE_UPSERT = os.environ.get("CRAWLER_SUPABASE_UPSERT", "0") == "1"
+SUPABASE_LOTE = int(os.environ.get("CRAWLER_SUPABASE_LOTE", "200"))
+destino_supabase = None
+
+def obter_destino_supabase():
+    """Fila de upsert em segundo plano, criada junto com o primeiro modelo gravado."""
+    global destino_supabase
+    with conexoes_lock:
+        if destino_supabase is None and SUPABASE_UPSERT and obter_supabase():
+            destino_supabase = DestinoSupabase(supabase, tamanho_lote=SUPABASE_LOTE)
+            print(f"✔️ Upsert no Supabase ativado (lotes de {SUPABASE_LOTE} linhas).")
+        return destino_supabase
+
+def fechar_destino_supabase():
+    """Grava os lotes pendentes e encerra a fila (a próxima gravação abre outra)."""
+    global destino_supabase
+    with conexoes_lock:
+        destino, destino_supabase = destino_supabase, None
+    if not destino: return None
+    with rastreamento.etapa("upsert_supabase"):
+        estatisticas_upsert = destino.fechar()
+    rastreamento.contar("consultas_supabase", estatisticas_upsert["lotes"] + estatisticas_upsert["falhas"] + estatisticas_upsert["retentativas"])
+    print(f"✔️ Supabase: {estatisticas_upsert['linhas']} linhas em {estatisticas_upsert['lotes']} lotes ({estatisticas_upsert['retentativas']} retentativas, {estatisticas_upsert['linhas_perdidas']} linhas não gravadas).")
+    return estatisticas_upsert
 # --- FIM DA CONEXÃO ---
 
 
 # --- CONFIG DO NAVEGADOR (MODO NUVEM) ---
-chrome_options = Options()
-chrome_options.add_argument("--headless=new")  
-chrome_options.add_argument("--no-sandbox") 
-chrome_options.add_argument("--disable-dev-shm-usage") 
-chrome_options.add_argument("--window-size=1920,1080") 
-chrome_options.add_argument("--start-maximized")
-
-driver = webdriver.Chrome(service=Service(), options=chrome_options)
+ARGUMENTOS_CHROME = ["--headless=new", "--no-sandbox", "--disable-dev-shm-usage", "--window-size=1920,1080", "--start-maximized"]
+
+# Home do site (o benchmark aponta para o site de fixtures local)
+URL_BASE = os.environ.get("CRAWLER_URL_BASE", "https://www.citroen.com.br/")
+
+# Número de navegadores em paralelo no Passo 4 (1 = modo sequencial original)
+NUM_WORKERS = int(os.environ.get("CRAWLER_WORKERS", "1"))
+
+# Extração do carrossel em lote (1 execute_script por página). "0" volta ao modo célula a célula.
+EXTRACAO_JS = os.environ.get("CRAWLER_EXTRACAO_JS", "1") != "0"
+
+class ContadorComandos:
+    """Base do ChromeContador: conta os comandos WebDriver enviados (inclui os de WebElement)."""
+    comandos_webdriver = 0
+
+    def execute(self, driver_command, params=None):
+        self.comandos_webdriver += 1
+        rastreamento.contar("comandos_webdriver")
+        return super().execute(driver_command, params)
+
+# Perfil de bloqueio de recursos (via CDP Network.setBlockedURLs). O crawler só lê texto,
+# hrefs e o atributo src das imagens, então baixar mídia, fontes e rastreadores é desperdício.
+#   "0"         -> sem bloqueio
+#   "padrao"    -> vídeo/áudio, fontes e rastreadores/analytics de terceiros
+#   "agressivo" -> padrao + arquivos de imagem (o src continua no DOM)
+# CRAWLER_BLOQUEIO_PERMITIR: trechos separados por vírgula que nunca são bloqueados
+# (ex: um script de terceiro de que a página precise para hidratar).
+PERFIL_BLOQUEIO = os.environ.get("CRAWLER_BLOQUEIO", "padrao").strip().lower()
+BLOQUEIO_PERMITIR = [trecho.strip() for trecho in os.environ.get("CRAWLER_BLOQUEIO_PERMITIR", "").split(",") if trecho.strip()]
+PADROES_BLOQUEIO = {
+    "midia": ["*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg", "*youtube.com/embed*", "*vimeo.com*"],
+    "fontes": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*fonts.googleapis.com*", "*fonts.gstatic.com*"],
+    "rastreadores": [
+        "*googletagmanager.com*", "*google-analytics.com*", "*analytics.google.com*", "*doubleclick.net*",
+        "*googleadservices.com*", "*connect.facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*hotjar.io*",
+        "*clarity.ms*", "*tiktok.com*", "*bat.bing.com*", "*criteo.*", "*taboola.com*", "*outbrain.com*",
+        "*adobedtm.com*", "*demdex.net*", "*omtrdc.net*", "*2o7.net*", "*cookielaw.org*", "*onetrust.com*",
+        "*quantummetric.com*", "*contentsquare.net*", "*linkedin.com/px*", "*snap.licdn.com*",
+    ],
+    "imagens": ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico"],
+}
+PERFIS_BLOQUEIO = {
+    "0": [],
+    "padrao": ["midia", "fontes", "rastreadores"],
+    "agressivo": ["midia", "fontes", "rastreadores", "imagens"],
+}
+
+def padroes_bloqueados(perfil=PERFIL_BLOQUEIO, permitir=BLOQUEIO_PERMITIR):
+    if perfil not in PERFIS_BLOQUEIO:
+        print(f"      ⚠️ Perfil de bloqueio '{perfil}' desconhecido. Usando 'padrao'.")
+        perfil = "padrao"
+    padroes = [padrao for grupo in PERFIS_BLOQUEIO[perfil] for padrao in PADROES_BLOQUEIO[grupo]]
+    return [padrao for padrao in padroes if not any(trecho in padrao.strip("*") or padrao.strip("*") in trecho for trecho in permitir)]
+
+def aplicar_bloqueio(driver):
+    padroes = padroes_bloqueados()
+    if not padroes: return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": padroes})
+    except Exception as e_cdp:
+        print(f"      ⚠️ Não foi possível aplicar o bloqueio de recursos ({e_cdp}).")
+
+def criar_driver():
+    carregar_selenium()
+    chrome_options = Options()
+    for argumento in ARGUMENTOS_CHROME:
+        chrome_options.add_argument(argumento)
+    driver = ChromeContador(service=Service(), options=chrome_options)
+    aplicar_bloqueio(driver)
+    return driver
+
+class NavegadorSobDemanda:
+    """Guarda um Chrome que só é aberto no primeiro obter() (o motor HTTP quase nunca precisa dele)."""
+
+    def __init__(self, driver=None):
+        self.driver = driver
+        self.cancelado = False
+
+    def obter(self):
+        if self.cancelado: raise RuntimeError("navegador derrubado pelo prazo do modelo")
+        if self.driver is None:
+            self.driver = criar_driver()
+            if self.cancelado:  # o watchdog cancelou enquanto o Chrome abria
+                self.fechar()
+                raise RuntimeError("navegador derrubado pelo prazo do modelo")
+        return self.driver
+
+    def fechar(self):
+        driver, self.driver = self.driver, None
+        if driver is not None:
+            driver.quit()
+
+    def cancelar(self):
+        """Derruba o Chrome a partir de outra thread: o comando em andamento falha e obter() não abre outro."""
+        self.cancelado = True
+        try:
+            self.fechar()
+        except Exception:
+            pass
+
 # --- FIM DA CONFIG ---
 
-wait = WebDriverWait(driver, 30)
-wait_short = WebDriverWait(driver, 10) 
+# --- POLÍTICA DE ESPERAS (substitui os time.sleep fixos) ---
+# ponto de chamada: (condição, tempo máximo em s). O máximo é o antigo sleep fixo,
+# então uma espera nunca demora mais que antes. Ajustável por CRAWLER_ESPERA_<PONTO>.
+#   "dom"      -> DOM sem mutações por ESPERA_QUIETO segundos
+#   "rede"     -> documento completo e sem novos recursos por ESPERA_QUIETO segundos
+#   "condicao" -> função/expected_condition passada pelo chamador
+#   "rolagem"  -> hidratação da página inteira numa passada (hidratar_pagina)
+ESPERAS = {
+    "menu_aberto": ("dom", 2.5),
+    "carros_expandido": ("rede", 2.5),  # a lista de modelos do menu chega depois do clique
+    "titulo_versoes": ("dom", 1.5),
+    "hidratacao": ("rolagem", 12.5),
+    "aba_jumpy": ("dom", 0.5),
+    "pdf_nova_aba": ("condicao", 2.5),
+    "pdf_captura": ("condicao", 2.5),
+    "botao_comparativo": ("dom", 0.5),
+}
+ESPERA_QUIETO = float(os.environ.get("CRAWLER_ESPERA_QUIETO", "0.25"))
 
-driver.get("https://www.citroen.com.br/")
+JS_DOM_ESTAVEL = """
+const quietoMs = arguments[0], limiteMs = arguments[1], done = arguments[arguments.length - 1];
+const inicio = performance.now(); let ultimo = inicio;
+const obs = new MutationObserver(() => { ultimo = performance.now(); });
+obs.observe(document, {childList: true, subtree: true, characterData: true});
+const t = setInterval(() => {
+    const agora = performance.now();
+    if (agora - ultimo >= quietoMs || agora - inicio >= limiteMs) { clearInterval(t); obs.disconnect(); done(agora - ultimo >= quietoMs); }
+}, 50);
+"""
 
-# === 1️⃣ CLICAR NO MENU PRINCIPAL ===
-try:
+# PerformanceObserver em vez de contar getEntriesByType: o buffer de Resource Timing enche
+# (250 entradas por padrão) e a contagem parada pareceria rede ociosa.
+JS_REDE_OCIOSA = """
+const quietoMs = arguments[0], limiteMs = arguments[1], done = arguments[arguments.length - 1];
+const inicio = performance.now(); let ultimo = inicio;
+const obs = new PerformanceObserver(() => { ultimo = performance.now(); });
+obs.observe({type: 'resource'});
+const t = setInterval(() => {
+    const agora = performance.now();
+    if (document.readyState !== 'complete') ultimo = agora;
+    if (agora - ultimo >= quietoMs || agora - inicio >= limiteMs) { clearInterval(t); obs.disconnect(); done(agora - ultimo >= quietoMs); }
+}, 50);
+"""
+
+INICIO_EXECUCAO = time.perf_counter()
+telemetria_esperas = {}
+telemetria_lock = threading.Lock()
+
+def tempo_maximo_espera(ponto):
+    return float(os.environ.get(f"CRAWLER_ESPERA_{ponto.upper()}", ESPERAS[ponto][1]))
+
+def aguardar(driver, ponto, condicao=None):
+    """Espera a condição do ponto (ou até o tempo máximo) e registra o tempo gasto."""
+    tipo, _ = ESPERAS[ponto]
+    limite = tempo_maximo_espera(ponto)
+    inicio = time.perf_counter()
+    atendida = False
     try:
-        print("Aguardando o loader da página inicial desaparecer...")
-        wait.until(
-            EC.invisibility_of_element_located((By.CSS_SELECTOR, "div[data-testid='hub-loader']"))
-        )
-        print("✔️ Loader desapareceu.")
+        if tipo == "condicao":
+            carregar_selenium()
+            WebDriverWait(driver, limite, poll_frequency=0.1).until(condicao)
+            atendida = True
+        else:
+            js = JS_DOM_ESTAVEL if tipo == "dom" else JS_REDE_OCIOSA
+            atendida = bool(driver.execute_async_script(js, int(ESPERA_QUIETO * 1000), int(limite * 1000)))
     except TimeoutException:
-        print("⚠️ Loader não desapareceu a tempo, mas tentando continuar...")
+        pass
+    except Exception as e_espera:
+        print(f"      ⚠️ Falha na espera '{ponto}' ({e_espera}). Continuando...")
+    registrar_espera(ponto, inicio, limite, atendida)
+    return atendida
 
-    menu_button = wait.until(
-        EC.element_to_be_clickable((By.CSS_SELECTOR, 'li[title="Menu"] .menu-hamburger__cta'))
-    )
-    menu_button.click() 
+def registrar_espera(ponto, inicio, limite, atendida):
+    duracao = time.perf_counter() - inicio
+    rastreamento.registrar_evento(f"espera:{ponto}", inicio, duracao, categoria="espera", args={"atendida": atendida})
+    with telemetria_lock:
+        dados = telemetria_esperas.setdefault(ponto, {"chamadas": 0, "espera_s": 0.0, "limite_atingido": 0, "limite_s": limite})
+        dados["chamadas"] += 1
+        dados["espera_s"] += duracao
+        if not atendida: dados["limite_atingido"] += 1
+    return duracao
 
-    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.menu-hamburger__options")))
-    print("✔️ Menu principal aberto.")
-    time.sleep(2.5) 
+# Hidratação em uma passada: rola a página em passos, cada passo espera só o DOM parar de
+# mudar (MutationObserver), e termina quando os alvos da extração já existem e o DOM está
+# quieto, ou quando chegou ao fim da página sem ela crescer mais. Devolve os alvos já
+# localizados (uma consulta cada) e o tempo gasto, num único comando WebDriver.
+JS_HIDRATAR_PAGINA = """
+const quietoMs = arguments[0], passoMs = arguments[1], limiteMs = arguments[2];
+const xpTitulo = arguments[3], xpBotao = arguments[4], done = arguments[arguments.length - 1];
+const inicio = performance.now(); let ultimaMutacao = inicio; let passos = 0;
+const obs = new MutationObserver(() => { ultimaMutacao = performance.now(); });
+obs.observe(document, {childList: true, subtree: true});
+const xp = x => document.evaluate(x, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const t = setInterval(() => {
+    const agora = performance.now(), parado = agora - ultimaMutacao;
+    const alvos = {titulo: xp(xpTitulo), carrossel: document.querySelector('div.next-gen-carousel'),
+                   abas: document.querySelector('div.hub-tabs-swiper'), botao: xp(xpBotao)};
+    const completo = !!(alvos.titulo && (alvos.carrossel || alvos.abas) && alvos.botao);
+    const fim = window.scrollY + window.innerHeight >= document.documentElement.scrollHeight - 2;
+    if ((completo || fim) && parado >= quietoMs || agora - inicio >= limiteMs) {
+        clearInterval(t); obs.disconnect();
+        done(Object.assign(alvos, {ms: Math.round(agora - inicio), passos: passos, completo: completo, fim: fim}));
+    } else if (!fim && parado >= passoMs) {
+        window.scrollBy(0, window.innerHeight * 0.9); passos++; ultimaMutacao = performance.now();
+    }
+}, 50);
+"""
+ESPERA_PASSO_HIDRATACAO = float(os.environ.get("CRAWLER_ESPERA_PASSO_HIDRATACAO", "0.1"))
 
-except Exception as e:
-    print(f"Erro ao abrir menu principal: {e}")
-    driver.quit()
-    exit()
+def hidratar_pagina(driver):
+    """Dispara todo o carregamento preguiçoso da página numa passada. Devolve os alvos encontrados
+    (titulo, carrossel, abas, botao: WebElement ou None) e ms/passos; {} se o script falhar."""
+    limite = tempo_maximo_espera("hidratacao")
+    inicio = time.perf_counter()
+    try:
+        resultado = driver.execute_async_script(JS_HIDRATAR_PAGINA, int(ESPERA_QUIETO * 1000), int(ESPERA_PASSO_HIDRATACAO * 1000),
+                                                int(limite * 1000), XPATH_TITULO_VERSOES, XPATH_BOTAO_COMPARATIVO) or {}
+    except Exception as e_hidratacao:
+        print(f"      ⚠️ Falha na hidratação da página ({e_hidratacao}). Buscando os elementos sem rolar.")
+        resultado = {}
+    atendida = bool(resultado.get("completo") or resultado.get("fim"))
+    duracao = registrar_espera("hidratacao", inicio, limite, atendida)
+    if resultado:
+        print(f"      💧 Página hidratada em {duracao:.2f}s ({resultado.get('passos', 0)} rolagens, "
+              f"{'todos os alvos encontrados' if resultado.get('completo') else 'fim da página' if resultado.get('fim') else 'limite de ' + str(limite) + 's atingido'}).")
+    resultado["hidratacao_s"] = round(duracao, 3)
+    return resultado
 
-# === 2️⃣ CLICAR NO “+” DO ITEM CARROS ===
-try:
-    carros_expand = wait.until(
-        EC.element_to_be_clickable((
-            By.XPATH,
-            "//div[contains(@class,'menu-hamburger__options__item') and contains(.,'Carros')]//button[@title='Expand item']"
-        ))
+def relatorio_esperas(nome_arquivo="citroen_esperas.json"):
+    """Imprime e salva o tempo de espera por ponto versus o tempo de trabalho da execução."""
+    total = time.perf_counter() - INICIO_EXECUCAO
+    with telemetria_lock:
+        pontos = {ponto: {**dados, "espera_s": round(dados["espera_s"], 3)} for ponto, dados in telemetria_esperas.items()}
+    espera_total = sum(dados["espera_s"] for dados in pontos.values())
+    relatorio = {
+        "duracao_total_s": round(total, 3),
+        "espera_total_s": round(espera_total, 3),
+        "trabalho_s": round(total - espera_total, 3),
+        "pontos": pontos,
+    }
+    print("\n--- RELATÓRIO DE ESPERAS ---")
+    print(f"Total: {total:.1f}s | Esperando: {espera_total:.1f}s | Trabalhando: {total - espera_total:.1f}s")
+    for ponto, dados in sorted(pontos.items(), key=lambda item: -item[1]["espera_s"]):
+        print(f"   {ponto}: {dados['chamadas']} esperas, {dados['espera_s']:.2f}s (limite de {dados['limite_s']}s atingido {dados['limite_atingido']}x)")
+    try:
+        with open(nome_arquivo, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    except Exception as e:
+        print(f"❌ Erro ao salvar o relatório de esperas: {e}")
+    return relatorio
+# --- FIM DA POLÍTICA DE ESPERAS ---
+
+# --- CUSTO DE CARREGAMENTO POR PÁGINA ---
+# Resource Timing do navegador: os recursos bloqueados não aparecem. transferSize de outra
+# origem sem Timing-Allow-Origin vem 0, então o total é um piso (o encodedBodySize cobre cache).
+JS_CUSTO_PAGINA = """
+const nav = performance.getEntriesByType('navigation')[0] || {};
+const recursos = performance.getEntriesByType('resource');
+const tamanho = e => e.transferSize || e.encodedBodySize || 0;
+return {
+    carregamento_ms: nav.loadEventEnd > 0 ? nav.loadEventEnd : (nav.domContentLoadedEventEnd || performance.now()),
+    recursos: recursos.length,
+    bytes: tamanho(nav) + recursos.reduce((soma, e) => soma + tamanho(e), 0),
+};
+"""
+telemetria_paginas = {}
+
+def registrar_custo_pagina(driver, modelo, hidratacao_s=None):
+    try:
+        custo = driver.execute_script(JS_CUSTO_PAGINA) or {}
+    except Exception as e_custo:
+        print(f"      ⚠️ Não foi possível medir o carregamento da página: {e_custo}")
+        return None
+    custo = {"carregamento_s": round(custo.get("carregamento_ms", 0) / 1000, 3), "recursos": custo.get("recursos", 0),
+             "bytes": int(custo.get("bytes", 0)), "bloqueio": PERFIL_BLOQUEIO, "hidratacao_s": hidratacao_s}
+    print(f"      📦 Página carregada em {custo['carregamento_s']:.2f}s: {custo['recursos']} recursos, {custo['bytes'] / 1024:.0f} KB (bloqueio: {PERFIL_BLOQUEIO}).")
+    with telemetria_lock:
+        telemetria_paginas[modelo] = custo
+    return custo
+
+def relatorio_paginas(nome_arquivo="citroen_paginas.json"):
+    """Salva o custo de carregamento por modelo (para comparar perfis de bloqueio)."""
+    with telemetria_lock:
+        paginas = dict(telemetria_paginas)
+    if not paginas: return None
+    relatorio = {
+        "bloqueio": PERFIL_BLOQUEIO,
+        "paginas": len(paginas),
+        "carregamento_total_s": round(sum(custo["carregamento_s"] for custo in paginas.values()), 3),
+        "bytes_total": sum(custo["bytes"] for custo in paginas.values()),
+        "hidratacao_total_s": round(sum(custo.get("hidratacao_s") or 0 for custo in paginas.values()), 3),
+        "modelos": paginas,
+    }
+    print(f"📦 Páginas no navegador: {relatorio['paginas']}, {relatorio['carregamento_total_s']:.1f}s de carregamento, {relatorio['bytes_total'] / 1048576:.1f} MB (bloqueio: {PERFIL_BLOQUEIO}).")
+    try:
+        with open(nome_arquivo, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    except Exception as e:
+        print(f"❌ Erro ao salvar o relatório de páginas: {e}")
+    return relatorio
+# --- FIM DO CUSTO POR PÁGINA ---
+
+def url_parece_pdf(url):
+    return bool(url) and (url.lower().endswith('.pdf') or 'blob:' in url.lower() or 'pdf' in url.lower())
+
+# --- CAPTURA DA FICHA TÉCNICA SEM NOVA ABA ---
+# "js" (padrão): durante o clique, window.open e a navegação de links ficam interceptados e o
+# destino é lido direto, sem criar janela nem esperar a aba carregar. "aba": comportamento
+# antigo (abre a nova aba e lê a URL dela), também usado se a interceptação não capturar nada.
+CAPTURA_PDF = os.environ.get("CRAWLER_CAPTURA_PDF", "js").strip().lower()
+
+JS_CLICAR_CAPTURANDO = """
+const link = arguments[0];
+const cap = window.__capturaFicha = {urls: [], openOriginal: window.open};
+const registrar = u => { if (u) { try { cap.urls.push(new URL(String(u), location.href).href); } catch (e) {} } };
+window.open = function (u) {
+    registrar(u);
+    // Janela falsa: cobre o padrão "w = window.open(); w.location = url"
+    let destino = '';
+    const loc = {assign: registrar, replace: registrar};
+    Object.defineProperty(loc, 'href', {get: () => destino, set: v => { destino = String(v); registrar(v); }});
+    const falsa = {closed: false, opener: window, focus() {}, blur() {}, close() { this.closed = true; }, document: {write() {}, close() {}}};
+    Object.defineProperty(falsa, 'location', {get: () => loc, set: v => { destino = String(v); registrar(v); }});
+    return falsa;
+};
+cap.bloquear = e => {
+    const a = e.target.closest ? e.target.closest('a[href]') : null;
+    if (!a) return;
+    const href = a.getAttribute('href');
+    if (href && href !== '#' && !href.startsWith('javascript:')) { registrar(a.href); e.preventDefault(); }
+};
+document.addEventListener('click', cap.bloquear, true);
+link.click();
+"""
+
+JS_ENCERRAR_CAPTURA = """
+const cap = window.__capturaFicha;
+if (!cap) return [];
+window.open = cap.openOriginal;
+document.removeEventListener('click', cap.bloquear, true);
+delete window.__capturaFicha;
+return cap.urls;
+"""
+
+def resolver_destino_pdf(url):
+    """Destino capturado que não parece PDF (ex: rota que redireciona): segue os redirects via HTTP."""
+    if url_parece_pdf(url): return url
+    if importar_requests() is None: return None
+    try:
+        resposta = obter_sessao_http().head(url, allow_redirects=True, timeout=HTTP_TIMEOUT)
+        tipo = resposta.headers.get("Content-Type", "").lower()
+        if resposta.ok and (url_parece_pdf(resposta.url) or "application/pdf" in tipo):
+            return resposta.url
+    except Exception as e_head:
+        print(f"                ⚠️ Não foi possível resolver o destino {url}: {e_head}")
+    return None
+
+def capturar_pdf_sem_aba(driver, pdf_link_el):
+    """Clica na ficha com window.open/navegação interceptados. Devolve a URL do PDF ou None."""
+    urls = []
+    try:
+        driver.execute_script(JS_CLICAR_CAPTURANDO, pdf_link_el)
+        aguardar(driver, "pdf_captura", lambda d: d.execute_script("return (window.__capturaFicha || {urls: [1]}).urls.length > 0"))
+    except Exception as e_captura:
+        print(f"                ⚠️ Falha ao interceptar o clique da ficha: {e_captura}")
+    try: urls = driver.execute_script(JS_ENCERRAR_CAPTURA) or []
+    except Exception: pass
+    for url in urls:
+        destino = resolver_destino_pdf(url)
+        if destino: return destino
+    if urls: print(f"                ⚠️ Clique capturado, mas o destino não parece PDF: {urls[0]}")
+    return None
+
+def capturar_pdf_nova_aba(driver, pdf_link_el, wait_short):
+    """Modo antigo: deixa a ficha abrir em nova aba, lê a URL e fecha a aba."""
+    main_window = driver.current_window_handle
+    all_windows_before = set(driver.window_handles) 
+    try:
+        driver.execute_script("arguments[0].click();", pdf_link_el)
+        wait_short.until(EC.number_of_windows_to_be(len(all_windows_before) + 1))
+        all_windows_after = set(driver.window_handles)
+        new_window = list(all_windows_after - all_windows_before)[0] 
+        driver.switch_to.window(new_window)
+        aguardar(driver, "pdf_nova_aba", lambda d: url_parece_pdf(d.current_url))
+        pdf_tab_url = driver.current_url
+        driver.close() 
+        driver.switch_to.window(main_window) 
+        if url_parece_pdf(pdf_tab_url): return pdf_tab_url
+        print(f"                ⚠️  Nova aba aberta, mas URL não parece PDF: {pdf_tab_url}")
+    except TimeoutException:
+        print(f"                ❌ Erro: Clicou em 'Ficha Técnica', mas nova aba não abriu a tempo.")
+    except Exception as e_click:
+        print(f"                ❌ Erro ao clicar e processar nova aba do PDF: {e_click}")
+    if driver.current_window_handle != main_window:
+        try: driver.switch_to.window(main_window)
+        except Exception: pass
+    return None
+# --- FIM DA CAPTURA DA FICHA TÉCNICA ---
+
+
+# --- SELETORES E EXTRAÇÃO DO CARROSSEL ---
+XPATH_SLIDES = ".//div[@data-testid='slide'] | .//div[@data-testid='next-gen-container-component' and @help-text='versão']"
+XPATH_PDF_SLIDE = ".//a[contains(@href, '.pdf') and (contains(translate(., 'FICHA', 'ficha'), 'ficha'))]"
+XPATH_SPECS_SLIDE = ".//div[contains(@class, 'image-wrapper')]/following-sibling::div[contains(@class, 'next-gen-text')]/span[contains(@class, 'font-body-sm') and @data-testid='next-gen-text-id']"
+CSS_NOME_SLIDE = "h1.font-h1, h1, h2.font-h2, h2, h3.font-h3, h3, span.font-h1, span.font-h2, span.font-h3"
+CSS_PRECO_SLIDE = "span.font-h2, p.font-h2, div.font-h2, span.font-h3, p.font-h3, div.font-h3, h1 b"
+CSS_IMAGEM_SLIDE = "img.next-gen-media, div.chameleon-image img"
+XPATH_FICHA_CARD = ".//a[.//span[contains(translate(., 'FICHA', 'ficha'), 'ficha')] or (self::a and contains(translate(., 'FICHA', 'ficha'), 'ficha'))]"
+TEXTOS_BOTAO_COMPARATIVO = ['COMPARATIVO ENTRE AS VERSÕES', 'Clique e compare as versões']
+XPATH_TITULO_VERSOES = "//*[contains(translate(., 'VERSÕES', 'versões'), 'versão') and (self::h1 or self::h2 or self::h3 or contains(@class, 'font-h1') or contains(@class, 'font-h2') or contains(@class, 'font-h3'))]"
+XPATH_BOTAO_COMPARATIVO = " | ".join([f"//button[contains(., '{text}')]" for text in TEXTOS_BOTAO_COMPARATIVO])
+XPATH_CONTEUDO_COMPARATIVO = " | ".join([f"//button[contains(., '{text}')]/following-sibling::div[contains(@class, 'collapse-content')]" for text in TEXTOS_BOTAO_COMPARATIVO])
+
+# Usa os mesmos XPath/CSS do modo célula a célula via document.evaluate
+JS_EXTRAIR_SLIDES = """
+const carrossel = arguments[0];
+const xpaths = arguments[1];
+const css = arguments[2];
+const todos = (xp, ctx) => {
+    const r = document.evaluate(xp, ctx, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const nos = [];
+    for (let i = 0; i < r.snapshotLength; i++) nos.push(r.snapshotItem(i));
+    return nos;
+};
+const slides = todos(xpaths.slides, carrossel).map(slide => {
+    const pdf = todos(xpaths.pdf, slide)[0];
+    const img = slide.querySelector(css.imagem);
+    return {
+        nome: slide.querySelector(css.nome)?.textContent.trim() || null,
+        preco: slide.querySelector(css.preco)?.textContent.trim() || null,
+        imagem_url: img ? img.getAttribute('src') : null,
+        pdf_href: pdf ? pdf.href : null,
+        specs: todos(xpaths.specs, slide).map(s => s.textContent.trim())
+    };
+});
+return {url: window.location.href, slides: slides};
+"""
+
+def extrair_slides_js(driver, carousel_element):
+    return driver.execute_script(
+        JS_EXTRAIR_SLIDES, carousel_element,
+        {"slides": XPATH_SLIDES, "pdf": XPATH_PDF_SLIDE, "specs": XPATH_SPECS_SLIDE},
+        {"nome": CSS_NOME_SLIDE, "preco": CSS_PRECO_SLIDE, "imagem": CSS_IMAGEM_SLIDE},
     )
 
-    print("Botão 'Carros' pronto. Tentando clique normal...")
-    carros_expand.click() 
-    print("✔️ Clicou em '+' de Carros.")
+def ler_slide_webdriver(driver, slide):
+    """Modo célula a célula: lê um slide com vários comandos WebDriver (mesmo formato do JS)."""
+    slide_raw = {"nome": None, "preco": None, "imagem_url": None, "pdf_href": None, "specs": []}
+    try:
+        slide_raw["nome"] = driver.execute_script(f"return arguments[0].querySelector('{CSS_NOME_SLIDE}')?.textContent.trim()", slide)
+        slide_raw["preco"] = driver.execute_script(f"return arguments[0].querySelector('{CSS_PRECO_SLIDE}')?.textContent.trim()", slide)
+        slide_raw["imagem_url"] = driver.execute_script(f"return arguments[0].querySelector('{CSS_IMAGEM_SLIDE}')?.getAttribute('src')", slide)
+    except Exception as e_slide:
+        print(f"         - Erro ao ler dados do slide: {e_slide}")
+    try:
+        slide_raw["pdf_href"] = slide.find_element(By.XPATH, XPATH_PDF_SLIDE).get_attribute('href')
+    except NoSuchElementException: pass
+    except Exception as e_pdf_slide: print(f"         - Erro ao procurar PDF no slide: {e_pdf_slide}")
+    try:
+        slide_raw["specs"] = [span.get_attribute('textContent') for span in slide.find_elements(By.XPATH, XPATH_SPECS_SLIDE)]
+    except Exception as e_spec:
+        print(f"         - Erro ao processar itens de especificação (Motor, Rodas, etc.) para '{slide_raw['nome']}': {e_spec}")
+    return slide_raw
+# --- FIM DA EXTRAÇÃO DO CARROSSEL ---
 
-    wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "li.menu-hamburger__options__category")))
-    time.sleep(2.5) 
+# Similaridade mínima (0 a 1) para parear por tokens um nome do comparativo sem par exato
+MERGE_LIMIAR = float(os.environ.get("CRAWLER_MERGE_LIMIAR", "0.7"))
 
-except Exception as e:
-    print(f"Erro ao expandir 'Carros': {e}")
-    driver.quit()
-    exit()
 
-# === 3️⃣ EXTRAIR OS MODELOS ===
-print("--- INICIANDO EXTRAÇÃO DE MODELOS (PASSO 3) ---")
-categories = driver.find_elements(By.CSS_SELECTOR, "li.menu-hamburger__options__category")
-result = {}
+def manual_fallback(modelo, nome):
+    """URL do MANUAL_FALLBACK_MAP para a versão, quando o site não traz o PDF."""
+    try:
+        nome_normalizado = nome.lower().strip().replace('!', '')
+        fallback_url = MANUAL_FALLBACK_MAP.get((modelo, nome_normalizado))
+        if fallback_url:
+            print(f"         - Info: Manual não encontrado no site. Usando URL de fallback para '{nome}'.")
+        return fallback_url
+    except Exception as e_map:
+        print(f"         - Erro ao tentar aplicar fallback de manual: {e_map}")
+        return None
 
-for cat in categories:
+def versao_pulada_supabase(modelo, nome):
+    """True quando a versão já existe no Supabase (ou no SQLite local) e deve ser pulada."""
+    if not nome or (not obter_supabase() and obter_versoes_existentes() is None): return False
     try:
-        tipo = cat.find_element(By.TAG_NAME, "span").text.strip(": ")
+        if versao_ja_existe(modelo, nome):
+            print(f"         - Aviso: Versão '{nome}' (Modelo: {modelo}) JÁ EXISTE {'no Supabase' if supabase else 'no SQLite local'}. Pulando.")
+            rastreamento.contar("versoes_puladas")
+            versoes_puladas().append(nome)
+            return True
+    except Exception as e_supa:
+        print(f"         - ⚠️ ERRO ao consultar Supabase para '{nome}': {e_supa}. Continuando a coleta...")
+    return False
+
+def montar_versoes_carrossel(modelo, slides_raw, base_url):
+    """Converte os slides brutos (JSON do JavaScript, WebDriver ou HTML estático) no formato de versão."""
+    lista_versoes = []
+    nomes_vistos = set() 
+    for slide_raw in slides_raw:
+        try:
+            nome = slide_raw.get("nome")
+            
+            if nome and nome in nomes_vistos:
+                print(f"         - Aviso: Versão '{nome}' duplicada. Pulando.")
+                continue 
+            if nome:
+                nomes_vistos.add(nome) 
+            
+            if versao_pulada_supabase(modelo, nome):
+                continue 
+
+            preco = slide_raw.get("preco")
+            imagem_url = slide_raw.get("imagem_url")
+            
+            manual_url = None
+            pdf_href = slide_raw.get("pdf_href")
+            if pdf_href and pdf_href != '#': manual_url = urljoin(base_url, pdf_href); print(f"         - PDF Ficha Técnica encontrado DENTRO do slide para '{nome}'.")
+
+            specs = classificar_specs(slide_raw.get("specs") or [])
+
+            if not manual_url and nome:
+                manual_url = manual_fallback(modelo, nome)
+
+
+            if nome: 
+                print(f"         - Versão: {nome} (Preço: {preco or 'N/A'})")
+                
+                lista_versoes.append({
+                    "marca": "citroen",
+                    "modelo": modelo,
+                    "versao": nome, 
+                    "preco": preco or None, 
+                    "imagem_url": imagem_url or None, 
+                    "manual_url": manual_url,
+                    **specs
+                })
+                
+            else: 
+                print("         - Aviso: Slide encontrado, mas sem nome. Pulando.")
+        except Exception as e_inner: 
+            print(f"         - Erro ao processar um slide: {e_inner}")
+    return lista_versoes
+
+
+def juntar_comparativo(modelo, lista_versoes, comparativo_data):
+    """Passo 4c: junta os dados do comparativo às versões (altera lista_versoes) e devolve as estatísticas."""
+    estatisticas = {"exato": 0, "aproximado": 0, "sem_par": 0}
+    if not comparativo_data: return estatisticas
+    print("      ... Juntando dados do comparativo com os dados das versões...")
+    pares = casar_versoes([versao_dict.get("versao") for versao_dict in lista_versoes],
+                          [spec_dict.get("versao_comparativo") for spec_dict in comparativo_data],
+                          modelo, MERGE_LIMIAR)
+    for spec_dict, (indice, similaridade, tipo) in zip(comparativo_data, pares):
+        spec_name = spec_dict.get("versao_comparativo")
+        if not spec_name: continue
+        estatisticas[tipo] += 1
+        if indice is None:
+            print(f"           - Aviso: '{spec_name}' do comparativo não encontrou par na lista de versões (melhor similaridade {similaridade:.2f}).")
+            continue
+        versao_dict = lista_versoes[indice]
+        versao_name = versao_dict["versao"]
+
+        comparator_pdf = spec_dict.get('manual_url')
+        card_pdf = versao_dict.get('manual_url')
+
+        if comparator_pdf:
+            if card_pdf and card_pdf != comparator_pdf:
+                print(f"         - PDF do Comparativo ({spec_name}) encontrado. Sobrescrevendo PDF do Card.")
+
+        elif card_pdf:
+            print(f"         - Mantendo PDF do Card '{versao_name}' (Comparativo não tinha PDF).")
+            spec_dict.pop('manual_url', None)
+
+        # (Lógica de fallback de manual PÓS-merge)
+        if not versao_dict.get('manual_url') and not spec_dict.get('manual_url'):
+            fallback_url = manual_fallback(modelo, versao_name)
+            if fallback_url:
+                spec_dict['manual_url'] = fallback_url
+
+        versao_dict.update(spec_dict) # Merge
+        versao_dict.pop("versao_comparativo", None)
+        if tipo == "aproximado": print(f"           - Dados de '{spec_name}' juntados a '{versao_name}' (similaridade {similaridade:.2f}).")
+        else: print(f"           - Dados de '{spec_name}' juntados.")
+
+    print(f"      📊 Merge do comparativo: {estatisticas['exato']} exatos, {estatisticas['aproximado']} aproximados, {estatisticas['sem_par']} sem par.")
+    return estatisticas
+
+
+# --- MOTOR HTTP (HTML ESTÁTICO, SELENIUM SÓ COMO FALLBACK) ---
+# "0" desliga o motor HTTP e volta a abrir toda página no Chrome
+MOTOR_HTTP = os.environ.get("CRAWLER_MOTOR_HTTP", "1") != "0" and lxml_html is not None and importlib.util.find_spec("requests") is not None
+HTTP_TIMEOUT = float(os.environ.get("CRAWLER_HTTP_TIMEOUT", "20"))
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept-Language": "pt-BR,pt;q=0.9",
+}
+
+# requests só é importado no primeiro uso (sozinho ele pesa mais que o resto da importação)
+requests = None
+sessao_http = None
+sessao_http_lock = threading.Lock()
+
+def importar_requests():
+    global requests
+    if requests is None:
         try:
-            wait_short.until(EC.visibility_of_all_elements_located((By.CSS_SELECTOR, "li.menu-hamburger__options__sub-item a")))
-        except TimeoutException: print(f"      ⚠️ Links não ficaram visíveis a tempo para a categoria '{tipo}'. Pulando categoria."); continue
-        links = cat.find_elements(By.CSS_SELECTOR, "li.menu-hamburger__options__sub-item a")
-        for link in links:
+            import requests as modulo
+        except ImportError:
+            return None
+        requests = modulo
+    return requests
+
+def obter_sessao_http():
+    """Sessão HTTP compartilhada (pool de conexões keep-alive, um slot por worker)."""
+    global sessao_http
+    with sessao_http_lock:
+        if sessao_http is None:
+            from requests.adapters import HTTPAdapter
+            sessao_http = importar_requests().Session()
+            adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=max(4, NUM_WORKERS))
+            sessao_http.mount("https://", adaptador)
+            sessao_http.mount("http://", adaptador)
+            sessao_http.headers.update(HTTP_HEADERS)
+        return sessao_http
+
+REGEX_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w.:-]+)""", re.I)
+
+def html_resposta(resposta):
+    """HTML da resposta decodificado: charset do Content-Type, senão o <meta charset>, senão UTF-8.
+
+    Sem charset no cabeçalho o requests assume ISO-8859-1 em resposta.text (acentos viram "Ã©"),
+    e o lxml faz o mesmo com os bytes de uma página sem <meta charset>.
+    """
+    if "charset=" in (resposta.headers.get("Content-Type") or "").lower():
+        return resposta.text
+    meta = REGEX_META_CHARSET.search(resposta.content[:4096])
+    try:
+        return resposta.content.decode(meta.group(1).decode("ascii") if meta else "utf-8")
+    except (LookupError, UnicodeDecodeError):
+        return resposta.content.decode("utf-8", errors="replace")
+
+def texto_html(el):
+    """Equivalente ao .text do Selenium: texto com espaços/quebras normalizados."""
+    return " ".join(el.text_content().split()) if el is not None else ""
+
+def css_html(el, seletor):
+    """Equivalente ao querySelectorAll: só descendentes, em ordem de documento."""
+    return [encontrado for encontrado in el.cssselect(seletor) if encontrado is not el]
+
+def primeiro_css_html(el, seletor):
+    encontrados = css_html(el, seletor)
+    return encontrados[0] if encontrados else None
+
+def ler_slide_html(slide):
+    """Lê um slide do HTML estático no mesmo formato devolvido pelo JS_EXTRAIR_SLIDES."""
+    nome_el = primeiro_css_html(slide, CSS_NOME_SLIDE)
+    preco_el = primeiro_css_html(slide, CSS_PRECO_SLIDE)
+    imagem_el = primeiro_css_html(slide, CSS_IMAGEM_SLIDE)
+    pdf_links = slide.xpath(XPATH_PDF_SLIDE)
+    return {
+        "nome": nome_el.text_content().strip() or None if nome_el is not None else None,
+        "preco": preco_el.text_content().strip() or None if preco_el is not None else None,
+        "imagem_url": imagem_el.get("src") if imagem_el is not None else None,
+        "pdf_href": pdf_links[0].get("href") if pdf_links else None,
+        "specs": [span.text_content().strip() for span in slide.xpath(XPATH_SPECS_SLIDE)],
+    }
+
+def extrair_abas_html(doc, swiper, modelo, base_url, pdfs_capturados=None):
+    """Padrão Jumpy no HTML estático. Devolve None se alguma aba exigir o navegador."""
+    pdfs_capturados = pdfs_capturados or {}
+    lista_versoes = []
+    for i, _ in enumerate(css_html(swiper, "a.hub-button--tab-swiper")):
+        conteudo = primeiro_css_html(doc, f"div.tab-content-{i}")
+        card = primeiro_css_html(conteudo, "div.hub-card-component") if conteudo is not None else None
+        if card is None:
+            print(f"      ⚠️ Aba {i} não está no HTML estático.")
+            return None
+        titulo_el = primeiro_css_html(card, "h2.hub-card-title")
+        imagem_el = primeiro_css_html(card, "div.hub-card-media img")
+        nome = titulo_el.text_content().strip() if titulo_el is not None else None
+        imagem_url = imagem_el.get("src") if imagem_el is not None else None
+        manual_url = None
+        if versao_pulada_supabase(modelo, nome):
+            continue
+        links = card.xpath(XPATH_FICHA_CARD)
+        if links:
+            pdf_href = urljoin(base_url, links[0].get("href") or "#")
+            if not pdf_href.lower().endswith(".pdf") and i in pdfs_capturados:
+                pdf_href = pdfs_capturados[i]
+            elif not pdf_href.lower().endswith(".pdf"):
+                # A ficha abre em nova aba: só o navegador consegue capturar a URL final
+                print(f"      ⚠️ Ficha de '{nome}' não é um link direto para PDF.")
+                return None
+            manual_url = pdf_href
+        if not manual_url and nome:
+            manual_url = manual_fallback(modelo, nome)
+        if nome:
+            lista_versoes.append({
+                "marca": "citroen",
+                "modelo": modelo,
+                "versao": nome,
+                "preco": precos.trecho_preco(card.text_content()),
+                "imagem_url": imagem_url or None,
+                "manual_url": manual_url,
+                **classificar_specs([])
+            })
+    return lista_versoes
+
+def hrefs_ficha_html(el):
+    return [a.get("href") for a in el.xpath(XPATH_FICHA_LINK) if a.get("href") and a.get("href") != "#"]
+
+def matriz_comparativo_html(content_area):
+    """Mesma matriz do JS_MATRIZ_COMPARATIVO, montada a partir do HTML estático."""
+    tabelas = content_area.xpath(".//table")
+    if tabelas:
+        rows = tabelas[0].xpath(".//tr")
+        versoes = [texto_html(cell) for cell in rows[0].xpath("./td | ./th")[1:]] if rows else []
+        n = len(versoes)
+        if not n: return None
+        linhas = []
+        for data_row in rows[1:]:
+            cells = data_row.xpath(".//td")
+            if len(cells) >= n + 1: linhas.append({"rotulo": texto_html(cells[0]), "valores": [texto_html(cell) for cell in cells[1:n + 1]]})
+        ultima = rows[-1].xpath(".//td")
+        pdfs = [(hrefs_ficha_html(cell) or [None])[0] for cell in ultima[1:]] if len(ultima) == n + 1 else None
+        return {"layout": "tabela", "versoes": versoes, "linhas": linhas, "pdfs": pdfs}
+
+    grids = css_html(content_area, "div.next-gen-grid-container-vue")
+    if len(grids) == 1:
+        nomes = [texto_html(h) for h in css_html(grids[0], "h2.font-h2")]
+        colunas = grids[0].xpath(XPATH_COLUNAS_GRID_UNICO)
+        if not colunas or len(nomes) != len(colunas): return None
+        linhas = []
+        for i, col in enumerate(colunas):
+            for rotulo, valor in zip(css_html(col, "span.font-body-sm"), css_html(col, "p.font-body")):
+                valores = [None] * len(nomes); valores[i] = texto_html(valor)
+                linhas.append({"rotulo": texto_html(rotulo), "valores": valores})
+        links = hrefs_ficha_html(grids[0])
+        return {"layout": "grid_unico", "versoes": nomes, "linhas": linhas, "pdfs": links if len(links) == len(nomes) else None}
+
+    if len(grids) > 2:
+        nomes = [texto_html(h) for h in css_html(grids[0], "h2.font-h2")]
+        n = len(nomes)
+        if not n: return None
+        linhas = []
+        for data_grid in grids[1:-1]:
+            cells = data_grid.xpath(XPATH_CELULAS_JUMPER)
+            for i in range(0, len(cells) - n + 1, n):
+                row_cells = cells[i:i + n]
+                rotulos = row_cells[0].xpath(XPATH_ROTULO_JUMPER)
+                if not rotulos: continue
+                linhas.append({"rotulo": texto_html(rotulos[0]), "valores": [valor_celula_jumper_html(cell, k == 0) for k, cell in enumerate(row_cells)]})
+        links = hrefs_ficha_html(grids[-1])
+        return {"layout": "multiplos_grids", "versoes": nomes, "linhas": linhas, "pdfs": links if len(links) == n else None}
+    return None
+
+def valor_celula_jumper_html(cell, is_label_cell):
+    p_elements = cell.xpath(".//p")
+    cell_value_parts = [texto_html(p) for p in p_elements if not (is_label_cell and p.xpath(".//strong"))]
+    cell_value = " ".join(cell_value_parts).strip()
+    if not cell_value and p_elements: cell_value = texto_html(p_elements[-1])
+    return cell_value or None
+
+def extrair_comparativo_html(doc, base_url):
+    areas = doc.xpath(XPATH_CONTEUDO_COMPARATIVO)
+    return parsear_matriz_comparativo(matriz_comparativo_html(areas[0]), base_url) if areas else []
+
+def extrair_versoes_html(modelo, html_texto, base_url, abas_html=None, pdfs_capturados=None):
+    """Extrai as versões de uma página já baixada (testável offline com HTML salvo).
+
+    abas_html/pdfs_capturados vêm dos snapshots gravados: o conteúdo de cada aba
+    ativa e as URLs de PDF capturadas em nova aba, por índice da aba.
+    Devolve None quando o HTML estático não traz versões e o Selenium é necessário.
+    """
+    doc = lxml_html.fromstring(html_texto)
+    for i, aba_html in (abas_html or {}).items():
+        aba = lxml_html.fragment_fromstring(aba_html)
+        atual = primeiro_css_html(doc, f"div.tab-content-{i}")
+        if atual is not None: atual.getparent().replace(atual, aba)
+        else: doc.append(aba)
+    carrossel = primeiro_css_html(doc, "div.next-gen-carousel")
+    if carrossel is not None:
+        slides_raw = [ler_slide_html(slide) for slide in carrossel.xpath(XPATH_SLIDES)]
+        if not slides_raw: return None
+        print(f"      ✔️ Encontrados {len(slides_raw)} slides no HTML estático.")
+        lista_versoes = montar_versoes_carrossel(modelo, slides_raw, base_url)
+    else:
+        swiper = primeiro_css_html(doc, "div.hub-tabs-swiper")
+        if swiper is None: return None
+        lista_versoes = extrair_abas_html(doc, swiper, modelo, base_url, pdfs_capturados)
+        if lista_versoes is None: return None
+    juntar_comparativo(modelo, lista_versoes, extrair_comparativo_html(doc, base_url))
+    return lista_versoes
+
+def extrair_modelo_http(modelo, site_url):
+    """Baixa a página do modelo sem navegador. None = usar o Selenium."""
+    anterior = obter_estado_anterior().get(site_url) or {}
+    cabecalhos = {}
+    if anterior.get("etag"): cabecalhos["If-None-Match"] = anterior["etag"]
+    if anterior.get("last_modified"): cabecalhos["If-Modified-Since"] = anterior["last_modified"]
+    try:
+        resposta = obter_sessao_http().get(site_url, timeout=HTTP_TIMEOUT, headers=cabecalhos)
+        if resposta.status_code == 304 and anterior.get("impressoes", {}).get("http"):
+            print("      ✔️ Servidor respondeu 304 (Not Modified).")
+            versoes_anteriores = versoes_reaproveitaveis(site_url, modelo, "http", anterior["impressoes"]["http"])
+            if versoes_anteriores is not None:
+                return versoes_anteriores
+            resposta = obter_sessao_http().get(site_url, timeout=HTTP_TIMEOUT)  # sem validadores: corpo completo
+        resposta.raise_for_status()
+        pagina_html = html_resposta(resposta)
+        impressao = impressao_html(lxml_html.fromstring(pagina_html))
+        versoes_anteriores = versoes_reaproveitaveis(site_url, modelo, "http", impressao)
+        if versoes_anteriores is not None:
+            return versoes_anteriores
+        lista_versoes = extrair_versoes_html(modelo, pagina_html, resposta.url)
+    except Exception as e_http:
+        print(f"      ⚠️ Falha no motor HTTP ({e_http}). Usando o Selenium...")
+        return None
+    if lista_versoes is None:
+        print("      ⚠️ HTML estático sem versões. Usando o Selenium...")
+    else:
+        print(f"      ✔️ {len(lista_versoes)} versões extraídas do HTML estático (sem navegador).")
+        registrar_estado(site_url, lista_versoes, "http", impressao, resposta.headers.get("ETag"), resposta.headers.get("Last-Modified"))
+        if MODO_DOM == "gravar":
+            gravar_snapshot_modelo(site_url, resposta.url, pagina_html, lista_versoes)
+    return lista_versoes
+# --- FIM DO MOTOR HTTP ---
+
+
+def extrair_modelo(driver, modelo, site_url, levantar=False):
+    """Devolve a lista de versões do modelo: HTML estático primeiro, Selenium como fallback.
+
+    driver pode ser um WebDriver ou um NavegadorSobDemanda (o Chrome só abre se o fallback precisar).
+    Com levantar=True, uma falha geral vira exceção em vez de lista vazia (para as retentativas).
+    """
+    print(f"\n➡️ Processando modelo: {modelo}"); print(f"      URL: {site_url}")
+    modelo_local.puladas = []
+    with rastreamento.etapa("modelo", modelo=modelo, categoria="modelo", url=site_url):
+        if MODO_DOM == "reproduzir":
+            return reproduzir_modelo(modelo, site_url)
+        if SUPABASE_REFRESH_POR_MODELO:
+            atualizar_versoes_existentes(modelo)
+            rastreamento.fim_etapa("supabase_refresh")
+        if MOTOR_HTTP:
+            marca = len(versoes_puladas())
+            with rastreamento.etapa("motor_http"):
+                versoes = extrair_modelo_http(modelo, site_url)
+            if versoes is not None:
+                return versoes
+            desfazer_puladas(marca)  # o Selenium confere as mesmas versões de novo
+            rastreamento.contar("fallback_selenium")
+        if isinstance(driver, NavegadorSobDemanda):
             try:
-                modelo_menu = link.get_attribute('textContent').strip()
-                url = link.get_attribute("href")
-                if not url: print(f"      ⚠️ Link com texto '{modelo_menu}' tem URL vazia. Pulando."); continue
-                if "veiculos-passeio" in url or "veiculos-utilitarios" in url:
-                    if modelo_menu: 
-                        result[modelo_menu] = {"tipo_modelo": tipo, "site_url": url}
-                        print(f"      ✔️ Modelo encontrado: {modelo_menu} ({tipo})")
-                    else: print(f"      ⚠️ Modelo com nome vazio ignorado (textContent). URL: {url}")
-                else:
-                    if modelo_menu: print(f"      Ignorando link não-veículo: {modelo_menu} ({url})")
-                    else: print(f"      Ignorando link não-veículo sem nome. URL: {url}")
-            except StaleElementReferenceException: print("      ⚠️ Stale Element ao processar um link. Tentando continuar..."); continue
-            except Exception as e_link: print(f"      ❌ Erro ao processar um link individual: {e_link}")
-    except StaleElementReferenceException: print("      ⚠️ Stale Element ao processar uma categoria. Tentando continuar..."); continue
-    except Exception as e: print(f"Erro geral ao processar categoria de menu: {e}")
-
-# === 4️⃣ NAVEGAR EM CADA MODELO E EXTRAIR DADOS ===
-print("\n--- INICIANDO EXTRAÇÃO DE VERSÕES (MÉTODO LÓGICA DUPLA) ---")
-
-modelos_para_processar = list(result.keys())
-if not modelos_para_processar: print("      ❌ ERRO: Nenhum modelo foi encontrado no Passo 3. Verifique o menu e os seletores.")
-
-for modelo in modelos_para_processar:
-    site_url = result[modelo]["site_url"]; print(f"\n➡️ Processando modelo: {modelo}"); print(f"      URL: {site_url}")
+                driver = driver.obter()
+            except Exception as e:
+                print(f"      ❌ ERRO: Não foi possível iniciar o Chrome: {e}")
+                if levantar: raise
+                return []
+        return extrair_modelo_selenium(driver, modelo, site_url, levantar)
+
+
+def extrair_modelo_selenium(driver, modelo, site_url, levantar=False):
+    """Visita a página de um modelo no navegador e devolve a lista de versões extraídas."""
+    carregar_selenium()
+    wait = WebDriverWait(driver, 30)
+    wait_short = WebDriverWait(driver, 10)
     lista_versoes = []
-    
-    nomes_vistos = set() 
+    abas_html = {}
+    pdfs_capturados = {}
     
     try:
         driver.get(site_url)
-        titulo_versoes = None
-        for _ in range(10):
-            try:
-                titulo_versoes = driver.find_element(By.XPATH, "//*[contains(translate(., 'VERSÕES', 'versões'), 'versão') and (self::h1 or self::h2 or self::h3 or contains(@class, 'font-h1') or contains(@class, 'font-h2') or contains(@class, 'font-h3'))]")
-                if titulo_versoes: print("      ✔️ Título 'Versão(ões)' encontrado."); driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", titulo_versoes); time.sleep(1.5); break
-            except NoSuchElementException: print("      ... Rolando para encontrar a seção 'versão(ões)' ..."); driver.execute_script("window.scrollBy(0, window.innerHeight * 0.8);"); time.sleep(1)
-        if not titulo_versoes: print("      ⚠️  Não foi possível encontrar o título 'versão(ões)' após rolar a página. Tentando achar o componente mesmo assim.")
+        rastreamento.fim_etapa("carregar_pagina")
+        hidratacao = hidratar_pagina(driver)
+        rastreamento.fim_etapa("hidratacao", passos=hidratacao.get("passos", 0), completa=bool(hidratacao.get("completo")))
+        # Sem o resultado da hidratação (script falhou), uma consulta direta
+        titulo_versoes = hidratacao.get("titulo") if hidratacao.get("ms") is not None else next(iter(driver.find_elements(By.XPATH, XPATH_TITULO_VERSOES)), None)
+        if titulo_versoes: print("      ✔️ Título 'Versão(ões)' encontrado."); driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", titulo_versoes); aguardar(driver, "titulo_versoes")
+        else: print("      ⚠️  Não foi possível encontrar o título 'versão(ões)' após hidratar a página. Tentando achar o componente mesmo assim.")
+        registrar_custo_pagina(driver, modelo, hidratacao["hidratacao_s"])
+        impressao = None
+        try:
+            impressao = impressao_dom(driver)
+            versoes_anteriores = versoes_reaproveitaveis(site_url, modelo, "selenium", impressao)
+            if versoes_anteriores is not None:
+                return versoes_anteriores
+        except Exception as e_impressao:
+            print(f"      ⚠️ Erro ao calcular a impressão digital da página: {e_impressao}")
+        rastreamento.fim_etapa("impressao_digital")
         try:
             carousel_element = driver.find_element(By.CSS_SELECTOR, "div.next-gen-carousel"); print("      ✔️ Encontrado 'next-gen-carousel'.")
             
-            slides = carousel_element.find_elements(By.XPATH, ".//div[@data-testid='slide'] | .//div[@data-testid='next-gen-container-component' and @help-text='versão']")
-            print(f"      ✔️ Encontrados {len(slides)} slides (buscando por data-testid='slide' ou help-text='versão'). Extraindo dados de cada um...")
+            comandos_antes = getattr(driver, "comandos_webdriver", 0)
+            if EXTRACAO_JS:
+                # Um único execute_script devolve todos os slides como JSON puro
+                dados_carrossel = extrair_slides_js(driver, carousel_element) or {}
+                base_url = dados_carrossel.get("url") or site_url
+                slides_raw = dados_carrossel.get("slides") or []
+                print(f"      ✔️ Encontrados {len(slides_raw)} slides (extração em lote via JavaScript).")
+                comandos_slides = getattr(driver, "comandos_webdriver", 0) - comandos_antes
+            else:
+                slides = carousel_element.find_elements(By.XPATH, XPATH_SLIDES)
+                print(f"      ✔️ Encontrados {len(slides)} slides (buscando por data-testid='slide' ou help-text='versão'). Extraindo dados de cada um...")
+                base_url = driver.current_url
+                comandos_lista = getattr(driver, "comandos_webdriver", 0)
+                slides_raw = [ler_slide_webdriver(driver, slide) for slide in slides]
+                comandos_slides = getattr(driver, "comandos_webdriver", 0) - comandos_lista
+            if slides_raw:
+                print(f"      🔢 Comandos WebDriver no carrossel: {getattr(driver, 'comandos_webdriver', 0) - comandos_antes} no total, {comandos_slides / len(slides_raw):.1f} por slide.")
             
-            for slide in slides:
-                try:
-                    nome = driver.execute_script("return arguments[0].querySelector('h1.font-h1, h1, h2.font-h2, h2, h3.font-h3, h3, span.font-h1, span.font-h2, span.font-h3')?.textContent.trim()", slide)
-                    
-                    if nome and nome in nomes_vistos:
-                        print(f"         - Aviso: Versão '{nome}' duplicada. Pulando.")
-                        continue 
-                    if nome:
-                        nomes_vistos.add(nome) 
-                    
-                    if supabase and nome:
-                        try:
-                            response = supabase.table('veiculos').select('id', count='exact').eq('marca', 'citroen').eq('modelo', modelo).eq('versao', nome).execute()
-                            if response.count > 0:
-                                print(f"         - Aviso: Versão '{nome}' (Modelo: {modelo}) JÁ EXISTE no Supabase. Pulando.")
-                                continue 
-                        except Exception as e_supa:
-                            print(f"         - ⚠️ ERRO ao consultar Supabase para '{nome}': {e_supa}. Continuando a coleta...")
-
-                    preco = driver.execute_script("return arguments[0].querySelector('span.font-h2, p.font-h2, div.font-h2, span.font-h3, p.font-h3, div.font-h3, h1 b')?.textContent.trim()", slide)
-                    imagem_url = driver.execute_script("return arguments[0].querySelector('img.next-gen-media, div.chameleon-image img')?.getAttribute('src')", slide)
-                    
-                    manual_url = None
-                    try:
-                        pdf_link_el = slide.find_element(By.XPATH, ".//a[contains(@href, '.pdf') and (contains(translate(., 'FICHA', 'ficha'), 'ficha'))]")
-                        pdf_href = pdf_link_el.get_attribute('href');
-                        if pdf_href and pdf_href != '#': manual_url = urljoin(driver.current_url, pdf_href); print(f"         - PDF Ficha Técnica encontrado DENTRO do slide para '{nome}'.")
-                    except NoSuchElementException: pass
-                    except Exception as e_pdf_slide: print(f"         - Erro ao procurar PDF no slide: {e_pdf_slide}")
-
-
-                    motorizacao = None
-                    motor = None
-                    pneus = None
-                    pneus_diametro = None
-                    ar_condicionado = None 
-                    turbo = None 
-                    combustivel = None 
-                    outras_caracteristicas = [] 
-
-                    try:
-                        spec_spans = slide.find_elements(By.XPATH, ".//div[contains(@class, 'image-wrapper')]/following-sibling::div[contains(@class, 'next-gen-text')]/span[contains(@class, 'font-body-sm') and @data-testid='next-gen-text-id']")
-                        
-                        for span in spec_spans:
-                            spec_text = span.get_attribute('textContent').strip()
-                            
-                            if not spec_text:
-                                continue
-                            
-                            spec_text_lower = spec_text.lower()
-                            item_classificado = False 
-
-                            if spec_text_lower.startswith("motor"):
-                                motorizacao = spec_text
-                                item_classificado = True 
-                                motor = get_motor_value(spec_text)
-                                turbo = get_turbo_value(spec_text)
-                                combustivel = get_fuel_value(spec_text)
-                            elif "rodas" in spec_text_lower or "pneu" in spec_text_lower:
-                                pneus = spec_text
-                                match = re.search(r"(\d+)[”\"]", spec_text) 
-                                if not match:
-                                    match = re.search(r"(\d+)\s*(em|de)", spec_text) 
-                                if match:
-                                    pneus_diametro = match.group(1)
-                                item_classificado = True
-                            elif spec_text_lower.startswith("ar-condicionado"):
-                                valor_ar = spec_text.lower().replace("ar-condicionado", "").strip()
-                                if "digital" in valor_ar:
-                                    ar_condicionado = "Digital"
-                                elif valor_ar: 
-                                    ar_condicionado = valor_ar.capitalize()
-                                else: 
-                                    ar_condicionado = "Sim" 
-                                item_classificado = True
-                            if not item_classificado:
-                                outras_caracteristicas.append(spec_text)
-
-                    except NoSuchElementException:
-                        pass 
-                    except Exception as e_spec:
-                        print(f"         - Erro ao processar itens de especificação (Motor, Rodas, etc.) para '{nome}': {e_spec}")
-
-                    if not manual_url and nome:
-                        try:
-                            nome_normalizado = nome.lower().strip().replace('!', '')
-                            key = (modelo, nome_normalizado)
-                            fallback_url = MANUAL_FALLBACK_MAP.get(key)
-                            if fallback_url:
-                                manual_url = fallback_url
-                                print(f"         - Info: Manual não encontrado no site. Usando URL de fallback para '{nome}'.")
-                        except Exception as e_map:
-                             print(f"         - Erro ao tentar aplicar fallback de manual: {e_map}")
-
-
-                    if nome: 
-                        print(f"         - Versão: {nome} (Preço: {preco or 'N/A'})")
-                        
-                        lista_versoes.append({
-                            "marca": "citroen",
-                            "modelo": modelo,
-                            "versao": nome, 
-                            "preco": preco or None, 
-                            "imagem_url": imagem_url or None, 
-                            "manual_url": manual_url,
-                            "motorizacao": motorizacao,
-                            "motor": motor,
-                            "turbo": turbo,
-                            "combustivel": combustivel, 
-                            "pneus": pneus,
-                            "pneus_diametro": pneus_diametro,
-                            "ar_condicionado": ar_condicionado, 
-                            "outras_caracteristicas": outras_caracteristicas 
-                        })
-                        
-                    else: 
-                        print("         - Aviso: Slide encontrado, mas sem nome. Pulando.")
-                except Exception as e_inner: 
-                    print(f"         - Erro ao processar um slide: {e_inner}")
+            lista_versoes.extend(montar_versoes_carrossel(modelo, slides_raw, base_url))
         except NoSuchElementException:
             print("      ⚠️ 'next-gen-carousel' não encontrado. Procurando por 'hub-tabs-swiper'...")
             try:
@@ -374,69 +1369,40 @@ for modelo in modelos_para_processar:
                         wait_short.until(EC.presence_of_element_located((By.CSS_SELECTOR, f"{active_content_selector} div.hub-card-component")))
                         print(f"                ✔️ Conteúdo da aba '{tab_name}' está ativo.")
                         card = active_content.find_element(By.CSS_SELECTOR, "div.hub-card-component")
+                        if MODO_DOM == "gravar": abas_html[i] = active_content.get_attribute('outerHTML')
                         nome = driver.execute_script("return arguments[0].querySelector('h2.hub-card-title')?.textContent.trim()", card)
-                        preco = None; imagem_url = driver.execute_script("return arguments[0].querySelector('div.hub-card-media img')?.getAttribute('src')", card)
+                        preco = precos.trecho_preco(driver.execute_script("return arguments[0].textContent", card)); imagem_url = driver.execute_script("return arguments[0].querySelector('div.hub-card-media img')?.getAttribute('src')", card)
                         manual_url = None
                         
-                        if supabase and nome:
-                            try:
-                                response = supabase.table('veiculos').select('id', count='exact').eq('marca', 'citroen').eq('modelo', modelo).eq('versao', nome).execute()
-                                if response.count > 0:
-                                    print(f"         - Aviso: Versão '{nome}' (Modelo: {modelo}) JÁ EXISTE no Supabase. Pulando.")
-                                    continue 
-                            except Exception as e_supa:
-                                print(f"         - ⚠️ ERRO ao consultar Supabase para '{nome}': {e_supa}. Continuando a coleta...")
+                        if versao_pulada_supabase(modelo, nome):
+                            continue 
                         
                         try:
-                            pdf_link_el = card.find_element(By.XPATH, ".//a[.//span[contains(translate(., 'FICHA', 'ficha'), 'ficha')] or (self::a and contains(translate(., 'FICHA', 'ficha'), 'ficha'))]")
+                            pdf_link_el = card.find_element(By.XPATH, XPATH_FICHA_CARD)
                             pdf_href = pdf_link_el.get_attribute('href')
                             if pdf_href and pdf_href.lower().endswith('.pdf') and pdf_href != '#':
                                 manual_url = urljoin(driver.current_url, pdf_href)
                                 print(f"                ✔️ PDF (href direto) encontrado para '{nome}'. URL: {manual_url}")
                             else:
-                                print(f"                ... Link 'Ficha Técnica' encontrado para '{nome}'. Clicando para abrir PDF em nova aba...")
-                                main_window = driver.current_window_handle
-                                all_windows_before = set(driver.window_handles) 
-                                try:
-                                    driver.execute_script("arguments[0].click();", pdf_link_el)
-                                    wait_short.until(EC.number_of_windows_to_be(len(all_windows_before) + 1))
-                                    all_windows_after = set(driver.window_handles)
-                                    new_window = list(all_windows_after - all_windows_before)[0] 
-                                    driver.switch_to.window(new_window)
-                                    time.sleep(2.5) 
-                                    pdf_tab_url = driver.current_url
-                                    if pdf_tab_url and (pdf_tab_url.lower().endswith('.pdf') or 'blob:' in pdf_tab_url.lower() or 'pdf' in pdf_tab_url.lower()):
-                                        manual_url = pdf_tab_url 
-                                        print(f"                ✔️ PDF (nova aba) capturado para '{nome}'. URL: {manual_url}")
-                                    else:
-                                        print(f"                ⚠️  Nova aba aberta, mas URL não parece PDF: {pdf_tab_url}")
-                                    driver.close() 
-                                    driver.switch_to.window(main_window) 
-                                except TimeoutException:
-                                    print(f"                ❌ Erro: Clicou em 'Ficha Técnica', mas nova aba não abriu a tempo.")
-                                    if driver.current_window_handle != main_window:
-                                        try: driver.switch_to.window(main_window)
-                                        except Exception: pass 
-                                except Exception as e_click:
-                                    print(f"                ❌ Erro ao clicar e processar nova aba do PDF: {e_click}")
-                                    if driver.current_window_handle != main_window:
-                                        try: driver.switch_to.window(main_window)
-                                        except Exception: pass
+                                pdf_capturado = None
+                                if CAPTURA_PDF != "aba":
+                                    print(f"                ... Link 'Ficha Técnica' encontrado para '{nome}'. Capturando o destino do clique (sem nova aba)...")
+                                    pdf_capturado = capturar_pdf_sem_aba(driver, pdf_link_el)
+                                if not pdf_capturado:
+                                    if CAPTURA_PDF != "aba": rastreamento.contar("retentativas")
+                                    print(f"                ... Clicando na 'Ficha Técnica' de '{nome}' para abrir PDF em nova aba...")
+                                    pdf_capturado = capturar_pdf_nova_aba(driver, pdf_link_el, wait_short)
+                                if pdf_capturado:
+                                    manual_url = pdf_capturado
+                                    pdfs_capturados[i] = pdf_capturado
+                                    print(f"                ✔️ PDF capturado para '{nome}'. URL: {manual_url}")
                         except NoSuchElementException: 
                             print(f"                - Aviso: Link 'Ficha técnica' não encontrado no card para '{nome}'.")
                         except Exception as e_pdf_card: 
                             print(f"                - Erro ao procurar PDF no card: {e_pdf_card}")
                         
                         if not manual_url and nome:
-                            try:
-                                nome_normalizado = nome.lower().strip().replace('!', '')
-                                key = (modelo, nome_normalizado)
-                                fallback_url = MANUAL_FALLBACK_MAP.get(key)
-                                if fallback_url:
-                                    manual_url = fallback_url
-                                    print(f"         - Info: Manual não encontrado no site. Usando URL de fallback para '{nome}'.")
-                            except Exception as e_map:
-                                print(f"         - Erro ao tentar aplicar fallback de manual: {e_map}")
+                            manual_url = manual_fallback(modelo, nome)
 
                         if nome: 
                             lista_versoes.append({
@@ -457,285 +1423,798 @@ for modelo in modelos_para_processar:
                             })
                         else: 
                             print("                - Aviso: Card ativo, mas sem nome.")
-                        time.sleep(0.5)
+                        aguardar(driver, "aba_jumpy")
                     except (TimeoutException, NoSuchElementException, StaleElementReferenceException) as e_tab_content: print(f"         - Erro ao esperar/processar conteúdo da aba '{tab_name}': {type(e_tab_content).__name__}")
                     except Exception as e_inner_card: print(f"         - Erro geral ao processar aba/card '{tab_name}': {e_inner_card}")
             except NoSuchElementException: print(f"      ❌ Não foi possível encontrar 'hub-tabs-swiper'. Pulando modelo {modelo}.")
+        rastreamento.fim_etapa("extracao_versoes", versoes=len(lista_versoes))
         comparativo_data = []
         try:
             print("      ... Procurando por botão de Comparativo ...")
-            comparativo_button = None; possible_button_texts = ['COMPARATIVO ENTRE AS VERSÕES', 'Clique e compare as versões']
-            button_xpath = " | ".join([f"//button[contains(., '{text}')]" for text in possible_button_texts])
-            for _ in range(5):
-                try:
-                    comparativo_button = driver.find_element(By.XPATH, button_xpath)
-                    if comparativo_button:
-                        button_text_found = comparativo_button.text.strip(); print(f"      ✔️ Botão '{button_text_found}' encontrado.")
-                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", comparativo_button); time.sleep(0.5)
-                        driver.execute_script("arguments[0].click();", comparativo_button); break
-                except NoSuchElementException: driver.execute_script("window.scrollBy(0, window.innerHeight * 0.5);"); time.sleep(0.5)
-            if not comparativo_button: print("      ⚠️  Botão de Comparativo não encontrado nesta página."); raise NoSuchElementException
-            content_xpath = " | ".join([f"//button[contains(., '{text}')]/following-sibling::div[contains(@class, 'collapse-content')]" for text in possible_button_texts])
-            content_area = wait.until(EC.visibility_of_element_located((By.XPATH, content_xpath))); print("      ✔️ Conteúdo do comparativo expandido.")
+            # A hidratação já trouxe o botão; as abas/ficha podem ter trocado o DOM, então confere
+            comparativo_button = hidratacao.get("botao")
             try:
-                table = content_area.find_element(By.TAG_NAME, "table"); print("      ✔️ Encontrado layout de Tabela no comparativo.")
-                rows = table.find_elements(By.TAG_NAME, "tr")
-                if not rows: raise NoSuchElementException("Tabela vazia")
-                header_cells = rows[0].find_elements(By.XPATH, "./td | ./th"); version_names_table = [cell.text.strip() for cell in header_cells[1:]]; num_versions = len(version_names_table)
-                if num_versions == 0: raise NoSuchElementException("Nenhuma versão no header da tabela")
-                print(f"      ✔️ Encontradas {num_versions} versões na Tabela: {version_names_table}"); temp_comparativo_data = {name: {"versao_comparativo": name} for name in version_names_table}
-                for data_row in rows[1:]:
-                    cells = data_row.find_elements(By.TAG_NAME, "td");
-                    if len(cells) < num_versions + 1: continue
-                    spec_label = cells[0].text.strip().lower().replace('\n', ' '); spec_values = [cell.text.strip() for cell in cells[1:]]
-                    for i in range(num_versions):
-                        version_name = version_names_table[i]; spec_value = spec_values[i] if i < len(spec_values) else None
-                        if not spec_value: continue
-                        if "carga útil" in spec_label or "capacidade/carga" in spec_label: temp_comparativo_data[version_name]["carga_util"] = spec_value
-                        
-                        elif "motor" == spec_label or "motorização e câmbio" in spec_label:
-                            temp_comparativo_data[version_name]["motorizacao"] = spec_value
-                            temp_comparativo_data[version_name]["motor"] = get_motor_value(spec_value)
-                            temp_comparativo_data[version_name]["turbo"] = get_turbo_value(spec_value)
-                            temp_comparativo_data[version_name]["combustivel"] = get_fuel_value(spec_value)
-                        
-                        else: safe_label = spec_label.replace(' ', '_').replace('ç', 'c').replace('ã', 'a').replace('ê', 'e').replace('õ', 'o').replace('/','_'); temp_comparativo_data[version_name][safe_label] = spec_value
-                comparativo_data = list(temp_comparativo_data.values())
-                for v_data in comparativo_data: print(f"           - Comparativo (Tabela): {v_data.get('versao_comparativo')} (dados extraídos)")
-
-                try:
-                    print("         - Procurando PDFs no comparativo (Tabela)...")
-                    last_row_cells = rows[-1].find_elements(By.TAG_NAME, "td")
-                    if len(last_row_cells) == num_versions + 1: 
-                        pdf_link_cells = last_row_cells[1:] 
-                        for i in range(len(pdf_link_cells)):
-                            version_name = version_names_table[i]
-                            try:
-                                pdf_link_el = pdf_link_cells[i].find_element(By.XPATH, ".//a[contains(translate(., 'FICHA', 'ficha'), 'ficha')]")
-                                pdf_href = pdf_link_el.get_attribute('href')
-                                if pdf_href and pdf_href != '#':
-                                    pdf_url = urljoin(driver.current_url, pdf_href)
-                                    temp_comparativo_data[version_name]["manual_url"] = pdf_url
-                                    print(f"         - PDF (Tabela) encontrado para '{version_name}'.")
-                            except NoSuchElementException:
-                                print(f"         - PDF (Tabela) não encontrado para '{version_name}'.")
-                    else:
-                        print(f"         - Aviso (Tabela): Células da última linha ({len(last_row_cells)}) não batem com versões ({num_versions + 1}).")
-                except Exception as e_pdf_table:
-                    print(f"         - Erro ao buscar PDF no rodapé da tabela: {e_pdf_table}")
-
-            except NoSuchElementException:
-                print("      ⚠️ Layout de Tabela não encontrado. Procurando por layouts de Grid...")
-                try:
-                    grids_in_content = content_area.find_elements(By.CSS_SELECTOR, "div.next-gen-grid-container-vue"); num_grids = len(grids_in_content)
-                    print(f"      ✔️ Encontrados {num_grids} grids dentro do comparativo.")
-                    if num_grids == 1:
-                        print("      ✔️ Detectado layout de Grid Único (Padrão Jumpy).")
-                        grid = grids_in_content[0]; version_names_elements = grid.find_elements(By.CSS_SELECTOR, "h2.font-h2")
-                        spec_columns = grid.find_elements(By.XPATH, "./div[.//span[contains(., 'Carga útil') or contains(., 'Motor')]]")
-                        print(f"      ✔️ Encontradas {len(version_names_elements)} versões e {len(spec_columns)} colunas de dados (Grid Único).")
-                        if len(version_names_elements) == len(spec_columns) and len(spec_columns) > 0:
-                            for i in range(len(version_names_elements)):
-                                name_el = version_names_elements[i]; col_el = spec_columns[i]; version_name = name_el.text.strip(); version_specs = {"versao_comparativo": version_name}
-                                labels = col_el.find_elements(By.CSS_SELECTOR, "span.font-body-sm"); values = col_el.find_elements(By.CSS_SELECTOR, "p.font-body")
-                                for label, value in zip(labels, values):
-                                    spec_label = label.text.strip().lower().replace('\n', ' '); spec_value = value.text.strip()
-                                    if "carga útil" in spec_label: version_specs["carga_util"] = spec_value
-                                    
-                                    elif "motor" == spec_label:
-                                        version_specs["motorizacao"] = spec_value
-                                        version_specs["motor"] = get_motor_value(spec_value)
-                                        version_specs["turbo"] = get_turbo_value(spec_value)
-                                        version_specs["combustivel"] = get_fuel_value(spec_value)
-                                    
-                                    else: safe_label = spec_label.replace(' ', '_').replace('ç', 'c').replace('ã', 'a').replace('ê', 'e').replace('õ', 'o'); version_specs[safe_label] = spec_value
-                                print(f"           - Comparativo (Grid Único): {version_name} (dados extraídos)"); comparativo_data.append(version_specs)
-                            
-                            try:
-                                print("         - Procurando PDFs no comparativo (Grid Único)...")
-                                pdf_links_elements_grid = grid.find_elements(By.XPATH, ".//a[contains(translate(., 'FICHA', 'ficha'), 'ficha')]")
-                                pdf_links_hrefs_grid = [urljoin(driver.current_url, el.get_attribute('href')) for el in pdf_links_elements_grid if el.get_attribute('href') and el.get_attribute('href') != '#']
-                                
-                                if len(pdf_links_hrefs_grid) == len(version_names_elements):
-                                    for i in range(len(version_names_elements)):
-                                        version_name = comparativo_data[i]["versao_comparativo"] 
-                                        comparativo_data[i]["manual_url"] = pdf_links_hrefs_grid[i]
-                                        print(f"         - PDF (Grid Único) encontrado para '{version_name}'.")
-                                else:
-                                    print(f"         - Aviso (Grid Único): Links PDF ({len(pdf_links_hrefs_grid)}) != Versões ({len(version_names_elements)}).")
-                            except Exception as e_pdf_grid:
-                                print(f"         - Erro ao buscar PDF no Grid Único: {e_pdf_grid}")
-
-                        elif len(version_names_elements) != len(spec_columns): print(f"      ❌ Erro no comparativo (Grid Único): Nomes ({len(version_names_elements)}) e Colunas ({len(spec_columns)}) não batem.")
-                    elif num_grids > 1:
-                        print("      ✔️ Detectado layout de Múltiplos Grids (Padrão Jumper).")
-                        first_grid = grids_in_content[0]; data_grids = grids_in_content[1:-1] 
-                        button_grid = grids_in_content[-1] 
-                        version_names_elements_jumper = first_grid.find_elements(By.CSS_SELECTOR, "h2.font-h2"); version_names_jumper = [name.text.strip() for name in version_names_elements_jumper]; num_versions_jumper = len(version_names_jumper)
-                        if num_versions_jumper == 0: raise NoSuchElementException("Nenhuma versão no header (Múltiplos Grids)")
-                        print(f"      ✔️ Encontradas {num_versions_jumper} versões (Múltiplos Grids): {version_names_jumper}")
-                        temp_comparativo_data = {name: {"versao_comparativo": name} for name in version_names_jumper}
-                        print(f"      ✔️ Encontrados {len(data_grids)} grids de dados para processar.")
-                        if not data_grids: raise NoSuchElementException("Nenhum grid de dados após cabeçalho")
-                        
-                        pdf_links_elements_jumper = button_grid.find_elements(By.XPATH, ".//a[contains(translate(., 'FICHA', 'ficha'), 'ficha')]")
-                        pdf_links_hrefs_jumper = [urljoin(driver.current_url, el.get_attribute('href')) for el in pdf_links_elements_jumper if el.get_attribute('href') and el.get_attribute('href') != '#']
-
-                        for data_grid in data_grids:
-                            cells = data_grid.find_elements(By.XPATH, "./div[contains(@class, 'next-gen-container-vue')]")
-                            for i in range(0, len(cells), num_versions_jumper):
-                                row_cells = cells[i:i+num_versions_jumper]
-                                if not row_cells or len(row_cells) < num_versions_jumper : continue
-                                try: label_element = row_cells[0].find_element(By.XPATH, ".//p/strong"); spec_label = label_element.text.strip().lower().replace('\n', ' ')
-                                except NoSuchElementException: continue
-                                spec_values = []
-                                for k, cell in enumerate(row_cells):
-                                    try:
-                                        p_elements = cell.find_elements(By.TAG_NAME, "p"); cell_value_parts = []
-                                        is_label_cell = (k == 0)
-                                        for p_index, p_el in enumerate(p_elements):
-                                            is_label_p = False
-                                            if is_label_cell:
-                                                try: p_el.find_element(By.TAG_NAME, "strong"); is_label_p = True
-                                                except NoSuchElementException: pass
-                                            if not is_label_p: cell_value_parts.append(p_el.text.strip())
-                                        cell_value = " ".join(cell_value_parts).strip()
-                                        if not cell_value and len(p_elements) >= 1: cell_value = p_elements[-1].text.strip()
-                                        spec_values.append(cell_value if cell_value else None)
-                                    except Exception: spec_values.append(None)
-                                for j in range(num_versions_jumper):
-                                    version_name = version_names_jumper[j]; spec_value = spec_values[j] if j < len(spec_values) else None
-                                    if not spec_value: continue
-                                    # Mapeamento
-                                    if "carga útil" in spec_label or "capacidade/carga" in spec_label: temp_comparativo_data[version_name]["carga_util"] = spec_value
-                                    
-                                    elif "motor" == spec_label or "motorização e câmbio" in spec_label:
-                                        temp_comparativo_data[version_name]["motorizacao"] = spec_value
-                                        temp_comparativo_data[version_name]["motor"] = get_motor_value(spec_value)
-                                        temp_comparativo_data[version_name]["turbo"] = get_turbo_value(spec_value)
-                                        temp_comparativo_data[version_name]["combustivel"] = get_fuel_value(spec_value)
-                                    
-                                    else: safe_label = spec_label.replace(' ', '_').replace('ç', 'c').replace('ã', 'a').replace('ê', 'e').replace('õ', 'o').replace('/','_'); temp_comparativo_data[version_name][safe_label] = spec_value
-                        
-                        if len(pdf_links_hrefs_jumper) == num_versions_jumper:
-                            for j in range(num_versions_jumper):
-                                version_name = version_names_jumper[j]; temp_comparativo_data[version_name]["manual_url"] = pdf_links_hrefs_jumper[j]
-                                print(f"           - PDF Ficha Técnica encontrado NO COMPARATIVO para '{version_name}'.")
-                        else: print(f"           - Aviso: PDF do Jumper. Links({len(pdf_links_hrefs_jumper)}) != Versões({num_versions_jumper}).")
-                        
-                        comparativo_data = list(temp_comparativo_data.values())
-                        for v_data in comparativo_data: print(f"           - Comparativo (Múltiplos Grids): {v_data.get('versao_comparativo')} (dados extraídos)")
-                    else: raise NoSuchElementException("Nenhum grid no comparativo")
-                except NoSuchElementException: print("      ❌ Erro: Layout desconhecido ou falha na extração dentro do comparativo.")
+                if comparativo_button is not None: comparativo_button.is_enabled()
+            except StaleElementReferenceException:
+                comparativo_button = None
+            if comparativo_button is None:
+                comparativo_button = next(iter(driver.find_elements(By.XPATH, XPATH_BOTAO_COMPARATIVO)), None)
+            if comparativo_button:
+                button_text_found = comparativo_button.text.strip(); print(f"      ✔️ Botão '{button_text_found}' encontrado.")
+                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", comparativo_button); aguardar(driver, "botao_comparativo")
+                driver.execute_script("arguments[0].click();", comparativo_button)
+            else: print("      ⚠️  Botão de Comparativo não encontrado nesta página."); raise NoSuchElementException
+            content_area = wait.until(EC.visibility_of_element_located((By.XPATH, XPATH_CONTEUDO_COMPARATIVO))); print("      ✔️ Conteúdo do comparativo expandido.")
+            # Uma única chamada serializa o layout presente (Tabela, Grid Único ou Múltiplos Grids)
+            comandos_antes = getattr(driver, "comandos_webdriver", 0)
+            matriz = driver.execute_script(JS_MATRIZ_COMPARATIVO, content_area, XPATHS_MATRIZ)
+            comparativo_data = parsear_matriz_comparativo(matriz, site_url)
+            if comparativo_data:
+                print(f"      ✔️ Comparativo ({matriz['layout']}): {len(comparativo_data)} versões, {len(matriz.get('linhas') or [])} linhas, PDFs {'encontrados' if matriz.get('pdfs') else 'não encontrados'} ({getattr(driver, 'comandos_webdriver', 0) - comandos_antes} comando(s) WebDriver).")
+            else: print("      ❌ Erro: Layout desconhecido ou falha na extração dentro do comparativo.")
         except (NoSuchElementException, TimeoutException): print("      ⚠️  Nenhum componente de Comparativo encontrado ou falha ao expandir.")
         except Exception as e_comp: print(f"      ❌ Erro inesperado ao processar o processar o comparativo: {e_comp}")
 
+        rastreamento.fim_etapa("comparativo", linhas=len(comparativo_data))
+
         # === 4c. LÓGICA MERGE ===
-        if comparativo_data:
-            print("      ... Juntando dados do comparativo com os dados das versões...")
-            for spec_dict in comparativo_data:
-                spec_name = spec_dict.get("versao_comparativo")
-                if not spec_name: continue
-                found_match = False
-                for versao_dict in lista_versoes:
-                    versao_name = versao_dict.get("versao")
-                    if not versao_name: continue
-                    
-                    if versao_name.upper().replace('Ë', 'E').replace('-', '').replace('.', '').replace('​', '').strip() == spec_name.upper().replace('Ë', 'E').replace('-', '').replace('.', '').replace('​', '').strip():
-                        
-                        comparator_pdf = spec_dict.get('manual_url')
-                        card_pdf = versao_dict.get('manual_url')
+        juntar_comparativo(modelo, lista_versoes, comparativo_data)
+        rastreamento.fim_etapa("merge")
+        registrar_estado(site_url, lista_versoes, "selenium", impressao)
+        if MODO_DOM == "gravar":
+            gravar_snapshot_modelo(site_url, driver.current_url, driver.page_source, lista_versoes, abas_html, pdfs_capturados)
+        rastreamento.fim_etapa("estado")
 
-                        if comparator_pdf:
-                            if card_pdf and card_pdf != comparator_pdf:
-                                print(f"         - PDF do Comparativo ({spec_name}) encontrado. Sobrescrevendo PDF do Card.")
-                            pass 
-                        
-                        elif card_pdf:
-                            print(f"         - Mantendo PDF do Card '{versao_name}' (Comparativo não tinha PDF).")
-                            spec_dict.pop('manual_url', None)
-                        
-                        # (Lógica de fallback de manual PÓS-merge)
-                        if not versao_dict.get('manual_url') and not spec_dict.get('manual_url'):
-                            try:
-                                nome_normalizado = versao_name.lower().strip().replace('!', '')
-                                key = (modelo, nome_normalizado)
-                                fallback_url = MANUAL_FALLBACK_MAP.get(key)
-                                if fallback_url:
-                                    spec_dict['manual_url'] = fallback_url
-                                    print(f"         - Info: Manual não encontrado no site. Usando URL de fallback para '{versao_name}'.")
-                            except Exception as e_map:
-                                print(f"         - Erro ao tentar aplicar fallback de manual no merge: {e_map}")
-
-                        versao_dict.update(spec_dict) # Merge
-                        versao_dict.pop("versao_comparativo", None)
-                        found_match = True; break
-
-                if found_match: print(f"           - Dados de '{spec_name}' juntados.")
-                else: print(f"           - Aviso: '{spec_name}' do comparativo não encontrou par na lista de versões.")
-
-        result[modelo]["versoes"] = lista_versoes
+        return lista_versoes
 
     except Exception as e_outer:
         print(f"      ❌ ERRO GERAL ao processar o modelo {modelo} na URL {site_url}: {e_outer}")
-        if "versoes" not in result[modelo]:
-             result[modelo]["versoes"] = []
+        if levantar: raise
+        return []
+
+
+# --- PRAZO POR MODELO (WATCHDOG, RETENTATIVAS E HEDGE) ---
+# Cada tentativa de um modelo roda numa thread própria, vigiada pela thread do worker. Estourado
+# o prazo (CRAWLER_PRAZO_MODELO segundos), o watchdog derruba o Chrome da tentativa e qualquer
+# wait.until ou rolagem em andamento falha na hora. Um modelo que deu erro, estourou o prazo ou
+# voltou sem versões é tentado de novo num navegador novo (página carregada do zero), até
+# CRAWLER_TENTATIVAS_MODELO vezes. Com CRAWLER_HEDGE=1, uma tentativa que passa do p95 das
+# durações do modelo nas execuções anteriores (citroen_duracoes.json) ganha uma segunda em
+# paralelo, e vence a primeira que terminar. Pior caso por modelo: TENTATIVAS x PRAZO.
+PRAZO_MODELO = float(os.environ.get("CRAWLER_PRAZO_MODELO", "240"))  # 0 desliga o watchdog
+TENTATIVAS_MODELO = max(1, int(os.environ.get("CRAWLER_TENTATIVAS_MODELO", "2")))
+HEDGE = os.environ.get("CRAWLER_HEDGE", "0") == "1"
+HEDGE_AMOSTRAS = max(1, int(os.environ.get("CRAWLER_HEDGE_AMOSTRAS", "5")))  # execuções anteriores para confiar no p95
+ARQUIVO_DURACOES = os.environ.get("CRAWLER_ARQUIVO_DURACOES", "citroen_duracoes.json")
+DURACOES_GUARDADAS = 30
+
+duracoes_anteriores = None
+duracoes_atuais = {}
+desfechos_modelos = {}
+duracoes_lock = threading.Lock()
+
+def obter_duracoes_anteriores():
+    """{modelo: [durações em s]} das execuções anteriores, lido do disco na primeira chamada."""
+    global duracoes_anteriores
+    with duracoes_lock:
+        if duracoes_anteriores is None:
+            try:
+                with open(ARQUIVO_DURACOES, encoding='utf-8') as f:
+                    duracoes_anteriores = json.load(f)
+            except (OSError, ValueError):
+                duracoes_anteriores = {}
+        return duracoes_anteriores
+
+def p95_modelo(modelo):
+    """p95 das durações do modelo nas execuções anteriores (None com menos de HEDGE_AMOSTRAS)."""
+    amostras = sorted(obter_duracoes_anteriores().get(modelo) or [])
+    if len(amostras) < HEDGE_AMOSTRAS: return None
+    return amostras[-(-95 * len(amostras) // 100) - 1]
+
+def salvar_duracoes():
+    """Acrescenta as durações desta execução ao histórico (as últimas DURACOES_GUARDADAS por modelo)."""
+    if not duracoes_atuais: return
+    try:
+        duracoes = {modelo: list(amostras) for modelo, amostras in obter_duracoes_anteriores().items()}
+        with duracoes_lock:
+            for modelo, duracao in duracoes_atuais.items():
+                duracoes[modelo] = (duracoes.get(modelo, []) + [round(duracao, 3)])[-DURACOES_GUARDADAS:]
+        with open(ARQUIVO_DURACOES + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(duracoes, f, indent=2, ensure_ascii=False)
+        os.replace(ARQUIVO_DURACOES + ".tmp", ARQUIVO_DURACOES)
+    except Exception as e:
+        print(f"❌ Erro ao salvar o histórico de durações: {e}")
+
+def reiniciar_execucao():
+    """Começa uma execução nova no mesmo processo (modo serviço): data, relógio, estado incremental,
+    versões já gravadas, durações, desfechos, telemetria e rastreamento voltam ao início."""
+    global DATA_EXECUCAO, INICIO_EXECUCAO, estado_anterior, estado_atual, telemetria_esperas, telemetria_paginas
+    global versoes_existentes, versoes_existentes_iniciado, duracoes_anteriores, duracoes_atuais, desfechos_modelos
+    DATA_EXECUCAO = datetime.date.today().isoformat()
+    INICIO_EXECUCAO = time.perf_counter()
+    with estado_lock:
+        estado_anterior, estado_atual = None, {}
+    with versoes_existentes_lock:
+        versoes_existentes, versoes_existentes_iniciado = None, False
+    with duracoes_lock:
+        duracoes_anteriores, duracoes_atuais, desfechos_modelos = None, {}, {}
+    with telemetria_lock:
+        telemetria_esperas, telemetria_paginas = {}, {}
+    rastreamento.reiniciar()
+
 
-# === 5️⃣ FECHAR O NAVEGADOR ===
-driver.quit()
+class TentativaModelo:
+    """Uma tentativa de extrair um modelo, numa thread e num navegador próprios."""
 
+    def __init__(self, numero, navegador, modelo, site_url, terminou_alguma, hedge=False):
+        self.numero = numero
+        self.navegador = navegador
+        self.modelo = modelo
+        self.site_url = site_url
+        self.hedge = hedge
+        self.terminou_alguma = terminou_alguma  # Event compartilhado pelas tentativas do modelo
+        self.versoes, self.erro, self.puladas = None, None, 0
+        self.efeitos = []  # (funcao, args) de registrar_estado/gravar_snapshot_modelo, aplicados se ela vencer
+        self.cancelada = None  # motivo, quando o watchdog derruba a tentativa
+        self.terminou = False
+        self.inicio = self.duracao = None
+        self.thread = threading.Thread(target=self._rodar, daemon=True,
+                                       name=f"{threading.current_thread().name}/{modelo}#{numero}")
 
-# --- INÍCIO DA ALTERAÇÃO (PASSO 5 E 6) ---
+    def iniciar(self):
+        self.inicio = time.perf_counter()
+        self.thread.start()
+        return self
 
-# === 5️⃣ FORMATAR E ORDENAR A SAÍDA ===
-print("\n--- INICIANDO FORMATAÇÃO E ORDENAÇÃO (PASSO 5) ---")
-final_version_list = []
+    def _rodar(self):
+        modelo_local.tentativa = self
+        try:
+            self.versoes = extrair_modelo(self.navegador, self.modelo, self.site_url, levantar=True)
+        except Exception as e:
+            self.erro = e
+        # Versões puladas por já existirem no Supabase não fazem da lista vazia uma falha
+        self.puladas = rastreamento.contadores_thread().get("versoes_puladas", 0)
+        self.duracao = time.perf_counter() - self.inicio
+        self.terminou = True
+        self.terminou_alguma.set()
+
+    def desfecho(self):
+        if self.cancelada: return self.cancelada
+        if self.erro is not None: return "erro"
+        return "ok" if self.versoes or self.puladas else "vazio"
+
+    def cancelar(self, motivo):
+        if self.terminou: return
+        self.cancelada = motivo
+        self.navegador.cancelar()
+
+    def aplicar_efeitos(self):
+        """Grava o estado incremental e o snapshot da tentativa aceita (na thread de quem aceitou)."""
+        for funcao, args in self.efeitos:
+            funcao(*args)
+
+
+def extrair_modelo_com_prazo(navegador, modelo, site_url):
+    """extrair_modelo com prazo, retentativas e hedge. Devolve (versoes, navegador para o próximo modelo).
+
+    O navegador devolvido pode não ser o recebido: o de uma tentativa derrubada não serve mais.
+    Só a tentativa que travou no prazo ou perdeu o hedge é derrubada; a que terminou "vazio" ou
+    "erro" deixa o Chrome para a próxima tentativa.
+    """
+    if MODO_DOM == "reproduzir":
+        return extrair_modelo(navegador, modelo, site_url), navegador
+    inicio = time.perf_counter()
+    p95 = p95_modelo(modelo) if HEDGE else None
+    terminou_alguma = threading.Event()
+    lancadas, vencedora, desfecho = [], None, "erro"
+    for rodada in range(1, TENTATIVAS_MODELO + 1):
+        if rodada > 1:
+            novo = navegador.cancelado
+            if novo: navegador = NavegadorSobDemanda()
+            print(f"      🔁 {modelo}: tentativa {rodada}/{TENTATIVAS_MODELO} após '{desfecho}', {'num navegador novo' if novo else 'no mesmo navegador'}.")
+        ativas = [TentativaModelo(len(lancadas) + 1, navegador, modelo, site_url, terminou_alguma).iniciar()]
+        lancadas += ativas
+        comeco = time.perf_counter()
+        prazo = comeco + PRAZO_MODELO if PRAZO_MODELO > 0 else None
+        hedge_em = comeco + p95 if p95 is not None and not any(t.hedge for t in lancadas) else None
+        while ativas:
+            terminou_alguma.clear()
+            for tentativa in [t for t in ativas if t.terminou]:
+                ativas.remove(tentativa)
+                desfecho = tentativa.desfecho()
+                if desfecho == "ok" and vencedora is None: vencedora = tentativa
+            if vencedora or not ativas: break
+            agora = time.perf_counter()
+            if prazo is not None and agora >= prazo:
+                print(f"      ⏱️ {modelo}: prazo de {PRAZO_MODELO:.0f}s esgotado. Derrubando o navegador da tentativa.")
+                for tentativa in ativas: tentativa.cancelar("prazo_esgotado")
+                desfecho, ativas = "prazo_esgotado", []
+                break
+            if hedge_em is not None and agora >= hedge_em:
+                print(f"      🐇 {modelo}: passou do p95 das execuções anteriores ({p95:.1f}s). Segunda tentativa em paralelo.")
+                hedge = TentativaModelo(len(lancadas) + 1, NavegadorSobDemanda(), modelo, site_url, terminou_alguma, hedge=True).iniciar()
+                ativas.append(hedge); lancadas.append(hedge)
+                hedge_em = None
+            limites = [limite for limite in (prazo, hedge_em) if limite is not None]
+            terminou_alguma.wait(max(0.0, min(limites) - time.perf_counter()) if limites else None)
+        # A tentativa que ainda roda (perdeu a corrida) é derrubada. As que terminaram sem versões
+        # só fecham o Chrome se ele não for o que segue adiante (o do hedge, ou o da vencedora)
+        fica = vencedora.navegador if vencedora else navegador
+        for tentativa in lancadas:
+            if tentativa is vencedora or tentativa.navegador.cancelado: continue
+            if not tentativa.terminou: tentativa.cancelar("descartada")
+            if tentativa.terminou and not tentativa.navegador.cancelado and tentativa.navegador is not fica:
+                try:
+                    tentativa.navegador.fechar()
+                except Exception:
+                    pass
+        if vencedora: break
+
+    tempo_total = time.perf_counter() - inicio
+    if vencedora:
+        desfecho = "ok" if len(lancadas) == 1 else "ok_hedge" if vencedora.hedge else "ok_retentativa"
+        navegador = vencedora.navegador
+        vencedora.aplicar_efeitos()
+        with duracoes_lock:
+            duracoes_atuais[modelo] = vencedora.duracao
+    elif navegador.cancelado:
+        navegador = NavegadorSobDemanda()
+        print(f"      ❌ {modelo}: sem versões depois de {len(lancadas)} tentativa(s) ({desfecho}).")
+    resultado = {"desfecho": desfecho, "tentativas": len(lancadas), "hedge": any(t.hedge for t in lancadas), "tempo_total_s": round(tempo_total, 3)}
+    with duracoes_lock:
+        desfechos_modelos[modelo] = resultado
+    rastreamento.anotar_modelo(modelo, **resultado)
+    return (vencedora.versoes if vencedora else []), navegador
+
+def relatorio_desfechos(modelos=None):
+    """Resumo dos desfechos por modelo e do pior caso garantido pelo prazo."""
+    with duracoes_lock:
+        resultados = {modelo: dados for modelo, dados in desfechos_modelos.items() if modelos is None or modelo in modelos}
+    if not resultados: return
+    contagem = {}
+    for dados in resultados.values():
+        contagem[dados["desfecho"]] = contagem.get(dados["desfecho"], 0) + 1
+    pior_caso = f"{TENTATIVAS_MODELO * PRAZO_MODELO:.0f}s por modelo" if PRAZO_MODELO > 0 else "sem prazo"
+    print(f"⏱️ Desfechos: {', '.join(f'{n} {desfecho}' for desfecho, n in sorted(contagem.items()))} | "
+          f"{sum(dados['tentativas'] for dados in resultados.values())} tentativas, "
+          f"{sum(dados['hedge'] for dados in resultados.values())} hedge(s) | pior caso: {pior_caso}.")
+    for modelo, dados in resultados.items():
+        if dados["desfecho"] != "ok":
+            print(f"      - {modelo}: {dados['desfecho']} em {dados['tentativas']} tentativa(s), {dados['tempo_total_s']:.1f}s.")
+# --- FIM DO PRAZO POR MODELO ---
+
+
+# --- SAÍDA EM STREAMING (JSONL + CHECKPOINT) ---
+# Cada modelo concluído vira linhas JSONL já ordenadas, gravadas na hora; o checkpoint guarda
+# a URL do modelo e o tamanho do JSONL logo após as suas linhas. Com --resume os modelos do
+# checkpoint são pulados e o JSONL é truncado no último modelo confirmado (descarta linhas
+# de um modelo interrompido no meio).
+ARQUIVO_JSONL = os.environ.get("CRAWLER_ARQUIVO_JSONL", "citroen_data.jsonl")
+ARQUIVO_CHECKPOINT = os.environ.get("CRAWLER_ARQUIVO_CHECKPOINT", "citroen_checkpoint.jsonl")
+ARQUIVO_SAIDA = "citroen_data.json"
+# Padrão do --resume da linha de comando (main) e do CrawlerCitroen
+RETOMAR = os.environ.get("CRAWLER_RESUME", "0") == "1"
 
 # Define a ordem exata das chaves conforme solicitado
-key_order = [
-    "marca", "modelo", "tipo_veiculo", "ano", "versao", "preco", "imagem_url", 
+KEY_ORDER = [
+    "marca", "modelo", "tipo_veiculo", "ano", "versao", "preco", "preco_centavos", "imagem_url", 
     "manual_url", "motorizacao", "motor", "turbo", "combustivel", "pneus", 
     "pneus_diametro", "ar_condicionado", "outras_caracteristicas"
 ]
 
-# Itera sobre o dicionário 'result' que foi construído
-for modelo_nome, modelo_data in result.items():
-    
-    for versao_dict in modelo_data.get("versoes", []):
-        
-        # Cria o novo dicionário
-        ordered_dict = {}
-        
-        # 1. Adiciona as chaves fixas/novas com base no seu exemplo
-        ordered_dict["marca"] = versao_dict.get("marca", "citroen")
-        ordered_dict["modelo"] = versao_dict.get("modelo", modelo_nome)
-        ordered_dict["tipo_veiculo"] = "TEXT"  # <-- Valor literal "TEXT"
-        ordered_dict["ano"] = "INTEGER"   # <-- Valor literal "INTEGER"
-        
-        # 2. Adiciona as chaves principais na ordem certa
-        for key in key_order:
-            if key not in ordered_dict and key in versao_dict:
-                ordered_dict[key] = versao_dict.get(key)
-        
-        # 3. Adiciona quaisquer chaves extras (ex: carga_util) no final
-        for key, value in versao_dict.items():
-            if key not in ordered_dict:
-                ordered_dict[key] = value
-                
-        final_version_list.append(ordered_dict)
+saida_lock = threading.Lock()
 
-print(f"✔️ Formatação concluída. Total de {len(final_version_list)} versões processadas.")
+def ordenar_versao(versao_dict, modelo_nome):
+    """Passo 5 para uma versão: chaves fixas, depois KEY_ORDER, depois as extras (ex: carga_util)."""
+    ordered_dict = {}
+    ordered_dict["marca"] = versao_dict.get("marca", "citroen")
+    ordered_dict["modelo"] = versao_dict.get("modelo", modelo_nome)
+    ordered_dict["tipo_veiculo"] = "TEXT"  # <-- Valor literal "TEXT"
+    ordered_dict["ano"] = "INTEGER"   # <-- Valor literal "INTEGER"
+    versao_dict = {**versao_dict, "preco_centavos": precos.centavos(versao_dict.get("preco"))}
+    for key in KEY_ORDER:
+        if key not in ordered_dict and key in versao_dict:
+            ordered_dict[key] = versao_dict.get(key)
+    for key, value in versao_dict.items():
+        if key not in ordered_dict:
+            ordered_dict[key] = value
+    return ordered_dict
 
+def iniciar_saida(retomar=RETOMAR):
+    """Prepara JSONL e checkpoint. Devolve as URLs de modelos já concluídos (só com --resume)."""
+    concluidos = {}
+    if retomar and os.path.exists(ARQUIVO_CHECKPOINT):
+        with open(ARQUIVO_CHECKPOINT, encoding='utf-8') as f:
+            for linha in f:
+                try: entrada = json.loads(linha)
+                except ValueError: break  # linha cortada por uma queda no meio da escrita
+                concluidos[entrada["site_url"]] = entrada
+    tamanho = max((entrada["bytes_jsonl"] for entrada in concluidos.values()), default=0)
+    if concluidos and os.path.exists(ARQUIVO_JSONL) and os.path.getsize(ARQUIVO_JSONL) >= tamanho:
+        with open(ARQUIVO_JSONL, 'r+b') as f:
+            f.truncate(tamanho)
+        print(f"✔️ --resume: {len(concluidos)} modelos já concluídos serão pulados.")
+        return set(concluidos)
+    if retomar: print("      ⚠️ --resume sem checkpoint válido. Começando do zero.")
+    open(ARQUIVO_JSONL, 'w', encoding='utf-8').close()
+    open(ARQUIVO_CHECKPOINT, 'w', encoding='utf-8').close()
+    return set()
 
-# === 6️⃣ SALVAR RESULTADO FINAL ===
-print("\n\n--- RESULTADO FINAL COMPLETO ---")
-output_filename = "citroen_data.json"
-try:
-    # Salva a NOVA lista plana no arquivo
-    with open(output_filename, 'w', encoding='utf-8') as f:
-        json.dump(final_version_list, f, indent=2, ensure_ascii=False)
-    print(f"✔️ Dados salvos com sucesso em {output_filename}")
-except Exception as e:
-    print(f"❌ Erro ao salvar o arquivo JSON: {e}")
-    print(json.dumps(final_version_list, indent=2, ensure_ascii=False))
-# --- FIM DA ALTERAÇÃO ---
\ No newline at end of file
+def gravar_modelo_concluido(modelo, site_url, versoes):
+    """Anexa as versões do modelo ao JSONL e confirma o modelo no checkpoint."""
+    if not versoes: return  # sem versões (ou erro): o modelo é tentado de novo no --resume
+    registros = [ordenar_versao(versao_dict, modelo) for versao_dict in versoes]
+    linhas = "".join(json.dumps(registro, ensure_ascii=False) + "\n" for registro in registros)
+    with rastreamento.etapa("salvar", modelo=modelo), saida_lock:
+        with open(ARQUIVO_JSONL, 'a', encoding='utf-8') as f:
+            f.write(linhas)
+            f.flush(); os.fsync(f.fileno())
+            bytes_jsonl = f.tell()
+        with open(ARQUIVO_CHECKPOINT, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"site_url": site_url, "modelo": modelo, "versoes": len(versoes), "bytes_jsonl": bytes_jsonl}, ensure_ascii=False) + "\n")
+            f.flush(); os.fsync(f.fileno())
+    destino = obter_destino_supabase() if SUPABASE_UPSERT else None
+    if destino: destino.enviar(registros)
+
+def ler_jsonl(origem=ARQUIVO_JSONL):
+    with open(origem, encoding='utf-8') as entrada:
+        for linha in entrada:
+            if linha.strip(): yield json.loads(linha)
+
+def montar_json_final(origem=ARQUIVO_JSONL, destino=ARQUIVO_SAIDA, enriquecer=None):
+    """Passo 6: monta o array JSON final lendo o JSONL linha a linha. Devolve o total de versões."""
+    total = 0
+    temporario = destino + ".tmp"
+    with open(temporario, 'w', encoding='utf-8') as saida:
+        for registro in ler_jsonl(origem):
+            if enriquecer: registro = enriquecer(registro)
+            # Mesmo formato do json.dump(lista, indent=2) original
+            item = json.dumps(registro, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+            saida.write(("[\n  " if total == 0 else ",\n  ") + item)
+            total += 1
+        saida.write("\n]" if total else "[]")
+    os.replace(temporario, destino)
+    return total
+# --- FIM DA SAÍDA EM STREAMING ---
+
+
+# --- VALIDAÇÃO E DOWNLOAD DOS MANUAIS (PÓS-CRAWL) ---
+# "0" desliga a etapa; CRAWLER_MANUAIS_DOWNLOAD=0 só valida (HEAD + GET com Range), sem baixar
+VALIDAR_MANUAIS = os.environ.get("CRAWLER_MANUAIS", "1") != "0"
+BAIXAR_MANUAIS = os.environ.get("CRAWLER_MANUAIS_DOWNLOAD", "1") != "0"
+MANUAIS_DIR = os.environ.get("CRAWLER_MANUAIS_DIR", ".cache_manuais")
+MANUAIS_CONEXOES = int(os.environ.get("CRAWLER_MANUAIS_CONEXOES", "8"))
+MANUAIS_TIMEOUT = float(os.environ.get("CRAWLER_MANUAIS_TIMEOUT", "120"))
+
+def validar_manuais_jsonl(origem=ARQUIVO_JSONL):
+    """Confere todas as manual_url do JSONL de uma vez. Devolve o mapa url -> campos manual_*."""
+    if not VALIDAR_MANUAIS: return None
+    if manuais.importar_aiohttp() is None:
+        print("      ⚠️ aiohttp não instalado: validação dos manuais desligada.")
+        return None
+    urls = {registro.get("manual_url") for registro in ler_jsonl(origem)} - {None, ""}
+    print(f"\n--- VALIDANDO {len(urls)} MANUAIS ({'download' if BAIXAR_MANUAIS else 'só validação'}, {MANUAIS_CONEXOES} conexões) ---")
+    inicio = time.perf_counter()
+    try:
+        resultados = manuais.verificar_manuais(urls, MANUAIS_DIR, MANUAIS_CONEXOES, BAIXAR_MANUAIS, MANUAIS_TIMEOUT,
+                                               {"User-Agent": HTTP_HEADERS["User-Agent"]})
+    except Exception as e:
+        print(f"      ❌ Erro na validação dos manuais: {e}")
+        return None
+    for url, campos in resultados.items():
+        if campos["manual_status"] != "ok": print(f"      ⚠️ Manual inválido ({campos['manual_status']}): {url}")
+    validos = sum(1 for campos in resultados.values() if campos["manual_status"] == "ok")
+    arquivos = len({campos["manual_sha256"] for campos in resultados.values() if campos["manual_sha256"]})
+    print(f"✔️ {validos}/{len(resultados)} manuais válidos, {arquivos} PDFs distintos em {MANUAIS_DIR} ({time.perf_counter() - inicio:.1f}s).")
+    return resultados
+# --- FIM DA VALIDAÇÃO DOS MANUAIS ---
+
+
+# --- HISTÓRICO DE PREÇOS ---
+# Banco local (precos.py) com uma linha por mudança de preço de cada versão; vazio desliga.
+# No GitHub Actions ele vai e volta pelo cache, junto com o citroen_estado.json.
+HISTORICO_PRECOS = os.environ.get("CRAWLER_HISTORICO_PRECOS", "citroen_precos.db")
+
+def registrar_historico_precos(origem=ARQUIVO_JSONL):
+    """Acrescenta ao histórico os preços que mudaram nesta execução. Devolve quantos."""
+    if not HISTORICO_PRECOS or MODO_DOM == "reproduzir": return None
+    try:
+        historico = precos.HistoricoPrecos(HISTORICO_PRECOS)
+        try:
+            mudancas = historico.registrar(ler_jsonl(origem), DATA_EXECUCAO)
+        finally:
+            historico.fechar()
+    except Exception as e:
+        print(f"❌ Erro ao atualizar o histórico de preços: {e}")
+        return None
+    print(f"✔️ Histórico de preços ({HISTORICO_PRECOS}): {mudancas} versões com preço novo ou alterado.")
+    return mudancas
+# --- FIM DO HISTÓRICO DE PREÇOS ---
+
+
+# --- PUBLICAÇÃO DO DELTA ---
+# citroen_delta.json ao lado do citroen_data.json, só com o que mudou desde a saída anterior
+# (a que esta execução sobrescreve, ou CRAWLER_SAIDA_ANTERIOR). Vazio em CRAWLER_ARQUIVO_DELTA desliga.
+ARQUIVO_DELTA = os.environ.get("CRAWLER_ARQUIVO_DELTA", "citroen_delta.json")
+SAIDA_ANTERIOR = os.environ.get("CRAWLER_SAIDA_ANTERIOR", "")
+
+def publicar_delta(anteriores, enriquecer=None, origem=ARQUIVO_JSONL):
+    """Compara os registros do JSONL (como saem no JSON final) com os anteriores e grava o delta."""
+    try:
+        atuais = [enriquecer(registro) if enriquecer else registro for registro in ler_jsonl(origem)]
+        resultado = delta.calcular_delta(anteriores, atuais)
+        delta.gravar_delta(ARQUIVO_DELTA, resultado)
+    except Exception as e:
+        print(f"❌ Erro ao gerar o delta: {e}")
+        return None
+    resumo = resultado["resumo"]
+    print(f"✔️ Delta salvo em {ARQUIVO_DELTA}: {resumo['adicionados']} versões adicionadas, {resumo['removidos']} removidas, "
+          f"{resumo['alterados']} alteradas{' (sem saída anterior: delta completo)' if resultado['completo'] else ''}.")
+    return resultado
+# --- FIM DA PUBLICAÇÃO DO DELTA ---
+
+
+def worker_modelos(worker_id, fila, modelos, navegador=None):
+    """Consome modelos da fila compartilhada com um navegador próprio (aberto só se preciso)."""
+    navegador = navegador or NavegadorSobDemanda()
+    try:
+        while True:
+            try:
+                modelo = fila.get_nowait()
+            except queue.Empty:
+                break
+            versoes, navegador = extrair_modelo_com_prazo(navegador, modelo, modelos[modelo]["site_url"])
+            gravar_modelo_concluido(modelo, modelos[modelo]["site_url"], versoes)
+    finally:
+        navegador.fechar()
+
+
+# --- DESCOBERTA DE MODELOS POR HTTP (CACHE COM TTL, MENU NO SELENIUM COMO FALLBACK) ---
+# O mapa {modelo: {tipo_modelo, site_url}} quase não muda: ele fica em disco por
+# CRAWLER_DESCOBERTA_TTL segundos (0 desliga o cache). Vencido, vem do HTML estático da home
+# (o menu hambúrguer já está na marcação, só escondido) e, sem ele, do sitemap.xml. Só se as
+# duas fontes falharem o menu é percorrido no navegador (passos 1 a 3 originais).
+ARQUIVO_CACHE_MODELOS = os.environ.get("CRAWLER_CACHE_MODELOS", "citroen_modelos.json")
+DESCOBERTA_TTL = float(os.environ.get("CRAWLER_DESCOBERTA_TTL", "86400"))
+DESCOBERTA_HTTP = os.environ.get("CRAWLER_DESCOBERTA_HTTP", "1") != "0" and MOTOR_HTTP
+TRECHOS_URL_VEICULO = ("veiculos-passeio", "veiculos-utilitarios")
+TIPOS_URL_VEICULO = {"veiculos-passeio": "Passeio", "veiculos-utilitarios": "Utilitários"}
+
+def carregar_cache_modelos():
+    """Mapa de modelos do cache em disco, se for da mesma URL_BASE e estiver dentro do TTL."""
+    if DESCOBERTA_TTL <= 0 or not os.path.exists(ARQUIVO_CACHE_MODELOS): return None
+    try:
+        with open(ARQUIVO_CACHE_MODELOS, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    idade = time.time() - cache.get("gerado_em", 0)
+    if cache.get("url_base") != URL_BASE or not cache.get("modelos") or not 0 <= idade <= DESCOBERTA_TTL: return None
+    print(f"✔️ {len(cache['modelos'])} modelos carregados do cache ({cache.get('origem')}, há {idade / 60:.0f} min).")
+    return cache["modelos"]
+
+def gravar_cache_modelos(modelos, origem):
+    if DESCOBERTA_TTL <= 0 or not modelos: return
+    try:
+        with open(ARQUIVO_CACHE_MODELOS + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({"url_base": URL_BASE, "origem": origem, "gerado_em": time.time(), "modelos": modelos}, f, indent=2, ensure_ascii=False)
+        os.replace(ARQUIVO_CACHE_MODELOS + ".tmp", ARQUIVO_CACHE_MODELOS)
+    except Exception as e:
+        print(f"      ⚠️ Erro ao gravar o cache de modelos: {e}")
+
+def eh_url_veiculo(url):
+    return bool(url) and any(trecho in url for trecho in TRECHOS_URL_VEICULO)
+
+def modelos_menu_html(pagina_html, base_url):
+    """Passo 3 sobre o HTML estático da home: mesmas categorias, links e filtro do menu no Selenium."""
+    doc = lxml_html.fromstring(pagina_html)
+    result = {}
+    for cat in doc.cssselect("li.menu-hamburger__options__category"):
+        tipo_el = primeiro_css_html(cat, "span")
+        tipo = texto_html(tipo_el).strip(": ")
+        for link in css_html(cat, "li.menu-hamburger__options__sub-item a"):
+            modelo_menu = link.text_content().strip()
+            url = urljoin(base_url, link.get("href") or "")
+            if link.get("href") and modelo_menu and eh_url_veiculo(url):
+                result[modelo_menu] = {"tipo_modelo": tipo, "site_url": url}
+    return result
+
+def modelos_sitemap(sessao):
+    """Páginas de modelo do sitemap.xml (e dos sitemaps filhos). Nome e tipo vêm da URL."""
+    result = {}
+    pendentes, vistos = [urljoin(URL_BASE, "sitemap.xml")], set()
+    while pendentes and len(vistos) < 20:
+        endereco = pendentes.pop(0)
+        vistos.add(endereco)
+        resposta = sessao.get(endereco, timeout=HTTP_TIMEOUT)
+        if resposta.status_code != 200: continue
+        for loc in re.findall(r"<loc>\s*([^<\s]+)\s*</loc>", resposta.text):
+            if loc.endswith(".xml") and loc not in vistos:
+                pendentes.append(loc)
+                continue
+            caminho = loc.split("?")[0].rstrip("/").split("/")
+            # Só a página do modelo (…/veiculos-passeio/<modelo>), não as subpáginas dele
+            if len(caminho) >= 2 and caminho[-2] in TIPOS_URL_VEICULO:
+                result[nome_modelo_url(loc)] = {"tipo_modelo": TIPOS_URL_VEICULO[caminho[-2]], "site_url": loc}
+    return result
+
+def descobrir_modelos_http():
+    """Cache em disco, depois home/sitemap por HTTP. None = usar o menu no navegador."""
+    modelos = carregar_cache_modelos()
+    if modelos: return modelos
+    if not DESCOBERTA_HTTP: return None
+    rastreamento.marcar()
+    try:
+        sessao = obter_sessao_http()
+        resposta = sessao.get(URL_BASE, timeout=HTTP_TIMEOUT)
+        resposta.raise_for_status()
+        # Bytes, não .text: o lxml respeita o <meta charset> (sem charset no cabeçalho o requests decodifica como latin-1)
+        modelos, origem = modelos_menu_html(resposta.content, resposta.url), "menu_http"
+        if not modelos:
+            print("      ⚠️ Menu não está no HTML estático da home. Tentando o sitemap...")
+            modelos, origem = modelos_sitemap(sessao), "sitemap"
+    except Exception as e_http:
+        print(f"      ⚠️ Falha na descoberta de modelos por HTTP ({e_http}). Usando o menu no navegador...")
+        return None
+    rastreamento.fim_etapa("descoberta_http", modelos=len(modelos), origem=origem)
+    if not modelos:
+        print("      ⚠️ Nenhum modelo encontrado por HTTP. Usando o menu no navegador...")
+        return None
+    for modelo, dados in modelos.items():
+        print(f"      ✔️ Modelo encontrado: {modelo} ({dados['tipo_modelo']})")
+    print(f"✔️ {len(modelos)} modelos descobertos por HTTP ({origem}).")
+    gravar_cache_modelos(modelos, origem)
+    return modelos
+# --- FIM DA DESCOBERTA POR HTTP ---
+
+
+# === PASSOS 1 A 3: DESCOBRIR OS MODELOS PELO MENU ===
+def descobrir_modelos(driver):
+    """Abre o menu hambúrguer da home e devolve {modelo: {tipo_modelo, site_url}}. RuntimeError se o menu falhar."""
+    carregar_selenium()
+    wait = WebDriverWait(driver, 30)
+    wait_short = WebDriverWait(driver, 10) 
+
+    rastreamento.marcar()
+    driver.get(URL_BASE)
+    rastreamento.fim_etapa("carregar_home")
+
+    # === 1️⃣ CLICAR NO MENU PRINCIPAL ===
+    try:
+        try:
+            print("Aguardando o loader da página inicial desaparecer...")
+            wait.until(
+                EC.invisibility_of_element_located((By.CSS_SELECTOR, "div[data-testid='hub-loader']"))
+            )
+            print("✔️ Loader desapareceu.")
+        except TimeoutException:
+            print("⚠️ Loader não desapareceu a tempo, mas tentando continuar...")
+
+        menu_button = wait.until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, 'li[title="Menu"] .menu-hamburger__cta'))
+        )
+        menu_button.click() 
+
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.menu-hamburger__options")))
+        print("✔️ Menu principal aberto.")
+        aguardar(driver, "menu_aberto")
+        rastreamento.fim_etapa("abrir_menu")
+
+    except Exception as e:
+        print(f"Erro ao abrir menu principal: {e}")
+        raise RuntimeError(f"menu principal não abriu: {e}") from e
+
+    # === 2️⃣ CLICAR NO “+” DO ITEM CARROS ===
+    try:
+        carros_expand = wait.until(
+            EC.element_to_be_clickable((
+                By.XPATH,
+                "//div[contains(@class,'menu-hamburger__options__item') and contains(.,'Carros')]//button[@title='Expand item']"
+            ))
+        )
+
+        print("Botão 'Carros' pronto. Tentando clique normal...")
+        carros_expand.click() 
+        print("✔️ Clicou em '+' de Carros.")
+
+        wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "li.menu-hamburger__options__category")))
+        aguardar(driver, "carros_expandido")
+        rastreamento.fim_etapa("expandir_carros")
+
+    except Exception as e:
+        print(f"Erro ao expandir 'Carros': {e}")
+        raise RuntimeError(f"item 'Carros' não expandiu: {e}") from e
+
+    # === 3️⃣ EXTRAIR OS MODELOS ===
+    print("--- INICIANDO EXTRAÇÃO DE MODELOS (PASSO 3) ---")
+    categories = driver.find_elements(By.CSS_SELECTOR, "li.menu-hamburger__options__category")
+    result = {}
+
+    for cat in categories:
+        try:
+            tipo = cat.find_element(By.TAG_NAME, "span").text.strip(": ")
+            try:
+                wait_short.until(EC.visibility_of_all_elements_located((By.CSS_SELECTOR, "li.menu-hamburger__options__sub-item a")))
+            except TimeoutException: print(f"      ⚠️ Links não ficaram visíveis a tempo para a categoria '{tipo}'. Pulando categoria."); continue
+            links = cat.find_elements(By.CSS_SELECTOR, "li.menu-hamburger__options__sub-item a")
+            for link in links:
+                try:
+                    modelo_menu = link.get_attribute('textContent').strip()
+                    url = link.get_attribute("href")
+                    if not url: print(f"      ⚠️ Link com texto '{modelo_menu}' tem URL vazia. Pulando."); continue
+                    if "veiculos-passeio" in url or "veiculos-utilitarios" in url:
+                        if modelo_menu: 
+                            result[modelo_menu] = {"tipo_modelo": tipo, "site_url": url}
+                            print(f"      ✔️ Modelo encontrado: {modelo_menu} ({tipo})")
+                        else: print(f"      ⚠️ Modelo com nome vazio ignorado (textContent). URL: {url}")
+                    else:
+                        if modelo_menu: print(f"      Ignorando link não-veículo: {modelo_menu} ({url})")
+                        else: print(f"      Ignorando link não-veículo sem nome. URL: {url}")
+                except StaleElementReferenceException: print("      ⚠️ Stale Element ao processar um link. Tentando continuar..."); continue
+                except Exception as e_link: print(f"      ❌ Erro ao processar um link individual: {e_link}")
+        except StaleElementReferenceException: print("      ⚠️ Stale Element ao processar uma categoria. Tentando continuar..."); continue
+        except Exception as e: print(f"Erro geral ao processar categoria de menu: {e}")
+
+    rastreamento.fim_etapa("extrair_categorias", modelos=len(result))
+    return result
+
+
+# === API DO CRAWLER ===
+def nome_modelo_url(site_url):
+    """Nome do modelo a partir da URL, para quando ele não veio do menu (ex: .../c3-aircross.html -> C3 Aircross)."""
+    trecho = site_url.rstrip("/").rsplit("/", 1)[-1].split(".", 1)[0]
+    return " ".join(parte.capitalize() if not parte[:1].isdigit() else parte for parte in trecho.split("-")) or site_url
+
+
+class CrawlerCitroen:
+    """Coleta do catálogo como biblioteca. Chrome, Supabase e SQLite só são abertos no primeiro uso.
+
+    with CrawlerCitroen() as crawler:
+        crawler.descobrir_modelos()        # passos 1 a 3 (menu no navegador)
+        crawler.extrair_modelo(url)        # versões de um modelo, sem gravar nada
+        crawler.processar()                # passo 4 de todos os modelos, gravando o JSONL
+        crawler.salvar()                   # passos 5 e 6, destinos e relatórios
+    """
+
+    def __init__(self, num_workers=NUM_WORKERS, retomar=RETOMAR, navegador=None):
+        self.num_workers = num_workers
+        self.retomar = retomar
+        self.modelos = {}
+        self.navegador = navegador or NavegadorSobDemanda()
+
+    @property
+    def driver(self):
+        return self.navegador.obter()
+
+    def descobrir_modelos(self):
+        """Passos 1 a 3 (cache/HTTP primeiro, menu no navegador se falhar). Devolve {modelo: {tipo_modelo, site_url}}."""
+        if MODO_DOM == "reproduzir":
+            self.modelos = carregar_snapshot_modelos()
+        else:
+            self.modelos = descobrir_modelos_http()
+            if not self.modelos:
+                self.modelos = descobrir_modelos(self.driver)
+                gravar_cache_modelos(self.modelos, "menu_selenium")
+            if MODO_DOM == "gravar": gravar_snapshot_modelos(self.modelos)
+        return self.modelos
+
+    def extrair_modelo(self, site_url, modelo=None):
+        """Versões de um modelo (HTTP primeiro, Chrome só no fallback), com prazo e retentativas. Não grava nada."""
+        if modelo is None:
+            modelo = next((nome for nome, dados in self.modelos.items() if dados["site_url"] == site_url), None) or nome_modelo_url(site_url)
+        versoes, self.navegador = extrair_modelo_com_prazo(self.navegador, modelo, site_url)
+        return versoes
+
+    def processar(self, modelos=None, fechar_navegador=True):
+        """Passo 4: extrai os modelos (por padrão, os descobertos) e grava cada um no JSONL."""
+        modelos = self.modelos if modelos is None else modelos
+        print("\n--- INICIANDO EXTRAÇÃO DE VERSÕES (MÉTODO LÓGICA DUPLA) ---")
+        modelos_concluidos = iniciar_saida(self.retomar)
+        modelos_para_processar = [modelo for modelo in modelos if modelos[modelo]["site_url"] not in modelos_concluidos]
+        if not modelos: print("      ❌ ERRO: Nenhum modelo foi encontrado no Passo 3. Verifique o menu e os seletores.")
+
+        num_workers = max(1, min(self.num_workers, len(modelos_para_processar)))
+        if num_workers == 1 or MODO_DOM == "reproduzir":
+            for modelo in modelos_para_processar:
+                versoes, self.navegador = extrair_modelo_com_prazo(self.navegador, modelo, modelos[modelo]["site_url"])
+                gravar_modelo_concluido(modelo, modelos[modelo]["site_url"], versoes)
+            # === 5️⃣ FECHAR O NAVEGADOR ===
+            if fechar_navegador: self.navegador.fechar()
+        else:
+            print(f"✔️ Modo paralelo: {num_workers} navegadores processando {len(modelos_para_processar)} modelos.")
+            fila_modelos = queue.Queue()
+            for modelo in modelos_para_processar:
+                fila_modelos.put(modelo)
+            # O worker 0 reaproveita o navegador já aberto para o menu (fechado ao final dele)
+            threads = [threading.Thread(target=worker_modelos, args=(0, fila_modelos, modelos, self.navegador), name="worker-0")]
+            threads += [threading.Thread(target=worker_modelos, args=(i, fila_modelos, modelos), name=f"worker-{i}") for i in range(1, num_workers)]
+            for t in threads: t.start()
+            for t in threads: t.join()
+            # O worker 0 pode ter trocado de navegador (o dele foi derrubado pelo prazo)
+            if self.navegador.cancelado: self.navegador = NavegadorSobDemanda()
+        relatorio_desfechos(modelos_para_processar)
+        return modelos_para_processar
+
+    def salvar(self):
+        """Passos 5 e 6: fecha o upsert, monta o citroen_data.json, grava o SQLite e os relatórios."""
+        fechar_destino_supabase()
+
+        # === 5️⃣ E 6️⃣ SALVAR RESULTADO FINAL ===
+        # As versões já foram ordenadas (passo 5) e gravadas no JSONL modelo a modelo
+        print("\n\n--- RESULTADO FINAL COMPLETO ---")
+        with rastreamento.etapa("validar_manuais"):
+            resultados_manuais = validar_manuais_jsonl()
+        enriquecer = (lambda registro: manuais.anexar_campos_manual(registro, resultados_manuais)) if resultados_manuais is not None else None
+        # A saída anterior é lida antes de ser sobrescrita
+        anteriores = delta.carregar_saida(SAIDA_ANTERIOR or ARQUIVO_SAIDA) if ARQUIVO_DELTA else None
+        total_versoes = None
+        try:
+            with rastreamento.etapa("montar_json_final"):
+                total_versoes = montar_json_final(enriquecer=enriquecer)
+            print(f"✔️ Formatação concluída. Total de {total_versoes} versões processadas.")
+            print(f"✔️ Dados salvos com sucesso em {ARQUIVO_SAIDA} (linhas em {ARQUIVO_JSONL})")
+        except Exception as e:
+            print(f"❌ Erro ao salvar o arquivo JSON: {e}. As versões continuam em {ARQUIVO_JSONL}.")
+        if ARQUIVO_DELTA and total_versoes is not None:
+            with rastreamento.etapa("delta"):
+                publicar_delta(anteriores, enriquecer)
+
+        if obter_destino_sqlite():
+            try:
+                with rastreamento.etapa("gravar_sqlite"):
+                    gravadas = destino_sqlite.gravar(((enriquecer or (lambda registro: registro))(registro) for registro in ler_jsonl()),
+                                                     {modelo: dados["site_url"] for modelo, dados in self.modelos.items()})
+                print(f"✔️ {gravadas} versões gravadas no SQLite local ({SQLITE_PATH}).")
+            except Exception as e:
+                print(f"❌ Erro ao gravar no SQLite local: {e}")
+
+        with rastreamento.etapa("historico_precos"):
+            registrar_historico_precos()
+
+        if MODO_DOM != "reproduzir":
+            salvar_estado()
+            salvar_duracoes()
+        relatorio_esperas()
+        relatorio_paginas()
+        try:
+            metricas = rastreamento.exportar(os.path.dirname(os.path.abspath(ARQUIVO_SAIDA)))
+            print(f"📈 Trace e métricas salvos (citroen_trace.json / citroen_metricas.json): {metricas['modelos_processados']} modelos, {metricas['contadores'].get('comandos_webdriver', 0)} comandos WebDriver, {metricas['contadores'].get('consultas_supabase', 0)} consultas ao Supabase.")
+        except Exception as e:
+            print(f"❌ Erro ao exportar o trace da execução: {e}")
+        return total_versoes
+
+    def fechar(self):
+        """Fecha o navegador e os destinos abertos (o upsert pendente é gravado)."""
+        global destino_sqlite, sqlite_iniciado
+        self.navegador.fechar()
+        fechar_destino_supabase()
+        with conexoes_lock:
+            if destino_sqlite:
+                destino_sqlite.fechar()
+            destino_sqlite, sqlite_iniciado = None, False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+
+# === EXECUÇÃO (LINHA DE COMANDO) ===
+def main(argv=None):
+    """python crawler.py [--resume]: coleta completa, do menu ao citroen_data.json."""
+    argv = sys.argv[1:] if argv is None else argv
+    with CrawlerCitroen(retomar=RETOMAR or "--resume" in argv) as crawler:
+        try:
+            crawler.descobrir_modelos()
+        except RuntimeError as e:
+            print(f"❌ ERRO: Não foi possível descobrir os modelos ({e}).")
+            return 1
+        crawler.processar()
+        crawler.salvar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+# --- FIM DA ALTERAÇÃO ---
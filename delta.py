@@ -0,0 +1,63 @@
+# delta.py
+# Diferença registro a registro entre a saída anterior e a atual, pela chave
+# (marca, modelo, versao): versões adicionadas, removidas e campos alterados.
+# A ordem das listas e dos campos é estável e não há data/hora no arquivo: duas execuções
+# com o mesmo delta geram o mesmo arquivo (nenhum commit novo no repositório do analyzer).
+
+import json
+import os
+
+CHAVE = ("marca", "modelo", "versao")
+
+
+def chave_registro(registro):
+    return tuple(registro.get(campo) for campo in CHAVE)
+
+def ordem_chave(chave):
+    return tuple("" if parte is None else str(parte) for parte in chave)
+
+def carregar_saida(caminho):
+    """Registros de um citroen_data.json anterior, ou None se não houver (ou estiver ilegível)."""
+    if not caminho or not os.path.exists(caminho): return None
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            registros = json.load(f)
+        return registros if isinstance(registros, list) else None
+    except (OSError, ValueError) as e:
+        print(f"      ⚠️ Saída anterior ilegível ({e}). O delta sai completo.")
+        return None
+
+def calcular_delta(anteriores, atuais):
+    """Delta entre duas listas de registros. Sem anteriores, tudo vira adicionado (completo=True)."""
+    atuais_por_chave = {chave_registro(registro): registro for registro in atuais}
+    anteriores_por_chave = {chave_registro(registro): registro for registro in anteriores or []}
+    adicionados, alterados = [], []
+    for chave in sorted(atuais_por_chave, key=ordem_chave):
+        registro = atuais_por_chave[chave]
+        anterior = anteriores_por_chave.get(chave)
+        if anterior is None:
+            adicionados.append(registro)
+            continue
+        # Campos na ordem do registro atual; os que sumiram vão no fim com "para": null
+        campos = {campo: {"de": anterior.get(campo), "para": valor}
+                  for campo, valor in registro.items() if anterior.get(campo) != valor}
+        campos.update({campo: {"de": valor, "para": None} for campo, valor in anterior.items() if campo not in registro})
+        if campos:
+            alterados.append({**dict(zip(CHAVE, chave)), "campos": campos})
+    removidos = [dict(zip(CHAVE, chave)) for chave in sorted(anteriores_por_chave, key=ordem_chave) if chave not in atuais_por_chave]
+    return {
+        "completo": anteriores is None,
+        "versoes_anteriores": len(anteriores_por_chave) if anteriores is not None else None,
+        "versoes_atuais": len(atuais_por_chave),
+        "resumo": {"adicionados": len(adicionados), "removidos": len(removidos), "alterados": len(alterados)},
+        "adicionados": adicionados,
+        "removidos": removidos,
+        "alterados": alterados,
+    }
+
+def gravar_delta(caminho, delta):
+    temporario = caminho + ".tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(delta, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    os.replace(temporario, caminho)
@@ -0,0 +1,223 @@
+# destinos.py
+# Destinos de gravação das versões coletadas, além do citroen_data.json.
+#
+# DestinoSupabase: upsert em lote na tabela 'veiculos' (on_conflict marca, modelo, versao).
+# Os registros chegam modelo a modelo (enviar) e uma thread própria junta os lotes e grava
+# enquanto o crawl continua; erros transitórios são repetidos com backoff exponencial:
+# falha de transporte (timeout, conexão), status HTTP 408/425/429/5xx e, nos erros do
+# PostgREST (APIError.code é um SQLSTATE do Postgres ou PGRSTxxx), só os da lista
+# SQLSTATE_TRANSITORIOS. Violação de constraint, coluna inexistente etc. falham na hora.
+#
+# DestinoSQLite: banco local (mesmo esquema do main.py), gravado de uma vez no fim da execução.
+
+import json
+import os
+import queue
+import random
+import sqlite3
+import sys
+import threading
+import time
+
+CHAVE_CONFLITO = ("marca", "modelo", "versao")
+COLUNAS_VEICULOS = [
+    "marca", "modelo", "versao", "preco", "imagem_url", "manual_url", "motorizacao", "motor",
+    "turbo", "combustivel", "pneus", "pneus_diametro", "ar_condicionado", "outras_caracteristicas",
+]
+STATUS_TRANSITORIOS = {408, 425, 429, 500, 502, 503, 504}
+SQLSTATE_TRANSITORIOS = {
+    "40001", "40P01",                          # serialization_failure, deadlock_detected
+    "55P03", "57014",                          # lock_not_available, query_canceled (statement_timeout)
+    "57P01", "57P02", "57P03",                 # admin/crash_shutdown, cannot_connect_now
+    "53000", "53300", "53400",                 # insufficient_resources, too_many_connections
+    "08000", "08001", "08003", "08004", "08006",  # connection_exception
+    "PGRST000", "PGRST001", "PGRST002",        # PostgREST sem conexão com o banco (503)
+}
+
+def excecoes_transporte():
+    """Erros de rede do httpx (usado pelo supabase-py) e do requests, se já estiverem carregados."""
+    classes = [ConnectionError, TimeoutError]
+    httpx = sys.modules.get("httpx")
+    if httpx is not None: classes.append(httpx.TransportError)
+    requests = sys.modules.get("requests")
+    if requests is not None: classes += [requests.ConnectionError, requests.Timeout]
+    return tuple(classes)
+
+def status_http(erro):
+    """Status HTTP do erro (httpx/requests: response.status_code; aiohttp: status), ou None."""
+    for status in (getattr(getattr(erro, "response", None), "status_code", None), getattr(erro, "status_code", None), getattr(erro, "status", None)):
+        if isinstance(status, int): return status
+    return None
+
+def erro_transitorio(erro):
+    """Falha de transporte, status HTTP 408/425/429/5xx ou SQLSTATE da lista de transitórios."""
+    if isinstance(erro, excecoes_transporte()): return True
+    status = status_http(erro)
+    if status is not None: return status in STATUS_TRANSITORIOS
+    return str(getattr(erro, "code", None) or "").upper() in SQLSTATE_TRANSITORIOS
+
+def linhas_tabela(registros, colunas=COLUNAS_VEICULOS):
+    """Só as colunas da tabela; dentro do lote, a última versão de cada chave vence."""
+    por_chave = {}
+    for registro in registros:
+        por_chave[tuple(registro.get(chave) for chave in CHAVE_CONFLITO)] = {coluna: registro.get(coluna) for coluna in colunas}
+    return list(por_chave.values())
+
+
+class DestinoSupabase:
+    """Upsert em lote em segundo plano. enviar() não bloqueia; fechar() grava o resto e espera."""
+
+    FIM = object()
+
+    def __init__(self, cliente, tabela="veiculos", tamanho_lote=200, tentativas=5, espera_base=0.5, colunas=COLUNAS_VEICULOS):
+        self.cliente = cliente
+        self.tabela = tabela
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.colunas = colunas
+        self.fila = queue.Queue()
+        self.estatisticas = {"lotes": 0, "linhas": 0, "retentativas": 0, "falhas": 0, "linhas_perdidas": 0}
+        self.thread = threading.Thread(target=self._consumir, name="destino-supabase", daemon=True)
+        self.thread.start()
+
+    def enviar(self, registros):
+        if registros: self.fila.put(list(registros))
+
+    def fechar(self):
+        self.fila.put(self.FIM)
+        self.thread.join()
+        return self.estatisticas
+
+    def _consumir(self):
+        pendentes = []
+        while True:
+            item = self.fila.get()
+            if item is self.FIM: break
+            pendentes.extend(item)
+            while len(pendentes) >= self.tamanho_lote:
+                self._gravar(pendentes[:self.tamanho_lote])
+                pendentes = pendentes[self.tamanho_lote:]
+        if pendentes: self._gravar(pendentes)
+
+    def _gravar(self, registros):
+        linhas = linhas_tabela(registros, self.colunas)
+        for tentativa in range(1, self.tentativas + 1):
+            try:
+                self.cliente.table(self.tabela).upsert(linhas, on_conflict=",".join(CHAVE_CONFLITO)).execute()
+                self.estatisticas["lotes"] += 1
+                self.estatisticas["linhas"] += len(linhas)
+                return
+            except Exception as e:
+                if tentativa == self.tentativas or not erro_transitorio(e):
+                    print(f"      ❌ ERRO no upsert de {len(linhas)} linhas no Supabase (tentativa {tentativa}): {e}")
+                    self.estatisticas["falhas"] += 1
+                    self.estatisticas["linhas_perdidas"] += len(linhas)
+                    return
+                espera = self.espera_base * 2 ** (tentativa - 1) * (1 + random.random())
+                print(f"      ⚠️ Erro transitório no upsert ({e}). Nova tentativa em {espera:.1f}s...")
+                self.estatisticas["retentativas"] += 1
+                time.sleep(espera)
+
+
+# DestinoSQLite: banco local com o esquema do main.py (corrigido e ampliado). A execução
+# inteira vai num único executemany/transação, em modo WAL, com UPSERT pela chave única
+# (marca, modelo, versao); outras_caracteristicas fica na tabela filha.
+COLUNAS_SQLITE = [
+    ("marca", "TEXT"), ("modelo", "TEXT"), ("versao", "TEXT"), ("tipo_veiculo", "TEXT"), ("ano", "INTEGER"),
+    ("preco", "TEXT"), ("preco_centavos", "INTEGER"), ("manual_url", "TEXT"), ("site_url", "TEXT"), ("imagem_urls", "TEXT"),
+    ("motorizacao", "TEXT"), ("motor", "TEXT"), ("turbo", "TEXT"), ("combustivel", "TEXT"),
+    ("pneus", "TEXT"), ("pneus_diametro", "TEXT"), ("ar_condicionado", "TEXT"),
+    ("manual_status", "TEXT"), ("manual_bytes", "INTEGER"), ("manual_sha256", "TEXT"),
+    ("extras", "TEXT"),  # JSON com as chaves fora do esquema (ex: carga_util)
+]
+SCHEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS veiculos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    %s,
+    criado_data DATETIME DEFAULT (datetime('now','localtime')),
+    atualizado_data DATETIME DEFAULT (datetime('now','localtime'))
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_veiculos_chave ON veiculos (marca, modelo, versao);
+CREATE TABLE IF NOT EXISTS veiculos_caracteristicas (
+    veiculo_id INTEGER NOT NULL REFERENCES veiculos(id) ON DELETE CASCADE,
+    posicao INTEGER NOT NULL,
+    caracteristica TEXT NOT NULL,
+    PRIMARY KEY (veiculo_id, posicao)
+);
+""" % ",\n    ".join(f"{coluna} {tipo}" for coluna, tipo in COLUNAS_SQLITE)
+
+
+def criar_schema_sqlite(conn):
+    """Cria as tabelas; num banco do main.py antigo, acrescenta as colunas que faltam."""
+    existentes = {linha[1] for linha in conn.execute("PRAGMA table_info(veiculos)")}
+    if existentes:
+        # ALTER TABLE não aceita default não constante: criado_data fica sem default no banco antigo
+        for coluna, tipo in COLUNAS_SQLITE + [("criado_data", "DATETIME"), ("atualizado_data", "DATETIME")]:
+            if coluna not in existentes:
+                conn.execute(f"ALTER TABLE veiculos ADD COLUMN {coluna} {tipo}")
+    conn.executescript(SCHEMA_SQLITE)
+
+def conectar_sqlite(caminho):
+    pasta = os.path.dirname(caminho)
+    if pasta: os.makedirs(pasta, exist_ok=True)
+    # O crawler pode abrir o banco num worker e gravar na thread principal (nunca ao mesmo tempo)
+    conn = sqlite3.connect(caminho, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    criar_schema_sqlite(conn)
+    return conn
+
+def linha_sqlite(registro, site_urls=None):
+    colunas = {coluna for coluna, _ in COLUNAS_SQLITE}
+    extras = {chave: valor for chave, valor in registro.items()
+              if chave not in colunas and chave not in ("imagem_url", "outras_caracteristicas")}
+    valores = dict(registro, imagem_urls=registro.get("imagem_url"),
+                   site_url=(site_urls or {}).get(registro.get("modelo")),
+                   extras=json.dumps(extras, ensure_ascii=False) if extras else None)
+    # tipo_veiculo/ano ainda saem com os marcadores literais "TEXT"/"INTEGER"
+    if valores.get("tipo_veiculo") == "TEXT": valores["tipo_veiculo"] = None
+    if valores.get("ano") == "INTEGER": valores["ano"] = None
+    return tuple(valores.get(coluna) for coluna, _ in COLUNAS_SQLITE)
+
+
+class DestinoSQLite:
+    """Grava a execução inteira num banco SQLite local e responde às checagens de duplicata."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.conn = conectar_sqlite(caminho)
+
+    def gravar(self, registros, site_urls=None):
+        """UPSERT de todos os registros numa transação. Devolve o número de versões gravadas."""
+        registros = list(registros)
+        if not registros: return 0
+        nomes = [coluna for coluna, _ in COLUNAS_SQLITE]
+        # site_url só é conhecido quando a execução passa o mapa modelo -> URL: não apaga o anterior
+        atualizacao = ", ".join(f"{coluna} = COALESCE(excluded.{coluna}, {coluna})" if coluna == "site_url" else f"{coluna} = excluded.{coluna}"
+                                for coluna in nomes if coluna not in CHAVE_CONFLITO)
+        upsert = (f"INSERT INTO veiculos ({', '.join(nomes)}) VALUES ({', '.join('?' * len(nomes))}) "
+                  f"ON CONFLICT (marca, modelo, versao) DO UPDATE SET {atualizacao}, atualizado_data = datetime('now','localtime')")
+        chaves = [tuple(registro.get(chave) for chave in CHAVE_CONFLITO) for registro in registros]
+        with self.conn:
+            self.conn.executemany(upsert, [linha_sqlite(registro, site_urls) for registro in registros])
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS chaves_execucao (marca TEXT, modelo TEXT, versao TEXT)")
+            self.conn.execute("DELETE FROM chaves_execucao")
+            self.conn.executemany("INSERT INTO chaves_execucao VALUES (?, ?, ?)", chaves)
+            ids = {(marca, modelo, versao): id_ for id_, marca, modelo, versao in self.conn.execute(
+                "SELECT v.id, v.marca, v.modelo, v.versao FROM veiculos v "
+                "JOIN chaves_execucao c ON v.marca IS c.marca AND v.modelo IS c.modelo AND v.versao IS c.versao")}
+            self.conn.executemany("DELETE FROM veiculos_caracteristicas WHERE veiculo_id = ?", [(id_,) for id_ in ids.values()])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO veiculos_caracteristicas (veiculo_id, posicao, caracteristica) VALUES (?, ?, ?)",
+                [(ids[chave], posicao, str(caracteristica))
+                 for chave, registro in zip(chaves, registros) if chave in ids
+                 for posicao, caracteristica in enumerate(registro.get("outras_caracteristicas") or [])])
+        return len(ids)
+
+    def versoes_existentes(self, marca="citroen"):
+        return set(self.conn.execute("SELECT modelo, versao FROM veiculos WHERE marca = ?", (marca,)))
+
+    def fechar(self):
+        self.conn.close()
@@ -1,30 +1,22 @@
 import sqlite3
 import os
 
-# Caminho do banco compartilhado
-db_path = r"C:\Users\prisc\OneDrive - tce.mg.gov.br\Projeto_Manuais_Automotivos_IA\data_output\FichasTecnicas\dados.db"
+from destinos import criar_schema_sqlite
+
+# Caminho do banco compartilhado (o mesmo CRAWLER_SQLITE usado pelo crawler.py)
+db_path = os.environ.get("CRAWLER_SQLITE") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_output", "dados.db")
 
 # Cria a pasta se não existir
 os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
 # Conecta ao SQLite
 conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+conn.execute("PRAGMA journal_mode=WAL")
 
-# Cria tabela de veículos
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS veiculos (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    marca TEXT,
-    modelo TEXT,
-    ano INTEGER,
-    manual_url TEXT,
-    site_url TEXT,
-    imagem_urls TEXT,  -- várias URLs separadas por '|'
-    preco REAL
-    criado_data DATETIME DEFAULT (datetime('now','localtime'))
-)
-''')
+# Cria as tabelas de veículos (esquema em destinos.py: veiculos + veiculos_caracteristicas,
+# com índice único em marca, modelo e versao)
+criar_schema_sqlite(conn)
 
 conn.commit()
-conn.close()
\ No newline at end of file
+conn.close()
+print(f"✔️ Banco pronto em {db_path}")
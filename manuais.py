@@ -0,0 +1,164 @@
+# manuais.py
+# Etapa pós-crawl dos manuais: confere todas as manual_url em paralelo (asyncio + aiohttp,
+# com pool de conexões limitado) e guarda os PDFs num repositório endereçado por conteúdo
+# (sha256), de modo que a mesma ficha compartilhada por várias versões vira um só arquivo.
+#
+# Para cada URL: HEAD (existência, tamanho e ETag; se bater com o índice do repositório não
+# baixa de novo) e depois GET — com Range só dos primeiros bytes quando o download está
+# desligado, ou completo em streaming quando ligado. Nos dois casos o conteúdo precisa
+# começar com "%PDF-".
+#
+# Estrutura do repositório:
+#   <diretorio>/objetos/<sha[:2]>/<sha>.pdf
+#   <diretorio>/indice.json   {url: {"manual_sha256", "manual_bytes", "etag", "last_modified"}}
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+
+# aiohttp só é importado quando a etapa roda (importar o módulo continua barato)
+aiohttp = None
+
+ASSINATURA_PDF = b"%PDF-"
+BYTES_AMOSTRA = 1024
+TAMANHO_BLOCO = 64 * 1024
+CAMPOS_MANUAL = ("manual_status", "manual_bytes", "manual_sha256")
+
+
+def importar_aiohttp():
+    """Importa o aiohttp no primeiro uso. None quando não está instalado (etapa desligada)."""
+    global aiohttp
+    if aiohttp is None:
+        try:
+            import aiohttp as modulo
+        except ImportError:
+            return None
+        aiohttp = modulo
+    return aiohttp
+
+def caminho_objeto(diretorio, sha):
+    return os.path.join(diretorio, "objetos", sha[:2], f"{sha}.pdf")
+
+def carregar_indice(diretorio):
+    try:
+        with open(os.path.join(diretorio, "indice.json"), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def salvar_indice(diretorio, indice):
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, "indice.json")
+    with open(caminho + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(indice, f, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(caminho + ".tmp", caminho)
+
+def resultado(status, tamanho=None, sha=None):
+    return {"manual_status": status, "manual_bytes": tamanho, "manual_sha256": sha}
+
+
+async def baixar_pdf(resposta, diretorio):
+    """Grava o corpo no repositório calculando o sha256 em streaming. Devolve (status, bytes, sha)."""
+    pasta_tmp = os.path.join(diretorio, "tmp")
+    os.makedirs(pasta_tmp, exist_ok=True)
+    sha = hashlib.sha256()
+    tamanho = 0
+    descritor, temporario = tempfile.mkstemp(dir=pasta_tmp, suffix=".part")
+    try:
+        with os.fdopen(descritor, 'wb') as f:
+            async for bloco in resposta.content.iter_chunked(TAMANHO_BLOCO):
+                if tamanho == 0 and not bloco.startswith(ASSINATURA_PDF):
+                    return "nao_pdf", None, None
+                sha.update(bloco)
+                f.write(bloco)
+                tamanho += len(bloco)
+        if tamanho == 0: return "vazio", 0, None
+        digest = sha.hexdigest()
+        destino = caminho_objeto(diretorio, digest)
+        if os.path.exists(destino):
+            return "ok", tamanho, digest  # ficha idêntica já guardada (outra URL/versão)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        os.replace(temporario, destino)
+        return "ok", tamanho, digest
+    finally:
+        if os.path.exists(temporario): os.remove(temporario)
+
+async def verificar_manual(sessao, url, diretorio, indice, baixar):
+    """HEAD e depois GET (com Range quando só valida) de uma URL de manual."""
+    etag = last_modified = tamanho_head = None
+    try:
+        async with sessao.head(url, allow_redirects=True) as resposta:
+            # Alguns servidores não aceitam HEAD (403/405/501): segue direto para o GET
+            if resposta.status in (404, 410):
+                return resultado(f"http_{resposta.status}")
+            if resposta.status < 400:
+                etag = resposta.headers.get("ETag")
+                last_modified = resposta.headers.get("Last-Modified")
+                tamanho_head = resposta.headers.get("Content-Length")
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        pass
+
+    anterior = indice.get(url)
+    if baixar and anterior and (etag or last_modified) and anterior.get("etag") == etag and anterior.get("last_modified") == last_modified \
+            and os.path.exists(caminho_objeto(diretorio, anterior["manual_sha256"])):
+        return resultado("ok", anterior["manual_bytes"], anterior["manual_sha256"])
+
+    cabecalhos = {} if baixar else {"Range": f"bytes=0-{BYTES_AMOSTRA - 1}"}
+    try:
+        async with sessao.get(url, headers=cabecalhos, allow_redirects=True) as resposta:
+            if resposta.status not in (200, 206):
+                return resultado(f"http_{resposta.status}")
+            if not baixar:
+                amostra = await resposta.content.read(BYTES_AMOSTRA)
+                if not amostra.startswith(ASSINATURA_PDF): return resultado("nao_pdf")
+                total = resposta.headers.get("Content-Range", "").rpartition("/")[2] or tamanho_head
+                return resultado("ok", int(total) if total and total.isdigit() else None)
+            status, tamanho, sha = await baixar_pdf(resposta, diretorio)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return resultado(f"erro_{type(e).__name__}")
+
+    if status == "ok":
+        indice[url] = {"manual_sha256": sha, "manual_bytes": tamanho, "etag": etag, "last_modified": last_modified}
+    return resultado(status, tamanho, sha)
+
+async def verificar_manuais_async(urls, diretorio, conexoes, baixar, timeout, cabecalhos=None):
+    indice = carregar_indice(diretorio)
+    conector = aiohttp.TCPConnector(limit=conexoes, limit_per_host=conexoes)
+    async with aiohttp.ClientSession(connector=conector, headers=cabecalhos,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as sessao:
+        resultados = await asyncio.gather(*(verificar_manual(sessao, url, diretorio, indice, baixar) for url in urls),
+                                          return_exceptions=True)
+    # Uma falha inesperada (ex: OSError gravando o repositório) vira o status daquela URL, não derruba as outras
+    resultados = [resultado(f"erro_{type(r).__name__}") if isinstance(r, BaseException) else r for r in resultados]
+    if baixar:
+        try:
+            salvar_indice(diretorio, indice)
+        except OSError as e:
+            print(f"⚠️ Índice dos manuais não foi salvo ({e}). A próxima execução baixa de novo.")
+    return dict(zip(urls, resultados))
+
+
+def verificar_manuais(urls, diretorio=".cache_manuais", conexoes=8, baixar=True, timeout=60, cabecalhos=None):
+    """Confere (e opcionalmente baixa) as URLs de manual, cada uma uma única vez.
+
+    Devolve {url: {"manual_status", "manual_bytes", "manual_sha256"}}; manual_status é
+    "ok", "nao_pdf", "vazio", "http_<código>" ou "erro_<exceção>".
+    """
+    urls = sorted({url for url in urls if url})
+    if not urls: return {}
+    if importar_aiohttp() is None: raise RuntimeError("aiohttp não está instalado")
+    return asyncio.run(verificar_manuais_async(urls, diretorio, conexoes, baixar, timeout, cabecalhos))
+
+def anexar_campos_manual(registro, resultados):
+    """Devolve o registro com os campos manual_* logo depois de manual_url."""
+    url = registro.get("manual_url")
+    campos = resultados.get(url) or resultado("sem_url" if not url else None)
+    novo = {}
+    for chave, valor in registro.items():
+        if chave in CAMPOS_MANUAL: continue
+        novo[chave] = valor
+        if chave == "manual_url": novo.update(campos)
+    if "manual_url" not in registro: novo.update(campos)
+    return novo
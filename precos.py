@@ -0,0 +1,154 @@
+# precos.py
+# Preços: converte o texto do site ("R$ 129.990", "A partir de R$ 99.990,90") em centavos e
+# mantém um histórico local em SQLite com uma linha por MUDANÇA de preço de cada
+# (marca, modelo, versao). Meses de execuções diárias com preço estável continuam sendo
+# uma linha por versão, e as consultas usam só o índice (sem varrer snapshots).
+#
+# Uso: python precos.py [--banco citroen_precos.db] em AAAA-MM-DD [--modelo C3 --versao "C3 Feel"]
+#      python precos.py [--banco citroen_precos.db] desde AAAA-MM-DD
+
+import argparse
+import datetime
+import json
+import os
+import re
+import sqlite3
+
+# Com "R$" vale qualquer número; sem ele, só com separador de milhar (não confunde com ano).
+# O milhar é só ".": espaço separa números ("R$ 259.990 150 cv" não vira 259.990.150)
+REGEX_PRECO = re.compile(r"(?<![\d.,])(\d{1,3}(?:\.\d{3})+)(?:,(\d{1,2}))?(?![\d.]\d)")
+REGEX_PRECO_MOEDA = re.compile(r"R\$\s*(\d{1,3}(?:\.\d{3})+|\d+)(?:,(\d{1,2}))?(?![\d.]\d)")
+# Antes do valor: "48x de R$ 2.999", "parcelas de R$ 1.999" (a parcela não é o preço do carro)
+REGEX_PARCELA = re.compile(r"\d+\s*x\s*(?:de\s*)?$|parcela", re.IGNORECASE)
+# "De R$ 150.000 por R$ 129.990": vale o preço depois do "por"
+REGEX_POR = re.compile(r"\bpor\s*$", re.IGNORECASE)
+
+
+def preco_moeda(texto):
+    """Match do preço com "R$" (ou None) e se o texto tinha algum "R$".
+
+    Parcelas não contam; entre vários valores vale o que vem depois de "por", senão o último.
+    """
+    validos, inicio_trecho, achou = [], 0, False
+    for encontrado in REGEX_PRECO_MOEDA.finditer(texto or ""):
+        achou = True
+        prefixo = texto[max(inicio_trecho, encontrado.start() - 30):encontrado.start()]
+        if not REGEX_PARCELA.search(prefixo): validos.append((encontrado, bool(REGEX_POR.search(prefixo))))
+        inicio_trecho = encontrado.end()
+    por = [encontrado for encontrado, depois_de_por in validos if depois_de_por]
+    return (por or [encontrado for encontrado, _ in validos] or [None])[-1], achou
+
+def trecho_preco(texto):
+    """Trecho com cara de preço (com "R$") num texto maior, ou None. Parcelas ("48x de R$ ...") não contam."""
+    encontrado, _ = preco_moeda(texto)
+    return encontrado.group(0).strip() if encontrado else None
+
+def centavos(texto):
+    """Preço em centavos (int) ou None. "R$ 129.990" -> 12999000, "R$ 99.990,9" -> 9999090."""
+    if not texto: return None
+    encontrado, achou = preco_moeda(texto)
+    if not achou: encontrado = REGEX_PRECO.search(texto)
+    if not encontrado: return None
+    reais = int(re.sub(r"\D", "", encontrado.group(1)))
+    return reais * 100 + int((encontrado.group(2) or "0").ljust(2, "0"))
+
+def parsear_preco(texto):
+    """{"preco_centavos": int ou None, "preco_texto": texto original ou None}."""
+    texto = " ".join(texto.split()) if isinstance(texto, str) else None
+    return {"preco_centavos": centavos(texto), "preco_texto": texto or None}
+
+
+SCHEMA_HISTORICO = """
+CREATE TABLE IF NOT EXISTS precos (
+    marca TEXT NOT NULL,
+    modelo TEXT NOT NULL,
+    versao TEXT NOT NULL,
+    desde TEXT NOT NULL,          -- AAAA-MM-DD da execução em que o preço apareceu
+    centavos INTEGER NOT NULL,
+    texto TEXT,
+    PRIMARY KEY (marca, modelo, versao, desde)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_precos_desde ON precos (desde);
+"""
+
+
+class HistoricoPrecos:
+    """Histórico de preços comprimido por delta: só grava quando o preço muda."""
+
+    def __init__(self, caminho):
+        pasta = os.path.dirname(caminho)
+        if pasta: os.makedirs(pasta, exist_ok=True)
+        self.caminho = caminho
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA_HISTORICO)
+
+    def registrar(self, registros, data=None):
+        """Grava os preços de uma execução. Devolve quantas versões mudaram de preço.
+
+        Idempotente por dia: rodar de novo na mesma data substitui a linha daquela data.
+        """
+        data = data or datetime.date.today().isoformat()
+        mudancas = 0
+        with self.conn:
+            for registro in registros:
+                valor = registro.get("preco_centavos")
+                if valor is None: valor = centavos(registro.get("preco"))
+                chave = (registro.get("marca") or "citroen", registro.get("modelo"), registro.get("versao"))
+                if valor is None or not chave[1] or not chave[2]: continue  # sem preço não é mudança
+                anterior = self.conn.execute(
+                    "SELECT centavos FROM precos WHERE marca = ? AND modelo = ? AND versao = ? AND desde < ? ORDER BY desde DESC LIMIT 1",
+                    (*chave, data)).fetchone()
+                if anterior is not None and anterior["centavos"] == valor:
+                    self.conn.execute("DELETE FROM precos WHERE marca = ? AND modelo = ? AND versao = ? AND desde = ?", (*chave, data))
+                    continue
+                self.conn.execute("INSERT OR REPLACE INTO precos VALUES (?, ?, ?, ?, ?, ?)", (*chave, data, valor, registro.get("preco")))
+                mudancas += 1
+        return mudancas
+
+    def preco_em(self, modelo, versao, data, marca="citroen"):
+        """Preço vigente na data: {"desde", "centavos", "texto"} ou None."""
+        linha = self.conn.execute(
+            "SELECT desde, centavos, texto FROM precos WHERE marca = ? AND modelo = ? AND versao = ? AND desde <= ? ORDER BY desde DESC LIMIT 1",
+            (marca, modelo, versao, data)).fetchone()
+        return dict(linha) if linha else None
+
+    def catalogo_em(self, data, marca="citroen"):
+        """Preço vigente de todas as versões na data."""
+        return [dict(linha) for linha in self.conn.execute(
+            "SELECT modelo, versao, desde, centavos, texto FROM precos p WHERE marca = ? AND desde = "
+            "(SELECT MAX(desde) FROM precos WHERE marca = p.marca AND modelo = p.modelo AND versao = p.versao AND desde <= ?) "
+            "ORDER BY modelo, versao", (marca, data))]
+
+    def mudancas_desde(self, data, marca="citroen"):
+        """Mudanças depois da data (exclusive), com o preço anterior (None = versão nova)."""
+        return [dict(linha) for linha in self.conn.execute(
+            "SELECT modelo, versao, desde, centavos, texto, "
+            "(SELECT centavos FROM precos a WHERE a.marca = p.marca AND a.modelo = p.modelo AND a.versao = p.versao "
+            " AND a.desde < p.desde ORDER BY a.desde DESC LIMIT 1) AS centavos_anterior "
+            "FROM precos p WHERE marca = ? AND desde > ? ORDER BY desde, modelo, versao", (marca, data))]
+
+    def fechar(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta o histórico de preços.")
+    parser.add_argument("--banco", default=os.environ.get("CRAWLER_HISTORICO_PRECOS") or "citroen_precos.db")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    em = sub.add_parser("em", help="preços vigentes numa data")
+    em.add_argument("data")
+    em.add_argument("--modelo")
+    em.add_argument("--versao")
+    desde = sub.add_parser("desde", help="mudanças de preço depois de uma data")
+    desde.add_argument("data")
+    args = parser.parse_args()
+    historico = HistoricoPrecos(args.banco)
+    if args.comando == "desde":
+        resultado = historico.mudancas_desde(args.data)
+    elif args.modelo and args.versao:
+        resultado = historico.preco_em(args.modelo, args.versao, args.data)
+    else:
+        resultado = [linha for linha in historico.catalogo_em(args.data) if not args.modelo or linha["modelo"] == args.modelo]
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    historico.fechar()
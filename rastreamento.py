@@ -0,0 +1,157 @@
+# rastreamento.py
+# Rastreamento por etapa de uma execução do crawler: tempo de parede, comandos WebDriver,
+# consultas ao Supabase e retentativas, por modelo e por etapa. Exporta:
+#   - um trace no formato Chrome/Perfetto (abrir em chrome://tracing ou ui.perfetto.dev)
+#   - um JSON de métricas resumidas, para comparar execuções agendadas
+#
+# Uso:
+#   with etapa("modelo", modelo="C3"):      # escopo das métricas do modelo nesta thread
+#       ...; fim_etapa("carregar_pagina")   # fecha a etapa que começou no marco anterior
+#       ...; fim_etapa("comparativo")
+#   contar("retentativas")                  # soma no modelo em andamento (e no total)
+
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+
+INICIO = time.perf_counter()
+INICIO_ISO = datetime.datetime.now().isoformat(timespec="seconds")
+
+eventos = []
+metricas_modelos = {}
+metricas_etapas = {}
+contadores_totais = {}
+nomes_threads = {}
+lock = threading.Lock()
+local = threading.local()
+
+
+def reiniciar():
+    """Zera o relógio, os eventos e as métricas (uma execução nova no mesmo processo)."""
+    global INICIO, INICIO_ISO
+    with lock:
+        INICIO = time.perf_counter()
+        INICIO_ISO = datetime.datetime.now().isoformat(timespec="seconds")
+        eventos.clear()
+        metricas_modelos.clear()
+        metricas_etapas.clear()
+        contadores_totais.clear()
+        nomes_threads.clear()
+
+def microssegundos(instante):
+    return round((instante - INICIO) * 1e6)
+
+def contadores_thread():
+    if not hasattr(local, "contadores"): local.contadores = {}
+    return local.contadores
+
+def diferenca(antes, depois):
+    return {chave: valor - antes.get(chave, 0) for chave, valor in depois.items() if valor != antes.get(chave, 0)}
+
+def contar(metrica, n=1):
+    """Soma n ao contador da thread (o modelo em andamento o recebe como delta) e ao total."""
+    contadores = contadores_thread()
+    contadores[metrica] = contadores.get(metrica, 0) + n
+    with lock:
+        contadores_totais[metrica] = contadores_totais.get(metrica, 0) + n
+
+def registrar_evento(nome, inicio, duracao, categoria="etapa", modelo=None, args=None):
+    """Grava um evento completo (ph "X"). inicio em time.perf_counter(), duracao em segundos."""
+    evento = {
+        "name": nome, "cat": categoria, "ph": "X",
+        "ts": microssegundos(inicio), "dur": round(duracao * 1e6),
+        "pid": os.getpid(), "tid": threading.get_ident(),
+        "args": {**({"modelo": modelo} if modelo else {}), **(args or {})},
+    }
+    with lock:
+        eventos.append(evento)
+        nomes_threads[evento["tid"]] = threading.current_thread().name
+        if categoria != "etapa": return
+        dados = metricas_etapas.setdefault(nome, {"chamadas": 0, "duracao_s": 0.0, "max_s": 0.0})
+        dados["chamadas"] += 1
+        dados["duracao_s"] += duracao
+        dados["max_s"] = max(dados["max_s"], duracao)
+        if modelo:
+            etapas = metricas_modelos.setdefault(modelo, {"duracao_s": 0.0, "etapas": {}})["etapas"]
+            etapas[nome] = etapas.get(nome, 0.0) + duracao
+
+def marcar():
+    local.marco = (time.perf_counter(), dict(contadores_thread()))
+
+def fim_etapa(nome, **args):
+    """Fecha a etapa sequencial que começou no último marco desta thread e abre a próxima."""
+    if not hasattr(local, "marco"): marcar()
+    inicio, antes = local.marco
+    registrar_evento(nome, inicio, time.perf_counter() - inicio, modelo=getattr(local, "modelo", None),
+                     args={**args, **diferenca(antes, contadores_thread())})
+    marcar()
+
+@contextlib.contextmanager
+def etapa(nome, modelo=None, categoria="etapa", **args):
+    """Mede um bloco. Com modelo=..., o bloco vira o escopo das métricas daquele modelo."""
+    anterior = getattr(local, "modelo", None)
+    if modelo is not None: local.modelo = modelo
+    modelo_atual = getattr(local, "modelo", None)
+    antes = dict(contadores_thread())
+    inicio = time.perf_counter()
+    marcar()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        deltas = diferenca(antes, contadores_thread())
+        registrar_evento(nome, inicio, duracao, categoria, modelo_atual, {**args, **deltas})
+        if modelo is not None:
+            with lock:
+                dados = metricas_modelos.setdefault(modelo, {"duracao_s": 0.0, "etapas": {}})
+                dados["duracao_s"] += duracao
+                for chave, valor in deltas.items():
+                    dados[chave] = dados.get(chave, 0) + valor
+            local.modelo = anterior
+        marcar()
+
+
+def anotar_modelo(modelo, **campos):
+    """Acrescenta campos às métricas do modelo (ex: desfecho e número de tentativas)."""
+    with lock:
+        metricas_modelos.setdefault(modelo, {"duracao_s": 0.0, "etapas": {}}).update(campos)
+
+
+def resumo():
+    """Métricas resumidas da execução até agora."""
+    with lock:
+        etapas = {nome: {"chamadas": dados["chamadas"], "duracao_s": round(dados["duracao_s"], 3),
+                         "media_s": round(dados["duracao_s"] / dados["chamadas"], 3), "max_s": round(dados["max_s"], 3)}
+                  for nome, dados in metricas_etapas.items()}
+        modelos = {modelo: {**dados, "duracao_s": round(dados["duracao_s"], 3),
+                            "etapas": {nome: round(duracao, 3) for nome, duracao in dados["etapas"].items()}}
+                   for modelo, dados in metricas_modelos.items()}
+        totais = dict(contadores_totais)
+    desfechos = {}
+    for dados in modelos.values():
+        if "desfecho" in dados: desfechos[dados["desfecho"]] = desfechos.get(dados["desfecho"], 0) + 1
+    return {
+        "inicio": INICIO_ISO,
+        "duracao_total_s": round(time.perf_counter() - INICIO, 3),
+        "modelos_processados": len(modelos),
+        "contadores": totais,
+        "desfechos": dict(sorted(desfechos.items())),
+        "etapas": dict(sorted(etapas.items(), key=lambda item: -item[1]["duracao_s"])),
+        "modelos": modelos,
+    }
+
+def exportar(diretorio=".", prefixo="citroen"):
+    """Grava <prefixo>_trace.json (Chrome/Perfetto) e <prefixo>_metricas.json. Devolve o resumo."""
+    metricas = resumo()
+    with lock:
+        trace = {"traceEvents": list(eventos), "displayTimeUnit": "ms", "otherData": {"inicio": INICIO_ISO}}
+        trace["traceEvents"] += [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": nome}}
+                                 for tid, nome in nomes_threads.items()]
+    with open(os.path.join(diretorio, f"{prefixo}_trace.json"), 'w', encoding='utf-8') as f:
+        json.dump(trace, f, ensure_ascii=False)
+    with open(os.path.join(diretorio, f"{prefixo}_metricas.json"), 'w', encoding='utf-8') as f:
+        json.dump(metricas, f, indent=2, ensure_ascii=False)
+    return metricas
@@ -0,0 +1,258 @@
+# servico.py
+# Modo serviço: mantém navegadores aquecidos (Chrome aberto, home já visitada, cookies e
+# cache do site guardados) e recebe jobs de coleta por HTTP local. Um job de um modelo
+# leva segundos, sem a partida a frio do Chrome, do hub-loader e do menu hambúrguer.
+#
+# Uso: python servico.py [--porta 8765] [--sessoes 1]
+#   POST /jobs   {"tipo": "catalogo"}                    -> coleta completa (mesmos arquivos do crawler.py)
+#                {"tipo": "modelo", "url": "https://..."} -> versões de um modelo
+#                {"tipo": "modelos", "urls": [...]} ou {"tipo": "modelos", "modelos": ["C3", ...]}
+#                "esperar": true responde só quando o job termina
+#   GET  /jobs/<id>  -> estado e resultado do job
+#   GET  /saude      -> sessões e jobs na fila
+#
+# Cada sessão é um Chrome com uma fila própria de trabalho; entre jobs ela fecha abas extras e
+# volta para about:blank (cookies e cache continuam). Sessão que parar de responder é recriada.
+# Cada job começa uma execução nova (crawler.reiniciar_execucao), a não ser que outro esteja rodando.
+# A lista de modelos do menu fica em memória por CRAWLER_SERVICO_TTL_MODELOS segundos.
+
+import argparse
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import crawler
+
+PORTA = int(os.environ.get("CRAWLER_SERVICO_PORTA", "8765"))
+SESSOES = int(os.environ.get("CRAWLER_SERVICO_SESSOES", "1"))
+TTL_MODELOS = float(os.environ.get("CRAWLER_SERVICO_TTL_MODELOS", "3600"))
+TIPOS_JOB = ("catalogo", "modelo", "modelos")
+
+
+class SessaoAquecida:
+    """Um Chrome reaproveitado entre jobs."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.navegador = crawler.NavegadorSobDemanda()
+        self.jobs = 0
+
+    def aquecer(self):
+        """Abre o Chrome e carrega a home uma vez (cookies, cache e conexões ficam prontos)."""
+        inicio = time.perf_counter()
+        try:
+            driver = self.navegador.obter()
+            driver.get(crawler.URL_BASE)
+            crawler.WebDriverWait(driver, 30).until(
+                crawler.EC.invisibility_of_element_located((crawler.By.CSS_SELECTOR, "div[data-testid='hub-loader']")))
+            print(f"✔️ Sessão {self.nome} aquecida em {time.perf_counter() - inicio:.1f}s.")
+        except Exception as e:
+            print(f"⚠️ Sessão {self.nome}: aquecimento incompleto ({e}). Ela abre no primeiro job.")
+
+    def limpar(self):
+        """Entre jobs: fecha abas extras e sai da página, sem perder cookies nem cache."""
+        driver = self.navegador.driver
+        if driver is None: return
+        try:
+            janelas = driver.window_handles
+            for janela in janelas[1:]:
+                driver.switch_to.window(janela)
+                driver.close()
+            driver.switch_to.window(janelas[0])
+            driver.get("about:blank")
+        except Exception as e:
+            print(f"⚠️ Sessão {self.nome} não respondeu ({e}). Um Chrome novo abre no próximo job.")
+            try:
+                self.navegador.fechar()
+            except Exception:
+                pass
+            self.navegador.driver = None
+
+
+class ServicoCrawler:
+    """Fila de jobs atendida por sessões aquecidas."""
+
+    def __init__(self, sessoes=SESSOES, ttl_modelos=TTL_MODELOS):
+        self.sessoes = [SessaoAquecida(f"sessao-{i}") for i in range(max(1, sessoes))]
+        self.ttl_modelos = ttl_modelos
+        self.fila = queue.Queue()
+        self.jobs = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.catalogo_lock = threading.Lock()  # o catálogo grava os arquivos de saída compartilhados
+        self.modelos = {}
+        self.modelos_em = 0.0
+        self.ativos = 0  # jobs em andamento; jobs simultâneos compartilham a mesma execução
+
+    def iniciar(self, aquecer=True):
+        for sessao in self.sessoes:
+            threading.Thread(target=self._atender, args=(sessao, aquecer), name=sessao.nome, daemon=True).start()
+
+    def enviar(self, pedido):
+        """Valida e enfileira um job. Devolve o job (dict) ou levanta ValueError."""
+        tipo = pedido.get("tipo") or ("modelo" if pedido.get("url") else "modelos" if pedido.get("urls") or pedido.get("modelos") else "catalogo")
+        if tipo not in TIPOS_JOB: raise ValueError(f"tipo de job desconhecido: {tipo}")
+        if tipo == "modelo" and not pedido.get("url"): raise ValueError("job 'modelo' precisa de 'url'")
+        if tipo == "modelos" and not (pedido.get("urls") or pedido.get("modelos")): raise ValueError("job 'modelos' precisa de 'urls' ou 'modelos'")
+        with self.lock:
+            job = {"id": str(next(self.ids)), "tipo": tipo, "pedido": pedido, "estado": "na_fila",
+                   "criado": time.time(), "sessao": None, "duracao_s": None, "resultado": None, "erro": None}
+            self.jobs[job["id"]] = job
+        job["concluido"] = threading.Event()
+        self.fila.put(job)
+        return job
+
+    def saude(self):
+        with self.lock:
+            estados = [job["estado"] for job in self.jobs.values()]
+        return {
+            "sessoes": [{"nome": sessao.nome, "navegador_aberto": sessao.navegador.driver is not None, "jobs": sessao.jobs}
+                        for sessao in self.sessoes],
+            "na_fila": estados.count("na_fila"),
+            "executando": estados.count("executando"),
+            "jobs": len(estados),
+            "modelos_em_cache": len(self.modelos),
+        }
+
+    def _atender(self, sessao, aquecer):
+        if aquecer: sessao.aquecer()
+        while True:
+            job = self.fila.get()
+            job.update(estado="executando", sessao=sessao.nome)
+            inicio = time.perf_counter()
+            try:
+                job["resultado"] = self._executar(job, sessao)
+                job["estado"] = "concluido"
+            except Exception as e:
+                print(f"❌ ERRO no job {job['id']} ({job['tipo']}): {e}")
+                job.update(estado="erro", erro=str(e))
+            job["duracao_s"] = round(time.perf_counter() - inicio, 3)
+            print(f"✔️ Job {job['id']} ({job['tipo']}) {job['estado']} em {job['duracao_s']:.1f}s na {sessao.nome}.")
+            sessao.jobs += 1
+            sessao.limpar()
+            job["concluido"].set()
+
+    def _modelos(self, sessao):
+        """Mapa do menu, reaproveitado enquanto estiver dentro do TTL."""
+        if not self.modelos or time.time() - self.modelos_em > self.ttl_modelos:
+            modelos = crawler.CrawlerCitroen(navegador=sessao.navegador).descobrir_modelos()
+            if modelos:
+                self.modelos, self.modelos_em = modelos, time.time()
+            return modelos
+        return self.modelos
+
+    def _executar(self, job, sessao):
+        """Roda o job. Sem outro job em andamento, ele começa uma execução nova (data, estado e métricas zerados)."""
+        with self.lock:
+            if not self.ativos: crawler.reiniciar_execucao()
+            self.ativos += 1
+        try:
+            return self._rodar(job, sessao)
+        finally:
+            with self.lock:
+                self.ativos -= 1
+
+    def _rodar(self, job, sessao):
+        pedido = job["pedido"]
+        if job["tipo"] == "catalogo":
+            with self.catalogo_lock:
+                coleta = crawler.CrawlerCitroen(num_workers=1, navegador=sessao.navegador, retomar=bool(pedido.get("retomar")))
+                coleta.modelos = self._modelos(sessao)
+                try:
+                    coleta.processar(fechar_navegador=False)
+                finally:
+                    sessao.navegador = coleta.navegador  # trocado se o prazo derrubou o anterior
+                total = coleta.salvar()
+            return {"modelos": len(coleta.modelos), "versoes": total, "arquivo": os.path.abspath(crawler.ARQUIVO_SAIDA)}
+
+        if job["tipo"] == "modelo":
+            alvos = [(pedido.get("modelo"), pedido["url"])]
+        else:
+            alvos = [(None, url) for url in pedido.get("urls") or []]
+            if pedido.get("modelos"):
+                modelos = self._modelos(sessao)
+                faltando = [nome for nome in pedido["modelos"] if nome not in modelos]
+                if faltando: raise ValueError(f"modelos fora do menu: {', '.join(faltando)}")
+                alvos += [(nome, modelos[nome]["site_url"]) for nome in pedido["modelos"]]
+        coleta = crawler.CrawlerCitroen(navegador=sessao.navegador)
+        coleta.modelos = self.modelos
+        resultado = {}
+        try:
+            for modelo, url in alvos:
+                modelo = modelo or next((nome for nome, dados in self.modelos.items() if dados["site_url"] == url), None) or crawler.nome_modelo_url(url)
+                versoes = coleta.extrair_modelo(url, modelo) or []
+                resultado[modelo] = [crawler.ordenar_versao(versao, modelo) for versao in versoes]
+        finally:
+            sessao.navegador = coleta.navegador
+        return {"modelos": resultado, "versoes": sum(len(versoes) for versoes in resultado.values())}
+
+
+def publico(job):
+    return {chave: valor for chave, valor in job.items() if chave != "concluido"}
+
+
+class ManipuladorServico(BaseHTTPRequestHandler):
+    servico = None
+
+    def responder(self, status, dados):
+        corpo = json.dumps(dados, ensure_ascii=False, indent=2).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/saude":
+            return self.responder(200, self.servico.saude())
+        if self.path.startswith("/jobs/"):
+            job = self.servico.jobs.get(self.path[len("/jobs/"):].strip("/"))
+            return self.responder(200, publico(job)) if job else self.responder(404, {"erro": "job não encontrado"})
+        self.responder(404, {"erro": "caminho desconhecido"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self.responder(404, {"erro": "caminho desconhecido"})
+        try:
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            pedido = json.loads(self.rfile.read(tamanho) or b"{}")
+            job = self.servico.enviar(pedido)
+        except ValueError as e:
+            return self.responder(400, {"erro": str(e)})
+        if pedido.get("esperar"):
+            job["concluido"].wait()
+            return self.responder(200, publico(job))
+        self.responder(202, publico(job))
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def servir(servico, porta=PORTA, host="127.0.0.1"):
+    """Sobe o servidor HTTP numa thread. Devolve (servidor, url_base)."""
+    manipulador = type("Manipulador", (ManipuladorServico,), {"servico": servico})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    threading.Thread(target=servidor.serve_forever, name="servico-http", daemon=True).start()
+    return servidor, f"http://{host}:{servidor.server_port}/"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serviço de coleta com navegadores aquecidos.")
+    parser.add_argument("--porta", type=int, default=PORTA)
+    parser.add_argument("--sessoes", type=int, default=SESSOES, help="navegadores aquecidos (um job por vez em cada)")
+    parser.add_argument("--sem-aquecer", action="store_true", help="abre o Chrome só no primeiro job")
+    args = parser.parse_args()
+    servico = ServicoCrawler(args.sessoes)
+    servico.iniciar(aquecer=not args.sem_aquecer)
+    servidor, url = servir(servico, args.porta)
+    print(f"✔️ Serviço do crawler em {url} ({len(servico.sessoes)} sessão(ões)). Ctrl+C para sair.")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+        for sessao in servico.sessoes:
+            sessao.navegador.fechar()
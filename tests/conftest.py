@@ -0,0 +1,28 @@
+# tests/conftest.py
+# Testes offline: nada acessa a rede externa nem abre o Chrome. O crawler.py só importa o
+# selenium quando o navegador entra em uso, então os testes rodam sem ele instalado.
+#
+# Uso: python -m pytest -q tests
+
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [RAIZ, os.path.join(RAIZ, "benchmarks")]
+
+
+@pytest.fixture
+def crawler(monkeypatch, tmp_path):
+    """crawler.py importado, rodando num diretório temporário e sem Supabase/SQLite."""
+    import crawler as modulo
+    monkeypatch.chdir(tmp_path)
+    for nome, valor in {
+        "supabase": None, "supabase_iniciado": True,
+        "destino_sqlite": None, "sqlite_iniciado": True, "SQLITE_PATH": "",
+        "versoes_existentes": None, "versoes_existentes_iniciado": False,
+        "MODO_DOM": "", "estado_anterior": {}, "estado_atual": {},
+    }.items():
+        monkeypatch.setattr(modulo, nome, valor)
+    return modulo
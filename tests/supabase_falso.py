@@ -0,0 +1,75 @@
+# tests/supabase_falso.py
+# Cliente falso do supabase-py: guarda as linhas em memória, aplica eq/range/upsert como o
+# PostgREST e conta cada execute(). falhar_em = {"select": erro, "upsert": [erro, erro, None]}
+# levanta o erro (ou a sequência de erros, um por chamada) antes de executar.
+
+class Resposta:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class Consulta:
+    def __init__(self, cliente, tabela):
+        self.cliente = cliente
+        self.tabela = tabela
+        self.filtros = []
+        self.intervalo = None
+        self.contar = None
+        self.operacao = None
+        self.linhas = None
+
+    def select(self, colunas, count=None):
+        self.operacao = "select"
+        self.colunas = [coluna.strip() for coluna in colunas.split(",")]
+        self.contar = count
+        return self
+
+    def eq(self, coluna, valor):
+        self.filtros.append((coluna, valor))
+        return self
+
+    def range(self, inicio, fim):
+        self.intervalo = (inicio, fim)
+        return self
+
+    def upsert(self, linhas, on_conflict=None):
+        self.operacao = "upsert"
+        self.linhas = linhas
+        self.on_conflict = on_conflict
+        return self
+
+    def execute(self):
+        self.cliente.chamadas.append(self)
+        erro = self.cliente.proximo_erro(self.operacao)
+        if erro is not None: raise erro
+        tabela = self.cliente.tabelas.setdefault(self.tabela, [])
+        if self.operacao == "upsert":
+            chave = self.on_conflict.split(",")
+            for linha in self.linhas:
+                existente = next((atual for atual in tabela if all(atual.get(c) == linha.get(c) for c in chave)), None)
+                if existente is not None: existente.update(linha)
+                else: tabela.append(dict(linha))
+            return Resposta(self.linhas)
+        linhas = [linha for linha in tabela if all(linha.get(coluna) == valor for coluna, valor in self.filtros)]
+        total = len(linhas)
+        if self.intervalo: linhas = linhas[self.intervalo[0]:self.intervalo[1] + 1]
+        return Resposta([{coluna: linha.get(coluna) for coluna in self.colunas} for linha in linhas], total if self.contar else None)
+
+
+class SupabaseFalso:
+    def __init__(self, tabelas=None, falhar_em=None):
+        self.tabelas = tabelas or {}
+        self.falhar_em = falhar_em or {}
+        self.chamadas = []
+
+    def table(self, nome):
+        return Consulta(self, nome)
+
+    def proximo_erro(self, operacao):
+        erro = self.falhar_em.get(operacao)
+        if isinstance(erro, list): return erro.pop(0) if erro else None
+        return erro
+
+    def execucoes(self, operacao):
+        return [chamada for chamada in self.chamadas if chamada.operacao == operacao]
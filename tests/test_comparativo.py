@@ -0,0 +1,81 @@
+# Comparativo entre as versões: parser único sobre matrizes de fixture e a matriz montada
+# a partir do HTML salvo de cada layout (tabela, grid único e múltiplos grids).
+
+from comparativo import parsear_matriz_comparativo
+from site_fixture import catalogo, html_comparativo
+
+MATRIZ_TABELA = {
+    "layout": "tabela",
+    "versoes": ["Feel", "Shine", "Shine"],
+    "linhas": [
+        {"rotulo": "Motor", "valores": ["1.0 Firefly Flex", "1.0 Turbo 200 Flex", ""]},
+        {"rotulo": "Porta-malas", "valores": ["300 L", "310 L", "310 L"]},
+        {"rotulo": "Capacidade/carga", "valores": ["1 ton", "", "1,2 ton"]},
+    ],
+    "pdfs": ["/fichas/feel.pdf", "#", None],
+}
+MATRIZ_GRID_UNICO = {
+    "layout": "grid_unico",
+    "versoes": ["Jumpy Cargo", "Jumpy Cargo"],
+    "linhas": [
+        {"rotulo": "Carga útil", "valores": ["1000 kg", None]},
+        {"rotulo": "Motor", "valores": ["2.2 BlueHDi Diesel", None]},
+        {"rotulo": "Carga útil", "valores": [None, "1100 kg"]},
+    ],
+    "pdfs": ["a.pdf", "b.pdf"],
+}
+MATRIZ_MULTIPLOS_GRIDS = {
+    "layout": "multiplos_grids",
+    "versoes": ["Jumper L3H2", "Jumper L4H3"],
+    "linhas": [
+        {"rotulo": "Motorização e câmbio", "valores": ["2.2 BlueHDi Diesel", "2.2 BlueHDi Diesel"]},
+        {"rotulo": "Capacidade/carga", "valores": ["1.5 ton", None]},
+        {"rotulo": "Consumo na cidade", "valores": ["10 km/l", "9 km/l"]},
+    ],
+    "pdfs": None,
+    "url": "https://www.citroen.com.br/jumper.html",
+}
+
+
+def test_tabela_junta_colunas_de_mesmo_nome():
+    assert parsear_matriz_comparativo(MATRIZ_TABELA, "https://www.citroen.com.br/c3/") == [
+        {"versao_comparativo": "Feel", "motorizacao": "1.0 Firefly Flex", "motor": "1.0", "turbo": None, "combustivel": "Flex",
+         "porta-malas": "300 L", "carga_util": "1 ton", "manual_url": "https://www.citroen.com.br/fichas/feel.pdf"},
+        {"versao_comparativo": "Shine", "motorizacao": "1.0 Turbo 200 Flex", "motor": "1.0", "turbo": "Sim", "combustivel": "Flex",
+         "porta-malas": "310 L", "carga_util": "1,2 ton"},
+    ]
+
+def test_grid_unico_mantem_uma_versao_por_coluna():
+    assert parsear_matriz_comparativo(MATRIZ_GRID_UNICO, "https://www.citroen.com.br/jumpy/") == [
+        {"versao_comparativo": "Jumpy Cargo", "carga_util": "1000 kg", "motorizacao": "2.2 BlueHDi Diesel", "motor": "2.2",
+         "turbo": "Sim", "combustivel": "Diesel", "manual_url": "https://www.citroen.com.br/jumpy/a.pdf"},
+        {"versao_comparativo": "Jumpy Cargo", "carga_util": "1100 kg", "manual_url": "https://www.citroen.com.br/jumpy/b.pdf"},
+    ]
+
+def test_multiplos_grids_rotulos_canonizados():
+    versoes = parsear_matriz_comparativo(MATRIZ_MULTIPLOS_GRIDS, "https://outra.base/")
+    assert [versao["versao_comparativo"] for versao in versoes] == ["Jumper L3H2", "Jumper L4H3"]
+    assert versoes[0]["motorizacao"] == "2.2 BlueHDi Diesel" and versoes[0]["turbo"] == "Sim" and versoes[0]["combustivel"] == "Diesel"
+    assert versoes[0]["carga_util"] == "1.5 ton" and "carga_util" not in versoes[1]
+    assert versoes[1]["consumo_na_cidade"] == "9 km/l"
+
+def test_matriz_vazia():
+    assert parsear_matriz_comparativo(None, "https://x/") == []
+    assert parsear_matriz_comparativo({"layout": "tabela", "versoes": []}, "https://x/") == []
+
+
+def test_matriz_do_html_salvo(crawler):
+    """O HTML de cada layout vira a mesma matriz que o JS_MATRIZ_COMPARATIVO serializa no navegador."""
+    for item in catalogo(modelos=3, versoes=3):
+        area = crawler.lxml_html.fromstring(html_comparativo(item))
+        matriz = crawler.matriz_comparativo_html(area)
+        nomes = [v["nome"] for v in item["versoes"]]
+        assert matriz["layout"] == item["layout"] and matriz["versoes"] == nomes
+        assert matriz["pdfs"] == [v["pdf"] for v in item["versoes"]]
+        versoes = parsear_matriz_comparativo(matriz, "https://www.citroen.com.br/")
+        assert [versao["motorizacao"] for versao in versoes] == [v["motor"] for v in item["versoes"]]
+        if item["layout"] == "tabela":
+            assert [versao["porta-malas"] for versao in versoes] == ["300 L", "310 L", "320 L"]
+        else:
+            assert [versao["carga_util"] for versao in versoes] == (
+                ["1000 kg", "1100 kg", "1200 kg"] if item["layout"] == "grid_unico" else ["1.0 ton", "1.1 ton", "1.2 ton"])
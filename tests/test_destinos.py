@@ -0,0 +1,97 @@
+# DestinoSupabase contra o cliente falso: tamanho dos lotes, deduplicação, retentativa dos
+# erros transitórios e falha imediata dos permanentes.
+
+import pytest
+
+from destinos import DestinoSupabase, erro_transitorio
+from tests.supabase_falso import SupabaseFalso
+
+
+class APIError(Exception):
+    """Como o postgrest.APIError: code é um SQLSTATE (ou PGRSTxxx), não um status HTTP."""
+
+    def __init__(self, erro):
+        super().__init__(erro.get("message"))
+        self.code = erro.get("code")
+        self.message = erro.get("message")
+
+
+class ErroStatus(Exception):
+    """Como o httpx.HTTPStatusError: o status vem em response.status_code."""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = type("Resposta", (), {"status_code": status})()
+
+
+def versoes(n, modelo="C3"):
+    return [{"marca": "citroen", "modelo": modelo, "versao": f"{modelo} V{i}", "preco": f"R$ {i}", "site_url": "fora da tabela"} for i in range(n)]
+
+def destino(cliente, **kwargs):
+    return DestinoSupabase(cliente, tamanho_lote=kwargs.pop("tamanho_lote", 4), espera_base=0, **kwargs)
+
+
+def test_lotes_e_deduplicacao():
+    cliente = SupabaseFalso()
+    fila = destino(cliente)
+    fila.enviar(versoes(3) + [{**versoes(1)[0], "preco": "R$ 99"}])  # C3 V0 repetida no mesmo lote
+    fila.enviar(versoes(3, "Basalt"))
+    fila.enviar(versoes(3, "Jumpy"))
+    estatisticas = fila.fechar()
+    upserts = cliente.execucoes("upsert")
+    # Lotes de 4 registros (o último com o resto); a duplicata sai do lote antes do upsert
+    assert [len(consulta.linhas) for consulta in upserts] == [3, 4, 2]
+    assert all(consulta.on_conflict == "marca,modelo,versao" for consulta in upserts)
+    assert all("site_url" not in linha for consulta in upserts for linha in consulta.linhas)
+    assert next(linha for linha in upserts[0].linhas if linha["versao"] == "C3 V0")["preco"] == "R$ 99"
+    assert len(cliente.tabelas["veiculos"]) == 9
+    assert estatisticas == {"lotes": 3, "linhas": 9, "retentativas": 0, "falhas": 0, "linhas_perdidas": 0}
+
+
+def test_erro_transitorio_e_repetido():
+    erros = [APIError({"code": "40001", "message": "could not serialize access"}), ErroStatus(503), TimeoutError("lento")]
+    cliente = SupabaseFalso(falhar_em={"upsert": erros})
+    fila = destino(cliente)
+    fila.enviar(versoes(2))
+    estatisticas = fila.fechar()
+    assert len(cliente.execucoes("upsert")) == 4
+    assert estatisticas == {"lotes": 1, "linhas": 2, "retentativas": 3, "falhas": 0, "linhas_perdidas": 0}
+    assert len(cliente.tabelas["veiculos"]) == 2
+
+
+def test_erro_permanente_nao_e_repetido():
+    cliente = SupabaseFalso(falhar_em={"upsert": [APIError({"code": "23505", "message": "duplicate key"})]})
+    fila = destino(cliente)
+    fila.enviar(versoes(6))
+    estatisticas = fila.fechar()
+    # O primeiro lote falha de vez (sem retentativa); o segundo é gravado
+    assert [len(consulta.linhas) for consulta in cliente.execucoes("upsert")] == [4, 2]
+    assert estatisticas == {"lotes": 1, "linhas": 2, "retentativas": 0, "falhas": 1, "linhas_perdidas": 4}
+
+
+def test_tentativas_esgotadas():
+    cliente = SupabaseFalso(falhar_em={"upsert": ErroStatus(502)})
+    fila = destino(cliente, tentativas=3)
+    fila.enviar(versoes(1))
+    estatisticas = fila.fechar()
+    assert len(cliente.execucoes("upsert")) == 3
+    assert estatisticas["falhas"] == 1 and estatisticas["retentativas"] == 2 and estatisticas["linhas_perdidas"] == 1
+
+
+@pytest.mark.parametrize("erro, transitorio", [
+    (APIError({"code": "23505"}), False),      # unique_violation
+    (APIError({"code": "42703"}), False),      # coluna inexistente
+    (APIError({"code": "PGRST204"}), False),   # coluna fora do cache do esquema
+    (APIError({"code": "500"}), False),        # não é SQLSTATE da lista (nem status HTTP)
+    (APIError({"code": "40P01"}), True),       # deadlock
+    (APIError({"code": "57014"}), True),       # statement_timeout
+    (APIError({"code": "PGRST001"}), True),    # PostgREST sem conexão com o banco
+    (ErroStatus(429), True),
+    (ErroStatus(504), True),
+    (ErroStatus(400), False),
+    (ErroStatus(409), False),
+    (ConnectionResetError(), True),
+    (ValueError("dado inválido"), False),
+])
+def test_classificacao_dos_erros(erro, transitorio):
+    assert erro_transitorio(erro) is transitorio
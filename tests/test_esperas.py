@@ -0,0 +1,22 @@
+# Política de esperas: cada ponto roda a condição do seu tipo e registra o tempo gasto.
+
+class DriverFalso:
+    def __init__(self):
+        self.scripts = []
+
+    def execute_async_script(self, script, *args):
+        self.scripts.append((script, args))
+        return True
+
+
+def test_todo_tipo_de_espera_esta_em_uso(crawler):
+    assert {tipo for tipo, _ in crawler.ESPERAS.values()} == {"dom", "rede", "condicao", "rolagem"}
+
+def test_menu_expandido_espera_a_rede(crawler, monkeypatch):
+    monkeypatch.setattr(crawler, "telemetria_esperas", {})
+    driver = DriverFalso()
+    assert crawler.aguardar(driver, "carros_expandido") is True
+    script, args = driver.scripts[0]
+    assert script == crawler.JS_REDE_OCIOSA
+    assert args == (int(crawler.ESPERA_QUIETO * 1000), int(crawler.tempo_maximo_espera("carros_expandido") * 1000))
+    assert crawler.telemetria_esperas["carros_expandido"]["chamadas"] == 1
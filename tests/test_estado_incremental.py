@@ -0,0 +1,61 @@
+# Crawl incremental: página sem mudanças reaproveita as versões, mas as duplicatas do Supabase
+# são conferidas de novo a cada execução.
+
+import pytest
+
+from site_fixture import gerar_site, servir
+from tests.supabase_falso import SupabaseFalso
+
+
+@pytest.fixture
+def site(tmp_path_factory):
+    diretorio = str(tmp_path_factory.mktemp("site"))
+    itens = gerar_site(diretorio, modelos=1, versoes=4)
+    servidor, url_base = servir(diretorio)
+    yield itens[0], url_base + itens[0]["caminho"].lstrip("/")
+    servidor.shutdown()
+
+def executar(crawler, monkeypatch, cliente, url, estado_anterior):
+    """Uma execução do modelo com o estado da anterior. Devolve (nomes das versões, estado novo, extraiu a página?)."""
+    monkeypatch.setattr(crawler, "supabase", cliente)
+    monkeypatch.setattr(crawler, "versoes_existentes_iniciado", False)
+    monkeypatch.setattr(crawler, "estado_anterior", estado_anterior)
+    monkeypatch.setattr(crawler, "estado_atual", {})
+    extracoes = []
+    extrair_versoes_html = crawler.extrair_versoes_html
+    monkeypatch.setattr(crawler, "extrair_versoes_html", lambda *args, **kwargs: extracoes.append(1) or extrair_versoes_html(*args, **kwargs))
+    versoes = crawler.extrair_modelo(None, "C1", url)
+    return [versao["versao"] for versao in versoes], crawler.estado_atual, bool(extracoes)
+
+def remoto(*versoes):
+    return {"veiculos": [{"marca": "citroen", "modelo": "C1", "versao": f"C1 Versao {v}"} for v in versoes]}
+
+
+def test_reaproveitamento_confere_duplicatas(crawler, monkeypatch, site):
+    _, url = site
+    cliente = SupabaseFalso(remoto(2))
+    nomes, estado, extraiu = executar(crawler, monkeypatch, cliente, url, {})
+    assert nomes == ["C1 Versao 1", "C1 Versao 3", "C1 Versao 4"]
+    assert estado[url]["puladas"] == ["C1 Versao 2"]
+
+    # Página igual; a versão 3 entrou no Supabase desde a última execução
+    cliente.tabelas = remoto(2, 3)
+    nomes, estado, extraiu = executar(crawler, monkeypatch, cliente, url, estado)
+    assert nomes == ["C1 Versao 1", "C1 Versao 4"] and not extraiu
+    assert estado[url]["puladas"] == ["C1 Versao 2", "C1 Versao 3"]
+
+    # A versão 2 foi apagada do Supabase: os dados dela não estão no estado, a página é extraída de novo
+    cliente.tabelas = remoto(3)
+    nomes, estado, extraiu = executar(crawler, monkeypatch, cliente, url, estado)
+    assert nomes == ["C1 Versao 1", "C1 Versao 2", "C1 Versao 4"] and extraiu
+    assert estado[url]["puladas"] == ["C1 Versao 3"]
+
+
+def test_reaproveitamento_sem_duplicatas(crawler, monkeypatch, site):
+    _, url = site
+    cliente = SupabaseFalso(remoto())
+    nomes, estado, extraiu = executar(crawler, monkeypatch, cliente, url, {})
+    impressao = estado[url]["impressoes"]["http"]
+    nomes_de_novo, estado, extraiu = executar(crawler, monkeypatch, cliente, url, estado)
+    assert nomes_de_novo == nomes and len(nomes) == 4 and not extraiu
+    assert estado[url]["impressoes"]["http"] == impressao and estado[url]["puladas"] == []
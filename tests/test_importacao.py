@@ -0,0 +1,26 @@
+# Importar o crawler.py não abre navegador nem importa o selenium (biblioteca de parsing).
+
+import subprocess
+import sys
+
+from tests.conftest import RAIZ
+
+
+def rodar(codigo):
+    return subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, timeout=60)
+
+
+def test_importa_sem_selenium():
+    # sys.modules["selenium"] = None faz qualquer import do selenium falhar, como se não estivesse instalado
+    resultado = rodar("import sys; sys.modules['selenium'] = None\n"
+                      "import crawler\n"
+                      "print(crawler.classificar_specs(['Motor 1.0 Turbo 200 Flex'])['combustivel'])\n"
+                      "print(crawler.precos.centavos('R$ 99.990'))")
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout.split() == ["Flex", "9999000"]
+
+def test_selenium_so_no_navegador():
+    resultado = rodar("import sys, crawler\n"
+                      "print(any(nome.startswith('selenium') for nome in sys.modules))")
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout.strip() == "False"
@@ -0,0 +1,91 @@
+# Validação e download dos manuais contra um servidor HTTP local (site de fixtures).
+
+import functools
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import manuais
+from site_fixture import PDF_MINIMO, ManipuladorFixture, gerar_site
+
+pytest.importorskip("aiohttp")
+
+
+class ManipuladorContador(ManipuladorFixture):
+    pedidos = None
+
+    def do_HEAD(self):
+        self.pedidos.append(("HEAD", self.path))
+        super().do_HEAD()
+
+    def do_GET(self):
+        self.pedidos.append(("GET", self.path))
+        super().do_GET()
+
+
+@pytest.fixture
+def site(tmp_path):
+    diretorio = str(tmp_path / "site")
+    itens = gerar_site(diretorio, modelos=2, versoes=3)
+    pedidos = []
+    manipulador = type("Manipulador", (ManipuladorContador,), {"pedidos": pedidos})
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(manipulador, directory=diretorio))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url_base = f"http://127.0.0.1:{servidor.server_port}"
+    yield [url_base + v["pdf"] for item in itens for v in item["versoes"]], url_base, pedidos
+    servidor.shutdown()
+
+
+def test_download_deduplica_fichas_identicas(site, tmp_path):
+    pdfs, url_base, _ = site
+    repositorio = str(tmp_path / "manuais")
+    resultados = manuais.verificar_manuais(pdfs + [url_base + "/fichas/nao-existe.pdf", url_base + "/"], repositorio, conexoes=4)
+    assert all(resultados[url] == {"manual_status": "ok", "manual_bytes": len(PDF_MINIMO), "manual_sha256": resultados[pdfs[0]]["manual_sha256"]}
+               for url in pdfs)
+    assert resultados[url_base + "/fichas/nao-existe.pdf"]["manual_status"] == "http_404"
+    assert resultados[url_base + "/"]["manual_status"] == "nao_pdf"
+    # Seis URLs com a mesma ficha viram um só objeto no repositório
+    objetos = [nome for _, _, nomes in os.walk(os.path.join(repositorio, "objetos")) for nome in nomes]
+    assert objetos == [resultados[pdfs[0]]["manual_sha256"] + ".pdf"]
+    assert sorted(manuais.carregar_indice(repositorio)) == sorted(pdfs)
+
+
+def test_segunda_execucao_usa_o_indice(site, tmp_path):
+    pdfs, _, pedidos = site
+    repositorio = str(tmp_path / "manuais")
+    primeira = manuais.verificar_manuais(pdfs, repositorio)
+    pedidos.clear()
+    # ETag/Last-Modified iguais e objeto presente: só HEAD, nenhum GET
+    assert manuais.verificar_manuais(pdfs, repositorio) == primeira
+    assert {metodo for metodo, _ in pedidos} == {"HEAD"} and len(pedidos) == len(pdfs)
+
+
+def test_so_validacao_nao_grava(site, tmp_path):
+    pdfs, _, _ = site
+    repositorio = str(tmp_path / "manuais")
+    resultados = manuais.verificar_manuais(pdfs[:2], repositorio, baixar=False)
+    assert [campos["manual_status"] for campos in resultados.values()] == ["ok", "ok"]
+    assert all(campos["manual_sha256"] is None for campos in resultados.values())
+    assert not os.path.exists(repositorio)
+
+
+def test_falha_inesperada_fica_na_url(site, tmp_path, monkeypatch):
+    pdfs, _, _ = site
+    baixar_pdf = manuais.baixar_pdf
+    async def disco_cheio(resposta, diretorio):
+        if str(resposta.url) == pdfs[0]: raise OSError(28, "No space left on device")
+        return await baixar_pdf(resposta, diretorio)
+    monkeypatch.setattr(manuais, "baixar_pdf", disco_cheio)
+    resultados = manuais.verificar_manuais(pdfs, str(tmp_path / "manuais"))
+    assert resultados[pdfs[0]] == {"manual_status": "erro_OSError", "manual_bytes": None, "manual_sha256": None}
+    assert all(resultados[url]["manual_status"] == "ok" for url in pdfs[1:])
+    assert sorted(manuais.carregar_indice(str(tmp_path / "manuais"))) == sorted(pdfs[1:])
+
+
+def test_campos_logo_depois_do_manual_url():
+    campos = {"manual_status": "ok", "manual_bytes": 10, "manual_sha256": "abc"}
+    registro = manuais.anexar_campos_manual({"versao": "Feel", "manual_url": "u", "motor": "1.0"}, {"u": campos})
+    assert list(registro) == ["versao", "manual_url", "manual_status", "manual_bytes", "manual_sha256", "motor"]
+    assert manuais.anexar_campos_manual({"versao": "Feel", "manual_url": None}, {})["manual_status"] == "sem_url"
@@ -0,0 +1,105 @@
+# Motor HTTP contra o site de fixtures (benchmarks/site_fixture.py), sem navegador.
+# O servidor de fixtures responde "text/html" sem charset, como o caso que quebrava os acentos.
+
+import os
+
+import pytest
+
+from site_fixture import gerar_site, servir
+from tests.supabase_falso import SupabaseFalso
+
+
+@pytest.fixture
+def site(tmp_path_factory):
+    diretorio = str(tmp_path_factory.mktemp("site"))
+    itens = gerar_site(diretorio, modelos=3, versoes=5)
+    servidor, url_base = servir(diretorio)
+    yield diretorio, itens, url_base
+    servidor.shutdown()
+
+def extrair(crawler, item, url_base):
+    return crawler.extrair_modelo_http(item["modelo"], url_base + item["caminho"].lstrip("/"))
+
+def conferir_versoes(versoes, item, url_base):
+    assert [versao["versao"] for versao in versoes] == [v["nome"] for v in item["versoes"]]
+    for versao, esperada in zip(versoes, item["versoes"]):
+        assert versao["motorizacao"] == esperada["motor"]
+        assert versao["combustivel"] is not None
+        assert versao["manual_url"] == url_base + esperada["pdf"].lstrip("/")
+
+
+def test_acentos_sem_charset_no_cabecalho(crawler, site):
+    _, itens, url_base = site
+    item = itens[0]  # carrossel + comparativo em tabela
+    versoes = extrair(crawler, item, url_base)
+    conferir_versoes(versoes, item, url_base)
+    assert versoes[-1]["motorizacao"] == "Motor elétrico 100 kW~136 cv"
+    assert versoes[-1]["combustivel"] == "Elétrico"
+    # O comparativo ("COMPARATIVO ENTRE AS VERSÕES") só casa com o texto decodificado certo
+    assert [versao["porta-malas"] for versao in versoes] == [f"{300 + i * 10} L" for i in range(5)]
+
+
+def test_pagina_sem_meta_charset(crawler, site):
+    diretorio, itens, url_base = site
+    item = itens[2]  # carrossel + múltiplos grids
+    caminho = os.path.join(diretorio, item["caminho"].strip("/"), "index.html")
+    with open(caminho, encoding="utf-8") as f:
+        pagina = f.read()
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write(pagina.replace("<meta charset='utf-8'>", ""))
+    versoes = extrair(crawler, item, url_base)
+    conferir_versoes(versoes, item, url_base)
+    assert [versao["carga_util"] for versao in versoes] == [f"1.{i} ton" for i in range(5)]
+
+
+def test_charset_do_cabecalho_prevalece(crawler):
+    class Resposta:
+        headers = {"Content-Type": "text/html; charset=iso-8859-1"}
+        content = "<p>Elétrico</p>".encode("iso-8859-1")
+        text = content.decode("iso-8859-1")
+    assert crawler.html_resposta(Resposta()) == "<p>Elétrico</p>"
+
+
+@pytest.mark.skipif(os.environ.get("CRAWLER_TESTES_CHROME") != "1", reason="precisa do Chrome (CRAWLER_TESTES_CHROME=1)")
+def test_motor_http_equivale_ao_selenium(crawler, site):
+    _, itens, url_base = site
+    item = itens[0]
+    driver = crawler.criar_driver()
+    try:
+        pelo_selenium = crawler.extrair_modelo_selenium(driver, item["modelo"], url_base + item["caminho"].lstrip("/"))
+    finally:
+        driver.quit()
+    assert extrair(crawler, item, url_base) == pelo_selenium
+
+
+def test_modelo_so_em_js_vai_para_o_selenium(crawler, tmp_path):
+    """Os modelos so_js do site de fixtures (usados pelo bench_e2e) não têm versões no HTML estático."""
+    itens = gerar_site(str(tmp_path / "site"), modelos=2, versoes=2, so_js=1)
+    servidor, url_base = servir(str(tmp_path / "site"))
+    try:
+        assert extrair(crawler, itens[0], url_base)
+        assert extrair(crawler, itens[1], url_base) is None
+    finally:
+        servidor.shutdown()
+
+
+def test_fallback_nao_conta_puladas_duas_vezes(crawler, monkeypatch, tmp_path):
+    """A aba Jumpy com a ficha fora do HTML manda para o Selenium depois de já ter conferido as duplicatas."""
+    itens = gerar_site(str(tmp_path / "site"), modelos=2, versoes=3)
+    item = next(item for item in itens if item["padrao"] == "abas")
+    nomes = [v["nome"] for v in item["versoes"]]
+    monkeypatch.setattr(crawler, "supabase", SupabaseFalso({"veiculos": [
+        {"marca": "citroen", "modelo": item["modelo"], "versao": nomes[0]}]}))
+    monkeypatch.setattr(crawler, "MOTOR_HTTP", True)
+    def selenium_falso(driver, modelo, site_url, levantar=False):
+        return [{"versao": nome} for nome in nomes if not crawler.versao_pulada_supabase(modelo, nome)]
+    monkeypatch.setattr(crawler, "extrair_modelo_selenium", selenium_falso)
+    servidor, url_base = servir(str(tmp_path / "site"))
+    try:
+        antes = crawler.rastreamento.contadores_thread().get("versoes_puladas", 0)
+        versoes = crawler.extrair_modelo(crawler.NavegadorSobDemanda(driver=object()), item["modelo"], url_base + item["caminho"].lstrip("/"))
+    finally:
+        servidor.shutdown()
+    assert [versao["versao"] for versao in versoes] == nomes[1:]
+    assert crawler.versoes_puladas() == [nomes[0]]
+    assert crawler.rastreamento.contadores_thread().get("versoes_puladas", 0) - antes == 1
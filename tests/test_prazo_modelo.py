@@ -0,0 +1,82 @@
+# Prazo por modelo: a tentativa atrasada não grava estado nem snapshot depois que outra foi
+# aceita, e o Chrome do worker só é derrubado quando o prazo estoura.
+
+import threading
+
+import pytest
+
+
+class DriverFalso:
+    def __init__(self):
+        self.morto = threading.Event()
+
+    def quit(self):
+        self.morto.set()
+
+
+@pytest.fixture
+def prazo(crawler, monkeypatch):
+    drivers = []
+    monkeypatch.setattr(crawler, "criar_driver", lambda: drivers.append(DriverFalso()) or drivers[-1])
+    for nome, valor in {"PRAZO_MODELO": 0.3, "TENTATIVAS_MODELO": 2, "HEDGE": False,
+                        "duracoes_anteriores": {}, "duracoes_atuais": {}, "desfechos_modelos": {}}.items():
+        monkeypatch.setattr(crawler, nome, valor)
+    return drivers
+
+def falso(crawler, monkeypatch, roteiro):
+    """extrair_modelo falso: a k-ésima chamada roda roteiro[k](navegador, k) e registra o estado."""
+    chamadas = []
+    def extrair_modelo(navegador, modelo, site_url, levantar=False):
+        chamadas.append(threading.current_thread())
+        k = len(chamadas)
+        versoes = roteiro[k - 1](navegador, k)
+        crawler.registrar_estado(site_url, versoes, "http", f"impressao-{k}")
+        crawler.gravar_snapshot_modelo(site_url, site_url, f"<html>{k}</html>", versoes)
+        return versoes
+    monkeypatch.setattr(crawler, "extrair_modelo", extrair_modelo)
+    return chamadas
+
+def versoes(k):
+    return [{"versao": f"C3 V{k}"}]
+
+
+def test_tentativa_atrasada_nao_grava(crawler, monkeypatch, prazo, tmp_path):
+    liberar = threading.Event()
+    def travada(navegador, k):
+        liberar.wait(5)  # motor HTTP pendurado: o prazo não tem como interromper
+        return versoes(k)
+    chamadas = falso(crawler, monkeypatch, [travada, lambda navegador, k: versoes(k)])
+    resultado, _ = crawler.extrair_modelo_com_prazo(crawler.NavegadorSobDemanda(), "C3", "https://exemplo/c3")
+    assert resultado == versoes(2)
+    liberar.set()
+    chamadas[0].join(5)
+    assert crawler.estado_atual["https://exemplo/c3"]["versoes"] == versoes(2)
+    assert crawler.estado_atual["https://exemplo/c3"]["impressoes"] == {"http": "impressao-2"}
+    assert crawler.desfechos_modelos["C3"]["desfecho"] == "ok_retentativa"
+    manifestos = [p for p in (tmp_path / crawler.CACHE_DOM_DIR).rglob("*.json")]
+    assert len(manifestos) == 1
+
+def test_vazio_mantem_o_navegador(crawler, monkeypatch, prazo):
+    def vazia(navegador, k):
+        navegador.obter()
+        return []
+    falso(crawler, monkeypatch, [vazia, lambda navegador, k: navegador.obter() and versoes(k)])
+    navegador = crawler.NavegadorSobDemanda()
+    resultado, seguinte = crawler.extrair_modelo_com_prazo(navegador, "C3", "https://exemplo/c3")
+    assert resultado == versoes(2)
+    assert seguinte is navegador and not navegador.cancelado
+    assert len(prazo) == 1 and not prazo[0].morto.is_set()
+
+def test_prazo_esgotado_troca_o_navegador(crawler, monkeypatch, prazo):
+    def travada(navegador, k):
+        driver = navegador.obter()
+        driver.morto.wait(5)
+        raise RuntimeError("sessão derrubada")
+    chamadas = falso(crawler, monkeypatch, [travada, lambda navegador, k: navegador.obter() and versoes(k)])
+    navegador = crawler.NavegadorSobDemanda()
+    resultado, seguinte = crawler.extrair_modelo_com_prazo(navegador, "C3", "https://exemplo/c3")
+    chamadas[0].join(5)
+    assert resultado == versoes(2)
+    assert navegador.cancelado and seguinte is not navegador
+    assert len(prazo) == 2 and prazo[0].morto.is_set() and not prazo[1].morto.is_set()
+    assert crawler.estado_atual["https://exemplo/c3"]["versoes"] == versoes(2)
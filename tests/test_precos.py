@@ -0,0 +1,33 @@
+# Preço em centavos a partir do texto do card, sem confundir a parcela com o preço do carro.
+
+import pytest
+
+import precos
+
+
+@pytest.mark.parametrize("texto, trecho, valor", [
+    ("R$ 129.990", "R$ 129.990", 12999000),
+    ("A partir de R$ 99.990,90", "R$ 99.990,90", 9999090),
+    ("C3 Feel 1.0 2025 A partir de R$ 99.990,9", "R$ 99.990,9", 9999090),
+    ("48x de R$ 2.499 ou R$ 119.990 à vista", "R$ 119.990", 11999000),
+    ("Parcelas de R$ 1.999 | Preço: R$ 129.990", "R$ 129.990", 12999000),
+    ("Em 36 x R$ 3.100,50. A partir de R$ 99.990", "R$ 99.990", 9999000),
+    ("A partir de R$ 99.990 ou 48x de R$ 2.499", "R$ 99.990", 9999000),
+    ("A partir de R$ 259.990 150 cv", "R$ 259.990", 25999000),
+    ("C5 Aircross R$ 189.990 1.000 kg de carga", "R$ 189.990", 18999000),
+    ("De R$ 150.000 por R$ 129.990", "R$ 129.990", 12999000),
+    ("R$ 129.990 R$ 134.990", "R$ 134.990", 13499000),
+    ("129.990", None, 12999000),
+    ("Motor 1.6 de 150 cv", None, None),
+    ("2025", None, None),
+    ("", None, None),
+])
+def test_preco_do_card(texto, trecho, valor):
+    assert precos.trecho_preco(texto) == trecho
+    assert precos.centavos(texto) == valor
+
+def test_so_parcela_nao_vira_preco():
+    texto = "Leve já: 48x de R$ 2.499"
+    assert precos.trecho_preco(texto) is None
+    assert precos.centavos(texto) is None
+    assert precos.parsear_preco(texto) == {"preco_centavos": None, "preco_texto": texto}
@@ -0,0 +1,63 @@
+# Modo serviço: cada job começa uma execução nova (data, estado incremental, versões já
+# gravadas, desfechos e métricas), sem herdar o que os jobs anteriores deixaram no processo.
+
+import pytest
+
+
+class ColetaFalsa:
+    """Faz o papel do CrawlerCitroen: anota o estado que o job encontrou e suja o da execução."""
+    vistos = []
+
+    def __init__(self, crawler, navegador=None, **kwargs):
+        self.crawler, self.navegador, self.modelos = crawler, navegador, {}
+
+    def extrair_modelo(self, site_url, modelo):
+        crawler = self.crawler
+        ColetaFalsa.vistos.append({
+            "data": crawler.DATA_EXECUCAO, "estado_atual": dict(crawler.estado_atual),
+            "versoes_existentes_iniciado": crawler.versoes_existentes_iniciado,
+            "desfechos": dict(crawler.desfechos_modelos),
+            "contadores": dict(crawler.rastreamento.contadores_totais),
+            "eventos": len(crawler.rastreamento.eventos),
+        })
+        crawler.DATA_EXECUCAO = "2000-01-01"
+        crawler.estado_atual[site_url] = {"impressao": "x"}
+        crawler.versoes_existentes_iniciado = True
+        crawler.desfechos_modelos[modelo] = "ok"
+        crawler.rastreamento.contar("comandos_webdriver")
+        crawler.rastreamento.registrar_evento("carregar_pagina", crawler.time.perf_counter(), 0.1, modelo=modelo)
+        return []
+
+
+@pytest.fixture
+def servico(crawler, monkeypatch):
+    import servico
+    ColetaFalsa.vistos = []
+    monkeypatch.setattr(crawler, "CrawlerCitroen", lambda **kwargs: ColetaFalsa(crawler, **kwargs))
+    monkeypatch.setattr(crawler, "duracoes_anteriores", {})
+    monkeypatch.setattr(crawler, "duracoes_atuais", {})
+    monkeypatch.setattr(crawler, "desfechos_modelos", {})
+    return servico.ServicoCrawler(sessoes=1)
+
+def job(url):
+    return {"id": "1", "tipo": "modelo", "pedido": {"tipo": "modelo", "url": url}}
+
+
+def test_cada_job_comeca_execucao_nova(crawler, servico):
+    sessao = servico.sessoes[0]
+    servico._executar(job("https://exemplo/c3"), sessao)
+    servico._executar(job("https://exemplo/c4"), sessao)
+    primeiro, segundo = ColetaFalsa.vistos
+    assert segundo["data"] == primeiro["data"] != "2000-01-01"
+    assert segundo["estado_atual"] == {}
+    assert segundo["versoes_existentes_iniciado"] is False
+    assert segundo["desfechos"] == {}
+    assert segundo["contadores"] == {} and segundo["eventos"] == 0
+    assert servico.ativos == 0
+
+def test_job_simultaneo_compartilha_a_execucao(crawler, servico):
+    servico.ativos = 1  # outro job em andamento em outra sessão
+    crawler.estado_atual["https://exemplo/c3"] = {"impressao": "x"}
+    servico._executar(job("https://exemplo/c4"), servico.sessoes[0])
+    assert ColetaFalsa.vistos[0]["estado_atual"] == {"https://exemplo/c3": {"impressao": "x"}}
+    assert servico.ativos == 1
@@ -0,0 +1,62 @@
+# Checagem de duplicatas no Supabase: uma carga paginada por marca, não uma consulta por versão.
+
+from tests.supabase_falso import SupabaseFalso
+
+
+def catalogo_remoto(modelos=5, versoes=500):
+    linhas = [{"marca": "citroen", "modelo": f"C{m}", "versao": f"C{m} V{v}"} for m in range(modelos) for v in range(versoes)]
+    return {"veiculos": linhas + [{"marca": "peugeot", "modelo": "208", "versao": "208 Active"}]}
+
+def usar_cliente(crawler, monkeypatch, cliente):
+    monkeypatch.setattr(crawler, "supabase", cliente)
+    monkeypatch.setattr(crawler, "supabase_iniciado", True)
+
+
+def test_carga_paginada_unica(crawler, monkeypatch):
+    cliente = SupabaseFalso(catalogo_remoto())
+    usar_cliente(crawler, monkeypatch, cliente)
+    assert len(crawler.obter_versoes_existentes()) == 2500
+    # 2500 linhas em páginas de 1000: três selects, todos filtrando a marca
+    selects = cliente.execucoes("select")
+    assert [consulta.intervalo for consulta in selects] == [(0, 999), (1000, 1999), (2000, 2999)]
+    assert all(("marca", "citroen") in consulta.filtros for consulta in selects)
+
+    existentes = [crawler.versao_ja_existe(f"C{m}", f"C{m} V{v}") for m in range(5) for v in range(0, 500, 7)]
+    assert all(existentes)
+    assert not crawler.versao_ja_existe("C1", "C1 Nova")
+    assert not crawler.versao_ja_existe("208", "208 Active")  # outra marca
+    assert len(cliente.chamadas) == 3  # nenhuma consulta por versão
+
+
+def test_recarga_por_modelo(crawler, monkeypatch):
+    cliente = SupabaseFalso(catalogo_remoto(modelos=2, versoes=3))
+    usar_cliente(crawler, monkeypatch, cliente)
+    crawler.obter_versoes_existentes()
+    cliente.tabelas["veiculos"] = [linha for linha in cliente.tabelas["veiculos"] if linha["versao"] != "C1 V0"]
+    cliente.tabelas["veiculos"].append({"marca": "citroen", "modelo": "C1", "versao": "C1 V9"})
+    crawler.atualizar_versoes_existentes("C1")
+    assert ("modelo", "C1") in cliente.chamadas[-1].filtros
+    assert not crawler.versao_ja_existe("C1", "C1 V0")
+    assert crawler.versao_ja_existe("C1", "C1 V9")
+    assert crawler.versao_ja_existe("C0", "C0 V0")
+
+
+def test_falha_na_carga_consulta_versao_a_versao(crawler, monkeypatch):
+    cliente = SupabaseFalso(catalogo_remoto(modelos=1, versoes=2), falhar_em={"select": [ConnectionError("sem rede")]})
+    usar_cliente(crawler, monkeypatch, cliente)
+    assert crawler.obter_versoes_existentes() is None
+    # Sem o conjunto em memória, cada checagem volta a ser um count por versão (como antes)
+    assert crawler.versao_ja_existe("C0", "C0 V1")
+    assert not crawler.versao_ja_existe("C0", "C0 V7")
+    contagens = cliente.chamadas[1:]
+    assert len(contagens) == 2 and all(consulta.contar == "exact" for consulta in contagens)
+    assert ("versao", "C0 V7") in contagens[-1].filtros
+
+
+def test_recarga_com_falha_mantem_o_conjunto(crawler, monkeypatch):
+    cliente = SupabaseFalso(catalogo_remoto(modelos=1, versoes=2))
+    usar_cliente(crawler, monkeypatch, cliente)
+    crawler.obter_versoes_existentes()
+    cliente.falhar_em["select"] = [TimeoutError("lento")]
+    crawler.atualizar_versoes_existentes("C0")
+    assert crawler.versao_ja_existe("C0", "C0 V1")